@@ -0,0 +1,218 @@
+from datetime import date, datetime, timedelta
+
+# Sales rollups for the admin dashboard. sales_daily holds one row per
+# (day, category, country) with the orders, units and merchandise revenue
+# (lines only, no shipping) of every order that isn't cancelled or refunded.
+# Triggers keep it current inside the order's own write transaction, so the
+# dashboard reads a few hundred small rows and never touches orders.
+#
+# category '*' rows carry whole-order totals: an order with lines in two
+# categories counts once there and once in each category row.
+#
+# Lines are attributed to the category their product had when the order
+# was placed: order_items.category keeps it (filled in by a trigger when the
+# writer leaves it out), so the insert trigger, the status trigger and
+# rebuild_sales_rollup() all agree however the catalog is recategorized
+# later. rebuild_sales_rollup() re-derives everything from orders after a
+# bulk import or a correction to those stored categories.
+
+ALL_CATEGORIES = '*'
+UNCATEGORIZED = 'Uncategorized'
+EXCLUDED_STATUSES = ('cancelled', 'refunded')
+DIMENSIONS = ('day', 'category', 'country')
+DEFAULT_DAYS = 30
+
+_EXCLUDED = ', '.join(f"'{status}'" for status in EXCLUDED_STATUSES)
+
+def _counted(alias):
+    return f"COALESCE({alias}.status, 'pending') NOT IN ({_EXCLUDED})"
+
+def _line_category(alias):
+    # The line's stored category; for a line inserted without one, the value
+    # order_items_category_ai stores (trigger order doesn't matter)
+    return (f"COALESCE({alias}.category, (SELECT category FROM products WHERE id = {alias}.product_id), "
+            f"'{UNCATEGORIZED}')")
+
+ORDER_ITEM_CATEGORY_SCHEMA = f'''
+    CREATE TRIGGER IF NOT EXISTS order_items_category_ai AFTER INSERT ON order_items
+    WHEN new.category IS NULL
+    BEGIN
+        UPDATE order_items SET category = {_line_category('new')}
+        WHERE order_id = new.order_id AND product_id = new.product_id;
+    END;
+'''
+
+def backfill_line_categories(conn):
+    """Give lines from before order_items.category their product's current category (caller commits)"""
+    conn.execute(f'''
+        UPDATE order_items SET category = {_line_category('order_items')}
+        WHERE category IS NULL
+    ''')
+
+_ADD = '''
+    ON CONFLICT(day, category, country) DO UPDATE SET
+        orders = orders + excluded.orders,
+        units = units + excluded.units,
+        revenue = revenue + excluded.revenue
+'''
+
+# One order's contribution, per category and as a '*' total
+_ORDER_LINES = f'''
+    SELECT {_line_category('i')} AS category, 1 AS orders,
+           SUM(i.qty) AS units, SUM(i.qty * i.unit_price) AS revenue
+    FROM order_items i
+    WHERE i.order_id = new.id GROUP BY 1
+    UNION ALL
+    SELECT '{ALL_CATEGORIES}', 1, SUM(qty), SUM(qty * unit_price)
+    FROM order_items WHERE order_id = new.id HAVING COUNT(*) > 0
+'''
+
+SALES_ROLLUP_SCHEMA = f'''
+    CREATE TABLE IF NOT EXISTS sales_daily (
+        day TEXT NOT NULL,
+        category TEXT NOT NULL,
+        country TEXT NOT NULL,
+        orders INTEGER NOT NULL DEFAULT 0,
+        units INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, category, country)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_orders_created ON orders(created_at);
+
+    -- Lines arrive after their order header; the first line of an order in a
+    -- category (or at all, for '*') counts the order there
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_item_ai AFTER INSERT ON order_items
+    WHEN EXISTS (SELECT 1 FROM orders o WHERE o.id = new.order_id AND {_counted('o')})
+    BEGIN
+        INSERT INTO sales_daily (day, category, country, orders, units, revenue)
+        SELECT date(o.created_at), c.category, COALESCE(o.shipping_country, ''),
+               (SELECT COUNT(*) FROM order_items i
+                WHERE i.order_id = new.order_id
+                  AND (c.category = '{ALL_CATEGORIES}' OR {_line_category('i')} = c.category)) = 1,
+               new.qty, new.qty * new.unit_price
+        FROM orders o,
+             (SELECT '{ALL_CATEGORIES}' AS category
+              UNION ALL
+              SELECT {_line_category('new')}) c
+        WHERE o.id = new.order_id
+        {_ADD};
+    END;
+
+    -- Cancelling or refunding takes the order back out; reinstating it adds it again
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_status_au AFTER UPDATE OF status ON orders
+    WHEN ({_counted('old')}) != ({_counted('new')})
+    BEGIN
+        INSERT INTO sales_daily (day, category, country, orders, units, revenue)
+        SELECT date(new.created_at), lines.category, COALESCE(new.shipping_country, ''),
+               sign.value * lines.orders, sign.value * lines.units, sign.value * lines.revenue
+        FROM ({_ORDER_LINES}) lines,
+             (SELECT CASE WHEN {_counted('new')} THEN 1 ELSE -1 END AS value) sign
+        WHERE true
+        {_ADD};
+    END;
+'''
+
+# Driven by idx_orders_created, then order_items primary-key seeks per order
+_AGGREGATE = f'''
+    INSERT INTO sales_daily (day, category, country, orders, units, revenue)
+    SELECT date(o.created_at), {_line_category('i')}, COALESCE(o.shipping_country, ''),
+           COUNT(DISTINCT o.id), SUM(i.qty), SUM(i.qty * i.unit_price)
+    FROM orders o
+    JOIN order_items i ON i.order_id = o.id
+    WHERE o.created_at >= ?1 AND o.created_at < ?2 AND {_counted('o')}
+    GROUP BY 1, 2, 3
+    UNION ALL
+    SELECT date(o.created_at), '{ALL_CATEGORIES}', COALESCE(o.shipping_country, ''),
+           COUNT(DISTINCT o.id), SUM(i.qty), SUM(i.qty * i.unit_price)
+    FROM orders o JOIN order_items i ON i.order_id = o.id
+    WHERE o.created_at >= ?1 AND o.created_at < ?2 AND {_counted('o')}
+    GROUP BY 1, 3
+'''
+
+def aggregate_days(conn, start='0000-01-01', end='9999-12-31'):
+    """Recompute sales_daily for days in [start, end) from orders (caller commits)"""
+    conn.execute('DELETE FROM sales_daily WHERE day >= ? AND day < ?', (start, end))
+    conn.execute(_AGGREGATE, (start, end))
+
+def rebuild_sales_rollup(conn, since=None):
+    """Re-aggregate sales_daily from orders, one day per short write transaction
+
+    Each day is recomputed under the write lock, so orders placed while the
+    job runs are neither lost nor double counted, and checkout only ever
+    waits for one day's worth of work. Returns the number of days rebuilt.
+    """
+    since = since or '0000-01-01'
+    days = {row[0] for row in conn.execute(
+        'SELECT DISTINCT date(created_at) FROM orders WHERE created_at >= ?', (since,)) if row[0]}
+    days |= {row[0] for row in conn.execute('SELECT DISTINCT day FROM sales_daily WHERE day >= ?', (since,))}
+    conn.commit()
+    for day in sorted(days):
+        following = (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            aggregate_days(conn, day, following)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+    return len(days)
+
+def _parse_day(value, default):
+    if not value:
+        return default
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('Dates must be YYYY-MM-DD')
+
+def sales_report(conn, start=None, end=None, by='day', category=None, country=None):
+    """Sum sales_daily over [start, end], grouped by any of day/category/country"""
+    end_day = _parse_day(end, date.today())
+    start_day = _parse_day(start, end_day - timedelta(days=DEFAULT_DAYS - 1))
+    if start_day > end_day:
+        raise ValueError('from must not be after to')
+    dimensions = [name.strip() for name in (by or '').split(',') if name.strip()]
+    unknown = [name for name in dimensions if name not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f'by must be any of: {", ".join(DIMENSIONS)}')
+    dimensions = list(dict.fromkeys(dimensions))
+
+    where = ['day BETWEEN ? AND ?']
+    params = [start_day.isoformat(), end_day.isoformat()]
+    if country:
+        where.append('country = ?')
+        params.append(country)
+    # Totals come from the '*' rows (or the one filtered category), so an
+    # order spanning categories still counts once
+    total_category = category or ALL_CATEGORIES
+    if category or 'category' not in dimensions:
+        row_category = ('category = ?', total_category)
+    else:
+        row_category = ('category != ?', ALL_CATEGORIES)
+
+    columns = ', '.join(dimensions)
+    sums = 'SUM(orders) AS orders, SUM(units) AS units, ROUND(SUM(revenue), 2) AS revenue'
+    rows = conn.execute(f'''
+        SELECT {columns}, {sums} FROM sales_daily
+        WHERE {' AND '.join(where)} AND {row_category[0]}
+        GROUP BY {columns} ORDER BY {columns}
+    ''', params + [row_category[1]]).fetchall() if dimensions else []
+    totals = conn.execute(f"SELECT {sums} FROM sales_daily WHERE {' AND '.join(where)} AND category = ?",
+                          params + [total_category]).fetchone()
+    return {
+        'from': start_day.isoformat(),
+        'to': end_day.isoformat(),
+        'by': dimensions,
+        'rows': [dict(row) for row in rows],
+        'totals': {'orders': totals['orders'] or 0, 'units': totals['units'] or 0,
+                   'revenue': totals['revenue'] or 0.0},
+    }
+
+if __name__ == '__main__':
+    import argparse
+    from database import get_db
+    parser = argparse.ArgumentParser(description='Rebuild the sales_daily rollup from orders')
+    parser.add_argument('--since', help='only days on or after YYYY-MM-DD')
+    args = parser.parse_args()
+    rebuilt = rebuild_sales_rollup(get_db(), args.since)
+    print(f"✅ Rebuilt sales rollup for {rebuilt} days")
@@ -1,8 +1,11 @@
 
-from flask import Flask, jsonify, request, send_from_directory, session
+from flask import Flask, Response, jsonify, redirect, request, send_file, session
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from werkzeug.middleware.proxy_fix import ProxyFix
+import io
+import math
 import sqlite3
 import json
 from datetime import datetime
@@ -11,9 +14,40 @@ import uuid
 import requests
 import secrets
 import re
+import sys
+import subprocess
+import threading
 from cj_client import CJDropshippingClient
+from database import DATABASE, get_db, release_db
+from catalog_cache import CatalogCache
+from catalog import PRODUCT_COLUMNS, get_products_by_ids, item_etag, list_products_page, parse_fields, parse_ids, project
+from search import search_products
+from cj_sync import enqueue_run, get_run
+from categorizer import load_categorizer, recategorize
+from facets import category_facets
+from analytics import sales_report
+from paypal_client import PayPalClient, PayPalError
+from resilience import UpstreamUnavailable
+from orders import OrderError, insert_order, customer_orders, order_detail
+from migrations import migrate
+from catalog_io import FORMATS, MIMETYPES, EXPORT_TABLES, format_for, import_products, seed_if_empty, stream_export
+from static_assets import StaticAssets
+from image_cache import ImageCache, ImageError, preferred_format
+from limiter_storage import LimiterStats
+import metrics
+from responses import FastJSONProvider, cached_variant, compress_response, negotiate_encoding
 
-app = Flask(__name__, static_folder='.', static_url_path='')
+# Static files are served by static_assets (from dist/ once build_assets.py has run)
+app = Flask(__name__, static_folder=None)
+app.json = FastJSONProvider(app)
+# deploy.sh puts nginx in front; trust its X-Forwarded-For/-Proto so rate
+# limits key on the shopper's IP, not 127.0.0.1. Set TRUSTED_PROXIES=0 when
+# gunicorn is reachable directly, or clients could pick their own address
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 1))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES, x_proto=TRUSTED_PROXIES)
+# Registered first so its after_request runs last and times the whole response
+metrics.init_app(app)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', secrets.token_hex(32))
 app.config['SESSION_COOKIE_SECURE'] = True
 app.config['SESSION_COOKIE_HTTPONLY'] = True
@@ -21,22 +55,55 @@ app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 
 CORS(app, supports_credentials=True)
 
-# Rate limiting
+# Rate limiting. Counters live in a SQLite WAL file (limiter_storage.py) so
+# every worker on the host enforces the same limits. The defaults guard
+# writes and admin-ish routes; catalog reads are cached and exempt, and
+# search has its own per-minute limit sized for type-ahead
 limiter = Limiter(
     app=app,
     key_func=get_remote_address,
     default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://"
+    storage_uri=os.environ.get('RATELIMIT_STORAGE_URI', 'sqlite:///ratelimits.db'),
+    strategy='sliding-window-counter'
 )
+limiter_stats = LimiterStats(limiter.limiter.storage)
+
+# Comma-separated client IPs (health checks, the office) that skip rate limiting
+RATELIMIT_BYPASS = {ip.strip() for ip in os.environ.get('RATELIMIT_BYPASS', '').split(',') if ip.strip()}
+
+@limiter.request_filter
+def rate_limit_bypass():
+    return get_remote_address() in RATELIMIT_BYPASS
+
+@app.after_request
+def record_rate_limit(response):
+    current = limiter.current_limit
+    if current is not None:
+        limiter_stats.record(request.endpoint, current.breached)
+    return response
 
 cj_client = CJDropshippingClient()
+paypal_client = PayPalClient()
+metrics.instrument_session(cj_client.session, 'cj')
+metrics.instrument_cache(cj_client.cache, 'cj')
+metrics.instrument_session(paypal_client.session, 'paypal')
+metrics.instrument_guard(cj_client.guard, 'cj')
+metrics.instrument_guard(paypal_client.guard, 'paypal')
+
+# Connections are pooled per thread in database.py; hand them back after each request
+app.teardown_appcontext(release_db)
+app.after_request(compress_response)
 
-DATABASE = 'babyzion.db'
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+static_assets = StaticAssets(BASE_DIR, os.environ.get('STATIC_DIST', os.path.join(BASE_DIR, 'dist')))
+image_cache = ImageCache(os.environ.get('IMAGE_CACHE_DIR', os.path.join(BASE_DIR, 'image_cache')),
+                         int(os.environ.get('IMAGE_CACHE_MAX_MB', 512)) * 1024 * 1024)
+metrics.instrument_session(image_cache.session, 'images')
 
-def get_db():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+catalog_cache = CatalogCache(max_entries=int(os.environ.get('CATALOG_CACHE_ENTRIES', 128)))
+# Search gets its own, smaller LRU: one entry per query typed, so type-ahead
+# churn would otherwise evict the hot listing and category bodies
+search_cache = CatalogCache(max_entries=int(os.environ.get('SEARCH_CACHE_ENTRIES', 64)))
 
 def validate_email(email):
     """Validate email format"""
@@ -48,6 +115,18 @@ def validate_phone(phone):
     pattern = r'^\+?[0-9]{10,15}$'
     return re.match(pattern, phone.replace(' ', '').replace('-', '')) is not None
 
+def parse_amount(value):
+    """A positive, finite payment amount rounded to cents, or None"""
+    if isinstance(value, bool):
+        return None
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(amount) or amount <= 0:
+        return None
+    return round(amount, 2)
+
 def sanitize_input(text, max_length=500):
     """Sanitize user input"""
     if not text:
@@ -55,116 +134,212 @@ def sanitize_input(text, max_length=500):
     text = str(text).strip()
     return text[:max_length]
 
+# Starter catalog for a brand-new database (init_db.py seeds the full one)
+STARTER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'starter_products.ndjson')
+
 def init_db():
+    """Bring the schema up to date; a no-op pragma read when it already is"""
     with app.app_context():
         conn = get_db()
-        conn.executescript('''
-            CREATE TABLE IF NOT EXISTS products (
-                id TEXT PRIMARY KEY, name TEXT, description TEXT, price REAL,
-                category TEXT, image TEXT, in_stock INTEGER DEFAULT 1
-            );
-            CREATE TABLE IF NOT EXISTS orders (
-                id TEXT PRIMARY KEY, customer_name TEXT, customer_email TEXT,
-                customer_phone TEXT, shipping_address TEXT, shipping_city TEXT,
-                shipping_country TEXT, items TEXT, subtotal REAL,
-                shipping_cost REAL, total REAL, status TEXT DEFAULT 'pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            CREATE TABLE IF NOT EXISTS uploads (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, product_name TEXT,
-                description TEXT, price REAL, category TEXT,
-                seller_name TEXT, seller_email TEXT, status TEXT DEFAULT 'pending'
-            );
-        ''')
-        
-        count = conn.execute('SELECT COUNT(*) FROM products').fetchone()[0]
-        if count == 0:
-            products = [
-                ('P001', 'Somali Dirac Baby Set', 'Premium cultural wear', 35.00, 'Cultural Baby Wear', 'https://images.unsplash.com/photo-1515488042361-ee00e0ddd4e4?w=400&h=400&fit=crop', 1),
-                ('P002', 'Montessori Wooden Rattle', '100% organic beech wood', 15.00, 'Wooden Toys', 'https://images.unsplash.com/photo-1580130732478-3ddc2f96f6e4?w=400&h=400&fit=crop', 1),
-                ('P003', 'Newborn Swaddle Pack', '3-piece muslin set', 22.00, 'Newborn Essentials', 'https://images.unsplash.com/photo-1515488042361-ee00e0ddd4e4?w=400&h=400&fit=crop', 1),
-                ('P004', 'Mom & Baby Ankara Set', 'Matching mommy-me', 55.00, 'Mom & Baby Sets', 'https://images.unsplash.com/photo-1566694271453-390536dd1f0d?w=400&h=400&fit=crop', 1),
-                ('P005', 'Eid Mubarak Onesie', 'Gold embroidery', 25.00, 'Cultural Baby Wear', 'https://images.unsplash.com/photo-1515488042361-ee00e0ddd4e4?w=400&h=400&fit=crop', 1),
-                ('P006', 'Silicone Teething Ring', 'Food-grade silicone', 9.00, 'Wooden Toys', 'https://images.unsplash.com/photo-1580130732478-3ddc2f96f6e4?w=400&h=400&fit=crop', 1)
-            ]
-            conn.executemany('INSERT INTO products VALUES (?,?,?,?,?,?,?)', products)
-            print(f"✅ Seeded {len(products)} products into database")
-        conn.commit()
+        if migrate(conn):
+            seed_if_empty(conn, STARTER_FILE)
 
 init_db()
 
 @app.route('/')
+@limiter.exempt
 def index():
-    return send_from_directory('.', 'index.html')
+    return static_assets.serve('index.html')
+
+@app.route('/img/<product_id>/<size>')
+@limiter.exempt
+def product_image(product_id, size):
+    row = get_db().execute('SELECT image FROM products WHERE id = ?', (product_id,)).fetchone()
+    if row is None or not row['image']:
+        return jsonify({'error': 'Image not found'}), 404
+    try:
+        path, mimetype, etag = image_cache.get(product_id, row['image'], size,
+                                               preferred_format(request.accept_mimetypes))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except ImageError as e:
+        # Let the browser try the origin itself rather than show a broken image
+        print(f"⚠️ Image proxy miss for {product_id}: {e}")
+        return redirect(row['image'], 302)
+    response = send_file(path, mimetype=mimetype, etag=etag, conditional=True, max_age=7 * 86400)
+    response.cache_control.public = True
+    response.vary.add('Accept')
+    return response
 
 @app.route('/<path:path>')
+@limiter.exempt
 def static_files(path):
-    return send_from_directory('.', path)
+    return static_assets.serve(path)
+
+def catalog_response(entry):
+    """Serve a cached catalog body with a strong ETag, answering If-None-Match with 304"""
+    encoding = negotiate_encoding(len(entry.body))
+    if encoding:
+        # Each representation gets its own strong ETag
+        response = Response(cached_variant(entry, encoding), mimetype='application/json')
+        response.headers['Content-Encoding'] = encoding
+        response.set_etag(f'{entry.etag}-{encoding}')
+    else:
+        response = Response(entry.body, mimetype='application/json')
+        response.set_etag(entry.etag)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def load_products(conn, category=None, fields=None):
+    if category:
+        rows = conn.execute(f'SELECT {PRODUCT_COLUMNS} FROM products WHERE category=? AND in_stock=1',
+                            (category,)).fetchall()
+    else:
+        rows = conn.execute(f'SELECT {PRODUCT_COLUMNS} FROM products WHERE in_stock=1').fetchall()
+    products_list = project([dict(row) for row in rows], fields)
+    print(f"✅ Cached {len(products_list)} products")
+    return products_list
+
+def load_categories(conn):
+    # category_stats is maintained by triggers; no products scan
+    cats = conn.execute('SELECT category FROM category_stats WHERE in_stock_count > 0 ORDER BY category').fetchall()
+    return [row['category'] for row in cats]
+
+PAGE_PARAMS = ('limit', 'cursor', 'sort', 'order', 'min_price', 'max_price')
 
 @app.route('/api/products')
+@limiter.exempt
 def products():
     try:
         category = request.args.get('category')
-        conn = get_db()
-        if category:
-            rows = conn.execute('SELECT * FROM products WHERE category=? AND in_stock=1', (category,)).fetchall()
+        # ?fields=id,name,price,image trims each product to just those columns
+        fields = parse_fields(request.args.get('fields'))
+        if 'ids' in request.args:
+            # Cart-sized batch lookup: {items, missing, out_of_stock}
+            result = get_products_by_ids(get_db(), parse_ids(request.args['ids']), fields)
+            response = jsonify(result)
+            response.add_etag()
+            response.headers['Cache-Control'] = 'no-cache'
+            return response.make_conditional(request)
+        if any(param in request.args for param in PAGE_PARAMS):
+            # Keyset-paginated listing: {items, next_cursor, has_more}
+            page_args = {
+                'category': category,
+                'sort': request.args.get('sort', 'created_at'),
+                'order': request.args.get('order', 'asc'),
+                'min_price': request.args.get('min_price', type=float),
+                'max_price': request.args.get('max_price', type=float),
+                'cursor': request.args.get('cursor'),
+                'limit': request.args.get('limit', 24, type=int),
+                'fields': fields,
+            }
+            key = ('page',) + tuple(sorted(page_args.items()))
+            entry = catalog_cache.get(get_db(), key,
+                                      lambda conn: list_products_page(conn, **page_args))
         else:
-            rows = conn.execute('SELECT * FROM products WHERE in_stock=1').fetchall()
-        conn.close()
-        products_list = [dict(row) for row in rows]
-        print(f"✅ Returning {len(products_list)} products")
-        return jsonify(products_list)
+            entry = catalog_cache.get(get_db(), ('products', category, fields),
+                                      lambda conn: load_products(conn, category, fields))
+        return catalog_response(entry)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"❌ Error fetching products: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/products/<product_id>')
+@limiter.exempt
+def product_detail(product_id):
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    row = get_db().execute(f'SELECT {PRODUCT_COLUMNS} FROM products WHERE id = ?', (product_id,)).fetchone()
+    if row is None:
+        return jsonify({'error': 'Product not found', 'id': product_id}), 404
+    product = dict(row)
+    response = jsonify(project([product], fields)[0])
+    # The product's version, qualified by the projection so each representation has its own validator
+    etag = item_etag(product)
+    response.set_etag(etag if fields is None else f"{etag}-{'.'.join(fields)}")
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 @app.route('/api/categories')
+@limiter.exempt
 def categories():
-    conn = get_db()
-    cats = conn.execute('SELECT DISTINCT category FROM products').fetchall()
-    conn.close()
-    return jsonify([row['category'] for row in cats])
+    entry = catalog_cache.get(get_db(), ('categories',), load_categories)
+    return catalog_response(entry)
+
+@app.route('/api/facets')
+@limiter.exempt
+def facets():
+    entry = catalog_cache.get(get_db(), ('facets',), category_facets)
+    return catalog_response(entry)
+
+@app.route('/api/search')
+@limiter.limit("120 per minute")
+def search():
+    q = sanitize_input(request.args.get('q'), 100)
+    limit = request.args.get('limit', 20, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    entry = search_cache.get(get_db(), (q.lower(), limit, offset, fields),
+                             lambda conn: search_products(conn, q, limit, offset, fields))
+    return catalog_response(entry)
 
 # CJ Dropshipping Integration
+# A sync can take minutes, longer than gunicorn's --timeout, so the request
+# only queues it: cj_sync.py runs it in its own process and records the
+# outcome for GET /api/cj/sync/<id>
+def launch_sync(run_id):
+    log = open(os.path.join(BASE_DIR, 'cj_sync.log'), 'ab')
+    process = subprocess.Popen([sys.executable, os.path.join(BASE_DIR, 'cj_sync.py'), '--run', str(run_id)],
+                               cwd=BASE_DIR, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    log.close()
+    # Reap it when it exits so finished syncs don't linger as zombies
+    threading.Thread(target=process.wait, daemon=True).start()
+
 @app.route('/api/cj/sync', methods=['POST'])
 def sync_cj_products():
+    data = request.get_json(silent=True) or {}
     try:
-        data = request.json or {}
-        keyword = data.get('keyword', 'baby')
-        page_size = min(int(data.get('page_size', 50)), 100)
-        
-        products = cj_client.search_products(keyword=keyword, page_size=page_size)
-        
-        if not products:
-            return jsonify({
-                'success': False, 
-                'message': 'No products found or CJ API not configured',
-                'hint': 'Set CJ_EMAIL and CJ_API_KEY environment variables'
-            }), 200
-        
-        conn = get_db()
-        added = 0
-        for product in products:
-            try:
-                conn.execute('''
-                    INSERT OR REPLACE INTO products (id, name, description, price, category, image, in_stock)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (product['id'], product['name'], product['description'], 
-                      product['price'], product['category'], product['image'], product['in_stock']))
-                added += 1
-            except Exception as e:
-                print(f"Error inserting product: {e}")
-        
-        conn.commit()
-        conn.close()
-        
+        options = {
+            'keyword': sanitize_input(data.get('keyword') or 'baby', 100),
+            'page_size': max(1, min(int(data.get('page_size', 50)), 100)),
+            'max_pages': max(1, min(int(data.get('max_pages', 20)), 100)),
+            'warm_images': bool(data.get('warm_images')),
+        }
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'page_size and max_pages must be numbers'}), 400
+    if not cj_client.email or not cj_client.api_key:
         return jsonify({
-            'success': True,
-            'message': f'Synced {added} products from CJ Dropshipping',
-            'count': added
-        })
-    except Exception as e:
-        return jsonify({'success': False, 'message': str(e)}), 500
+            'success': False,
+            'message': 'CJ API not configured',
+            'hint': 'Set CJ_EMAIL and CJ_API_KEY environment variables'
+        }), 200
+    run_id = enqueue_run(get_db(), options)
+    if run_id is None:
+        return jsonify({'success': False, 'message': 'A CJ sync is already running'}), 409
+    launch_sync(run_id)
+    status_url = f'/api/cj/sync/{run_id}'
+    return jsonify({
+        'success': True,
+        'message': f"CJ sync for '{options['keyword']}' started",
+        'run_id': run_id,
+        'status_url': status_url
+    }), 202, {'Location': status_url}
+
+@app.route('/api/cj/sync/<int:run_id>')
+@limiter.exempt
+def cj_sync_status(run_id):
+    run = get_run(get_db(), run_id)
+    if run is None:
+        return jsonify({'error': 'Sync run not found'}), 404
+    return jsonify(run)
 
 # Orders Management
 @app.route('/api/orders', methods=['POST'])
@@ -202,50 +377,79 @@ def create_order():
         
         order_id = f"BZ{uuid.uuid4().hex[:8].upper()}"
         
-        conn = get_db()
-        conn.execute('''
-            INSERT INTO orders (id, customer_name, customer_email, customer_phone,
-                              shipping_address, shipping_city, shipping_country,
-                              items, subtotal, shipping_cost, total, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            order_id,
-            customer_name,
-            customer_email,
-            customer_phone,
-            shipping_address,
-            shipping_city,
-            shipping_country,
-            json.dumps(items),
-            float(data.get('subtotal', 0)),
-            float(data.get('shipping_cost', 12)),
-            float(data.get('total', 0)),
-            'pending'
-        ))
-        conn.commit()
-        conn.close()
+        # Prices come from the products table, never from the client
+        totals = insert_order(get_db(), order_id, {
+            'name': customer_name,
+            'email': customer_email,
+            'phone': customer_phone,
+            'address': shipping_address,
+            'city': shipping_city,
+            'country': shipping_country,
+        }, items)
         
         return jsonify({
             'success': True,
             'order_id': order_id,
+            'subtotal': totals['subtotal'],
+            'shipping_cost': totals['shipping_cost'],
+            'total': totals['total'],
             'message': 'Order created successfully'
         })
+    except OrderError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except ValueError as e:
         return jsonify({'success': False, 'message': 'Invalid numeric value'}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': 'Server error'}), 500
 
+@app.route('/api/orders', methods=['GET'])
+@limiter.limit("60 per minute")
+def order_history():
+    email = sanitize_input(request.args.get('email'), 100)
+    if not email or not validate_email(email):
+        return jsonify({'error': 'A valid email is required'}), 400
+    conn = get_db()
+    # Support staff use the admin token; a shopper proves the email with one of its order ids
+    if request.headers.get('X-Admin-Token'):
+        denied = require_admin()
+        if denied:
+            return denied
+    else:
+        owned = conn.execute('SELECT 1 FROM orders WHERE id = ? AND customer_email = ?',
+                             (request.args.get('order', ''), email)).fetchone()
+        if owned is None:
+            return jsonify({'error': 'Order not found'}), 404
+    try:
+        page = customer_orders(conn, email, cursor=request.args.get('cursor'),
+                               limit=request.args.get('limit', 20, type=int))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    response = jsonify(page)
+    response.add_etag()
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
 @app.route('/api/orders/<order_id>', methods=['GET'])
+@limiter.limit("60 per minute")
 def get_order(order_id):
+    # Support staff use the admin token; a shopper sends the email the order was placed with
+    email = None
+    if request.headers.get('X-Admin-Token'):
+        denied = require_admin()
+        if denied:
+            return denied
+    else:
+        email = sanitize_input(request.args.get('email'), 100)
+        if not email or not validate_email(email):
+            return jsonify({'error': 'A valid email is required'}), 400
     try:
-        conn = get_db()
-        order = conn.execute('SELECT * FROM orders WHERE id=?', (order_id,)).fetchone()
-        conn.close()
-        
-        if order:
-            return jsonify(dict(order))
-        else:
+        order = order_detail(get_db(), order_id, email=email)
+        if order is None:
             return jsonify({'error': 'Order not found'}), 404
+        response = jsonify(order)
+        response.add_etag()
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -271,95 +475,155 @@ def initialize_paystack():
         return jsonify({'success': False, 'message': 'Server error'}), 500
 
 # PayPal Payment Integration
+PAYPAL_NOT_CONFIGURED = {
+    'success': False,
+    'message': 'PayPal credentials not configured',
+    'hint': 'Set PAYPAL_CLIENT_ID and PAYPAL_CLIENT_SECRET'
+}
+
+def upstream_unavailable(error):
+    """503 with Retry-After for a call the upstream's breaker or bulkhead turned away"""
+    response = jsonify({'success': False, 'message': f'{error.service} is temporarily unavailable, please try again shortly'})
+    response.headers['Retry-After'] = str(max(1, round(error.retry_after or 1)))
+    return response, 503
+
 @app.route('/api/paypal/create-order', methods=['POST'])
 @limiter.limit("10 per hour")
 def create_paypal_order():
     try:
-        data = request.json
-        amount = data.get('amount', 0)
-        
-        paypal_client_id = os.environ.get('PAYPAL_CLIENT_ID', '')
-        paypal_secret = os.environ.get('PAYPAL_CLIENT_SECRET', '')
-        
-        if not paypal_client_id or not paypal_secret:
-            return jsonify({
-                'success': False,
-                'message': 'PayPal credentials not configured',
-                'hint': 'Set PAYPAL_CLIENT_ID and PAYPAL_CLIENT_SECRET'
-            }), 200
+        data = request.get_json(silent=True) or {}
+        amount = parse_amount(data.get('amount'))
+        if amount is None:
+            return jsonify({'success': False, 'message': 'Invalid amount'}), 400
         
-        paypal_base = os.environ.get('PAYPAL_BASE_URL', 'https://api-m.sandbox.paypal.com')
-        
-        auth_response = requests.post(
-            f'{paypal_base}/v1/oauth2/token',
-            auth=(paypal_client_id, paypal_secret),
-            data={'grant_type': 'client_credentials'},
-            headers={'Content-Type': 'application/x-www-form-urlencoded'}
-        )
-        
-        if not auth_response.ok:
-            return jsonify({'success': False, 'message': 'PayPal authentication failed'}), 500
-        
-        access_token = auth_response.json()['access_token']
-        
-        order_response = requests.post(
-            f'{paypal_base}/v2/checkout/orders',
-            headers={
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {access_token}'
-            },
-            json={
-                'intent': 'CAPTURE',
-                'purchase_units': [{
-                    'amount': {
-                        'currency_code': 'USD',
-                        'value': f'{amount:.2f}'
-                    }
-                }]
-            }
-        )
+        if not paypal_client.configured:
+            return jsonify(PAYPAL_NOT_CONFIGURED), 200
         
-        if order_response.ok:
-            order_data = order_response.json()
-            return jsonify({'success': True, 'order_id': order_data['id']})
-        else:
-            return jsonify({'success': False, 'message': 'Failed to create PayPal order'}), 500
-            
-    except Exception as e:
+        order_id = paypal_client.create_order(amount)
+        return jsonify({'success': True, 'order_id': order_id})
+    except PayPalError as e:
         return jsonify({'success': False, 'message': str(e)}), 500
+    except UpstreamUnavailable as e:
+        return upstream_unavailable(e)
+    except requests.Timeout:
+        return jsonify({'success': False, 'message': 'PayPal timed out, please try again'}), 504
+    except Exception as e:
+        print(f"❌ PayPal create-order error: {e}")
+        return jsonify({'success': False, 'message': 'Could not create PayPal order'}), 500
 
 @app.route('/api/paypal/capture-order/<order_id>', methods=['POST'])
 def capture_paypal_order(order_id):
     try:
-        paypal_client_id = os.environ.get('PAYPAL_CLIENT_ID', '')
-        paypal_secret = os.environ.get('PAYPAL_CLIENT_SECRET', '')
-        paypal_base = os.environ.get('PAYPAL_BASE_URL', 'https://api-m.sandbox.paypal.com')
-        
-        auth_response = requests.post(
-            f'{paypal_base}/v1/oauth2/token',
-            auth=(paypal_client_id, paypal_secret),
-            data={'grant_type': 'client_credentials'},
-            headers={'Content-Type': 'application/x-www-form-urlencoded'}
-        )
-        
-        access_token = auth_response.json()['access_token']
+        if not paypal_client.configured:
+            return jsonify(PAYPAL_NOT_CONFIGURED), 200
+        if not re.match(r'^[A-Za-z0-9-]{1,64}$', order_id):
+            return jsonify({'success': False, 'message': 'Invalid order id'}), 400
         
-        capture_response = requests.post(
-            f'{paypal_base}/v2/checkout/orders/{order_id}/capture',
-            headers={
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {access_token}'
-            }
-        )
-        
-        if capture_response.ok:
-            return jsonify({'success': True, 'data': capture_response.json()})
-        else:
-            return jsonify({'success': False, 'message': 'Failed to capture payment'}), 500
-            
+        capture = paypal_client.capture_order(order_id)
+        return jsonify({'success': True, 'data': capture})
+    except PayPalError as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+    except UpstreamUnavailable as e:
+        return upstream_unavailable(e)
+    except requests.Timeout:
+        return jsonify({'success': False, 'message': 'PayPal timed out, please try again'}), 504
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/metrics')
+@limiter.exempt
+def prometheus_metrics():
+    token = os.environ.get('METRICS_TOKEN')
+    if token and not secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({'error': 'Forbidden'}), 403
+    return Response(metrics.render(metrics.collect()), mimetype='text/plain; version=0.0.4')
+
+def require_admin():
+    """Return an error response unless the request carries ADMIN_TOKEN"""
+    token = os.environ.get('ADMIN_TOKEN')
+    if not token:
+        return jsonify({'error': 'Admin API not configured'}), 503
+    if not secrets.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+        return jsonify({'error': 'Forbidden'}), 403
+    return None
+
+@app.route('/api/admin/ratelimits')
+@limiter.exempt
+def rate_limit_stats():
+    denied = require_admin()
+    if denied:
+        return denied
+    return jsonify({'routes': limiter_stats.snapshot(), 'bypass': sorted(RATELIMIT_BYPASS)})
+
+@app.route('/api/admin/upstreams')
+@limiter.exempt
+def upstream_status():
+    denied = require_admin()
+    if denied:
+        return denied
+    return jsonify({'cj': cj_client.guard.status(), 'paypal': paypal_client.guard.status()})
+
+@app.route('/api/admin/cj-cache')
+@limiter.exempt
+def cj_cache_stats():
+    denied = require_admin()
+    if denied:
+        return denied
+    return jsonify(cj_client.cache.stats())
+
+@app.route('/api/admin/analytics')
+@limiter.exempt
+def sales_analytics():
+    denied = require_admin()
+    if denied:
+        return denied
+    try:
+        report = sales_report(get_db(), start=request.args.get('from'), end=request.args.get('to'),
+                              by=request.args.get('by', 'day'), category=request.args.get('category'),
+                              country=request.args.get('country'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(report)
+
+@app.route('/api/admin/recategorize', methods=['POST'])
+@limiter.exempt
+def recategorize_products():
+    denied = require_admin()
+    if denied:
+        return denied
+    data = request.get_json(silent=True) or {}
+    conn = get_db()
+    stats = recategorize(conn, load_categorizer(conn), id_prefix='' if data.get('all') else 'CJ_',
+                         dry_run=bool(data.get('dry_run')))
+    return jsonify(stats)
+
+@app.route('/api/admin/import', methods=['POST'])
+@limiter.exempt
+def import_catalog():
+    """Upsert products from an NDJSON or CSV request body, streamed a chunk at a time"""
+    denied = require_admin()
+    if denied:
+        return denied
+    fmt = request.args.get('format') or format_for(request.mimetype)
+    if fmt not in FORMATS:
+        return jsonify({'error': f'format must be one of: {", ".join(FORMATS)}'}), 400
+    body = io.TextIOWrapper(request.stream, encoding='utf-8', errors='replace', newline='')
+    return jsonify(import_products(get_db(), body, fmt))
+
+@app.route('/api/admin/export/<table>')
+@limiter.exempt
+def export_table(table):
+    denied = require_admin()
+    if denied:
+        return denied
+    fmt = request.args.get('format', 'ndjson')
+    if table not in EXPORT_TABLES or fmt not in FORMATS:
+        return jsonify({'error': f'Export {", ".join(EXPORT_TABLES)} as {" or ".join(FORMATS)}'}), 400
+    return Response(stream_export(DATABASE, table, fmt), mimetype=MIMETYPES[fmt], headers={
+        'Content-Disposition': f'attachment; filename="{table}-{datetime.now():%Y%m%d}.{fmt}"',
+        'Cache-Control': 'no-store',
+    })
+
 # Seller Upload
 @app.route('/api/uploads', methods=['GET', 'POST'])
 @limiter.limit("5 per hour")
@@ -368,7 +632,6 @@ def handle_uploads():
         try:
             conn = get_db()
             uploads = conn.execute('SELECT * FROM uploads ORDER BY id DESC LIMIT 100').fetchall()
-            conn.close()
             return jsonify([dict(upload) for upload in uploads])
         except Exception as e:
             return jsonify({'error': 'Server error'}), 500
@@ -405,7 +668,6 @@ def handle_uploads():
                 VALUES (?, ?, ?, ?, ?, ?)
             ''', (product_name, description, price, category, seller_name, seller_email))
             conn.commit()
-            conn.close()
             
             return jsonify({'success': True, 'message': 'Product uploaded for review'})
         except Exception as e:
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""Load-test BabyZion end to end and compare with a stored baseline.
+
+Seeds (or reuses) a scratch database, starts the CJ and PayPal stubs and
+app.py under gunicorn, drives a weighted mix of storefront and checkout
+requests from concurrent virtual shoppers, then reports throughput and
+p50/p95/p99 latency per route. Results are written to bench/results/ and,
+when bench/baseline.json exists, compared with it; any route whose p95 or
+throughput regresses past --tolerance makes the run exit non-zero.
+
+    python -m bench.run --products 100000 --orders 1000000 --workers 4 --duration 60
+    python -m bench.run --save-baseline            # record the current numbers
+    python -m bench.run --mix products_page=5,checkout=1 --paypal-latency 0.3
+    python -m bench.run --mix products_page=10,categories=5,checkout=3 --paypal-latency 3 --threads 4
+                                                   # catalog latency while PayPal crawls
+
+Without gunicorn installed, --dev-server runs the same app on Flask's
+threaded server (numbers are only comparable with other dev-server runs).
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import socket
+import argparse
+import tempfile
+import platform
+import threading
+import subprocess
+from datetime import datetime
+
+import requests
+
+from bench.seed import database_path, seed_database, CATEGORIES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT, 'bench')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+BENCH_ADMIN_TOKEN = 'bench-admin'
+
+# Default route mix, roughly what the storefront sees: mostly browsing,
+# some order lookups, a few purchases
+DEFAULT_MIX = {
+    'products_page': 30,
+    'products_category': 15,
+    'products_full': 3,
+    'categories': 15,
+    'search': 10,
+    'order_get': 10,
+    'order_history': 2,
+    'order_create': 8,
+    'checkout': 5,
+    'cj_sync': 0,
+}
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_for(url, timeout=30, method='GET'):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.request(method, url, timeout=1)
+            return
+        except requests.ReadTimeout:
+            return  # accepted the connection; only slow to answer (a delayed stub)
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    raise RuntimeError(f'{url} did not come up within {timeout}s')
+
+class Shopper:
+    """One virtual user: a keep-alive session plus the scenario functions"""
+
+    def __init__(self, base_url, rng, products, orders):
+        self.base_url = base_url
+        self.rng = rng
+        self.products = products
+        self.orders = orders
+        self.session = requests.Session()
+        self.created_orders = []
+
+    def call(self, record, label, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=30, **kwargs)
+            status = response.status_code
+        except requests.RequestException:
+            response, status = None, 0
+        record(label, time.perf_counter() - started, status)
+        return response
+
+    def product_id(self):
+        return f'BP{self.rng.randrange(self.products):07d}'
+
+    def cart(self):
+        return [{'id': self.product_id(), 'quantity': self.rng.randint(1, 3)}
+                for _ in range(self.rng.randint(1, 3))]
+
+    def customer(self):
+        number = self.rng.randrange(10 ** 6)
+        return {'name': f'Bench Shopper {number}', 'email': f'shopper{number}@example.com',
+                'phone': '+254700000000', 'address': '1 Moi Avenue', 'city': 'Nairobi', 'country': 'Kenya'}
+
+    def products_page(self, record):
+        # First page, then follow the cursor like "Load more" would
+        response = self.call(record, 'GET /api/products?limit', 'GET', '/api/products',
+                             params={'limit': 24, 'fields': 'id,name,description,price,image'})
+        if response is not None and response.ok and self.rng.random() < 0.5:
+            cursor = response.json().get('next_cursor')
+            if cursor:
+                self.call(record, 'GET /api/products?cursor', 'GET', '/api/products',
+                          params={'limit': 24, 'cursor': cursor, 'fields': 'id,name,description,price,image'})
+
+    def products_category(self, record):
+        self.call(record, 'GET /api/products?category', 'GET', '/api/products',
+                  params={'limit': 24, 'category': self.rng.choice(CATEGORIES), 'sort': 'price'})
+
+    def products_full(self, record):
+        self.call(record, 'GET /api/products', 'GET', '/api/products')
+
+    def categories(self, record):
+        self.call(record, 'GET /api/categories', 'GET', '/api/categories')
+
+    def search(self, record):
+        term = self.rng.choice(['organic', 'wooden rat', 'swaddle', 'bamboo bl', 'montessori', 'bib'])
+        self.call(record, 'GET /api/search', 'GET', '/api/search', params={'q': term})
+
+    def order_get(self, record):
+        # A shopper's own order (by its email) or, for a seeded one, a support lookup
+        if self.created_orders and self.rng.random() < 0.3:
+            order_id, email = self.rng.choice(self.created_orders)
+            self.call(record, 'GET /api/orders/<id>', 'GET', f'/api/orders/{order_id}', params={'email': email})
+        else:
+            order_id = f'BZB{self.rng.randrange(max(self.orders, 1)):08d}'
+            self.call(record, 'GET /api/orders/<id>', 'GET', f'/api/orders/{order_id}',
+                      headers={'X-Admin-Token': BENCH_ADMIN_TOKEN})
+
+    def order_history(self, record):
+        # A support lookup: a seeded returning customer's newest orders
+        email = f'customer{self.rng.randrange(max(self.orders // 4, 1))}@example.com'
+        self.call(record, 'GET /api/orders?email', 'GET', '/api/orders',
+                  params={'email': email, 'limit': 20}, headers={'X-Admin-Token': BENCH_ADMIN_TOKEN})
+
+    def order_create(self, record):
+        customer = self.customer()
+        response = self.call(record, 'POST /api/orders', 'POST', '/api/orders',
+                             json={**customer, 'items': self.cart()})
+        if response is not None and response.ok:
+            self.created_orders.append((response.json()['order_id'], customer['email']))
+        return response
+
+    def checkout(self, record):
+        # The whole purchase: create the order, open a PayPal order, capture it
+        # (a 4xx here is usually a cart holding an out-of-stock product)
+        started = time.perf_counter()
+        response = self.order_create(record)
+        if response is not None and response.ok:
+            response = self.call(record, 'POST /api/paypal/create-order', 'POST', '/api/paypal/create-order',
+                                 json={'amount': response.json()['total']})
+            if response is not None and response.ok:
+                paypal_id = response.json()['order_id']
+                response = self.call(record, 'POST /api/paypal/capture-order/<id>', 'POST',
+                                     f'/api/paypal/capture-order/{paypal_id}')
+        record('checkout flow', time.perf_counter() - started, response.status_code if response is not None else 0)
+
+    def cj_sync(self, record):
+        self.call(record, 'POST /api/cj/sync', 'POST', '/api/cj/sync',
+                  json={'keyword': 'baby', 'page_size': 50, 'max_pages': 4})
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.lock = threading.Lock()
+        self.enabled = False
+
+    def __call__(self, label, seconds, status):
+        if not self.enabled:
+            return
+        with self.lock:
+            entry = self.samples.setdefault(label, {'latencies': [], 'statuses': {}})
+            entry['latencies'].append(seconds)
+            entry['statuses'][status] = entry['statuses'].get(status, 0) + 1
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    # Nearest-rank percentile
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(recorder, elapsed):
+    routes = {}
+    for label, entry in sorted(recorder.samples.items()):
+        ordered = sorted(entry['latencies'])
+        errors = sum(count for status, count in entry['statuses'].items() if status == 0 or status >= 500)
+        routes[label] = {
+            'requests': len(ordered),
+            'throughput_rps': round(len(ordered) / elapsed, 2),
+            'p50_ms': round(percentile(ordered, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(ordered, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(ordered, 0.99) * 1000, 2),
+            'max_ms': round(ordered[-1] * 1000, 2),
+            'errors': errors,
+            'statuses': {str(status): count for status, count in sorted(entry['statuses'].items())},
+        }
+    total = sum(route['requests'] for label, route in routes.items() if label != 'checkout flow')
+    return {'total_requests': total, 'throughput_rps': round(total / elapsed, 2), 'routes': routes}
+
+def compare(results, baseline, tolerance):
+    """Return a list of human-readable regressions against baseline"""
+    regressions = []
+    for label, route in results['routes'].items():
+        before = baseline['routes'].get(label)
+        if not before:
+            continue
+        if before['p95_ms'] and route['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {before['p95_ms']}ms -> {route['p95_ms']}ms")
+        if before['throughput_rps'] and route['throughput_rps'] < before['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{label}: throughput {before['throughput_rps']} -> {route['throughput_rps']} req/s")
+        if route['errors'] > before['errors']:
+            regressions.append(f"{label}: errors {before['errors']} -> {route['errors']}")
+    return regressions
+
+def print_table(results, baseline=None):
+    print(f"\n{'route':<40}{'req':>8}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'err':>6}  vs baseline p95")
+    for label, route in results['routes'].items():
+        delta = ''
+        before = (baseline or {}).get('routes', {}).get(label)
+        if before and before['p95_ms']:
+            delta = f"{(route['p95_ms'] / before['p95_ms'] - 1) * 100:+.0f}%"
+        print(f"{label:<40}{route['requests']:>8}{route['throughput_rps']:>9}{route['p50_ms']:>9}"
+              f"{route['p95_ms']:>9}{route['p99_ms']:>9}{route['errors']:>6}  {delta}")
+    print(f"\nTotal: {results['total_requests']} requests, {results['throughput_rps']} req/s")
+
+def parse_mix(value):
+    mix = dict(DEFAULT_MIX)
+    if value:
+        mix = {name: 0 for name in DEFAULT_MIX}
+        for part in value.split(','):
+            name, _, weight = part.partition('=')
+            if name not in DEFAULT_MIX:
+                raise SystemExit(f'Unknown scenario {name!r}; choose from {", ".join(DEFAULT_MIX)}')
+            mix[name] = float(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+def start_stub(module, port, *args):
+    process = subprocess.Popen([sys.executable, '-m', module, '--port', str(port), *args], cwd=ROOT)
+    wait_for(f'http://127.0.0.1:{port}/ready', method='POST')
+    return process
+
+def start_app(args, env, port):
+    if args.dev_server:
+        command = [sys.executable, '-c',
+                   f'from app import app; app.run(host="127.0.0.1", port={port}, threaded=True)']
+    else:
+        command = ['gunicorn', '--workers', str(args.workers), '--threads', str(args.threads),
+                   '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app']
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+    wait_for(f'http://127.0.0.1:{port}/api/categories', timeout=120)
+    return process
+
+def run_load(base_url, mix, args):
+    recorder = Recorder()
+    names, weights = list(mix), list(mix.values())
+    stop = threading.Event()
+
+    def shopper(number):
+        rng = random.Random(args.seed * 1000 + number)
+        user = Shopper(base_url, rng, args.products, args.orders)
+        while not stop.is_set():
+            getattr(user, rng.choices(names, weights)[0])(recorder)
+            if args.think_time:
+                time.sleep(rng.expovariate(1 / args.think_time))
+
+    threads = [threading.Thread(target=shopper, args=(number,), daemon=True) for number in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.warmup)
+    recorder.enabled = True
+    started = time.perf_counter()
+    time.sleep(args.duration)
+    recorder.enabled = False
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=35)
+    return recorder, elapsed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='BabyZion load benchmark')
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gunicorn worker')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent virtual shoppers')
+    parser.add_argument('--duration', type=float, default=30, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=5, help='unmeasured seconds before measuring')
+    parser.add_argument('--think-time', type=float, default=0, help='mean seconds between a shopper\'s requests')
+    parser.add_argument('--mix', help='scenario weights, e.g. products_page=5,checkout=1')
+    parser.add_argument('--cj-latency', type=float, default=0.0)
+    parser.add_argument('--paypal-latency', type=float, default=0.0)
+    parser.add_argument('--dev-server', action='store_true', help="use Flask's threaded server instead of gunicorn")
+    parser.add_argument('--output', help='results file (default bench/results/<timestamp>.json)')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='allowed regression before failing')
+    args = parser.parse_args(argv)
+    mix = parse_mix(args.mix)
+
+    seeded = seed_database(database_path(args.products, args.orders, args.seed),
+                           args.products, args.orders, args.seed)
+    scratch = tempfile.mkdtemp(prefix='babyzion-bench-')
+    database = os.path.join(scratch, 'bench.db')
+    shutil.copyfile(seeded, database)
+
+    app_port, cj_port, paypal_port = free_port(), free_port(), free_port()
+    env = dict(os.environ,
+               DATABASE=database,
+               RATELIMIT_STORAGE_URI=f'sqlite:///{os.path.join(scratch, "ratelimits.db")}',
+               RATELIMIT_BYPASS='127.0.0.1',
+               WEB_THREADS=str(args.threads),
+               METRICS_DIR=os.path.join(scratch, 'metrics'),
+               CJ_CACHE_DB=os.path.join(scratch, 'cj_cache.db'),
+               ADMIN_TOKEN=BENCH_ADMIN_TOKEN,
+               CJ_BASE_URL=f'http://127.0.0.1:{cj_port}', CJ_EMAIL='bench@example.com', CJ_API_KEY='bench',
+               PAYPAL_BASE_URL=f'http://127.0.0.1:{paypal_port}',
+               PAYPAL_CLIENT_ID='bench', PAYPAL_CLIENT_SECRET='bench',
+               FLASK_ENV='production', PYTHONUNBUFFERED='1')
+
+    processes = []
+    try:
+        processes.append(start_stub('stubs.cj_server', cj_port, '--products', '5000',
+                                    '--latency', str(args.cj_latency)))
+        processes.append(start_stub('stubs.paypal_server', paypal_port, '--latency', str(args.paypal_latency)))
+        processes.append(start_app(args, env, app_port))
+        print(f"Benchmarking {', '.join(f'{name}={weight:g}' for name, weight in mix.items())} "
+              f"with {args.concurrency} shoppers for {args.duration:g}s")
+        recorder, elapsed = run_load(f'http://127.0.0.1:{app_port}', mix, args)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    results = summarize(recorder, elapsed)
+    results['config'] = {
+        'products': args.products, 'orders': args.orders, 'seed': args.seed,
+        'server': 'flask-dev' if args.dev_server else f'gunicorn {args.workers}x{args.threads}',
+        'concurrency': args.concurrency, 'duration': args.duration, 'mix': mix,
+        'cj_latency': args.cj_latency, 'paypal_latency': args.paypal_latency,
+    }
+    results['machine'] = {'python': platform.python_version(), 'platform': platform.platform(),
+                          'cpus': os.cpu_count()}
+    results['finished_at'] = datetime.now().isoformat(timespec='seconds')
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {output}")
+
+    if args.save_baseline:
+        shutil.copyfile(output, args.baseline)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+    if baseline:
+        if baseline.get('config', {}).get('server') != results['config']['server']:
+            print("⚠️ Baseline was recorded with a different server setup; comparing anyway")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print("✅ No regressions against baseline")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
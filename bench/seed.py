@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Build a scratch BabyZion database at benchmark scale.
+
+The data is deterministic for a given (products, orders, seed), so results
+from different runs and machines compare like for like. Seeded files are
+cached in bench/data/ and copied for each run, because runs write orders.
+
+    python -m bench.seed --products 100000 --orders 1000000
+"""
+import os
+import json
+import random
+import sqlite3
+import argparse
+from datetime import datetime, timedelta
+
+from migrations import LATEST_VERSION, migrate
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+CATEGORIES = ['Newborn Essentials', 'Wooden Toys', 'Cultural Baby Wear', 'Mom & Baby Sets',
+              'Feeding & Nursing', 'Educational Toys']
+ADJECTIVES = ['Organic', 'Soft', 'Bamboo', 'Montessori', 'Handmade', 'Cotton', 'Silicone',
+              'Muslin', 'Wooden', 'Knitted', 'Eco', 'Premium', 'Classic', 'Pastel']
+NOUNS = ['Blanket', 'Swaddle', 'Rattle', 'Onesie', 'Bib', 'Teether', 'Bottle', 'Romper',
+         'Stacker', 'Puzzle', 'Sling', 'Beanie', 'Booties', 'Playmat', 'Dress', 'Wrap']
+COUNTRIES = ['Kenya', 'Somalia', 'Nigeria', 'Ethiopia', 'Uganda', 'Tanzania', 'United States',
+             'United Kingdom', 'United Arab Emirates', 'Canada']
+STATUSES = ['pending'] * 2 + ['paid'] * 5 + ['shipped'] * 2 + ['cancelled']
+BATCH = 10000
+
+def database_path(products, orders, seed=1):
+    # Keyed by schema version too, so a new migration means a fresh seed rather than migrating a copy every run
+    return os.path.join(DATA_DIR, f'bench_p{products}_o{orders}_s{seed}_v{LATEST_VERSION}.db')
+
+def product_rows(rng, count, started):
+    for index in range(count):
+        name = f'{rng.choice(ADJECTIVES)} {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {index}'
+        yield (
+            f'BP{index:07d}', name,
+            f'{name} for little ones, made with care. ' * rng.randint(1, 3),
+            round(rng.uniform(4, 150), 2),
+            rng.choice(CATEGORIES),
+            f'https://images.unsplash.com/photo-{1500000000000 + index}?w=400&h=400&fit=crop',
+            0 if rng.random() < 0.05 else 1,
+            (started + timedelta(minutes=index)).strftime('%Y-%m-%d %H:%M:%S'),
+        )
+
+def seed_database(path, products, orders, seed=1):
+    """Create path with products/orders at the given scale (a no-op when it exists)"""
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    building = path + '.building'
+    if os.path.exists(building):
+        os.remove(building)
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(building)
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    migrate(conn)
+
+    started = datetime(2024, 1, 1)
+    prices = []
+    with conn:
+        rows = []
+        for row in product_rows(rng, products, started):
+            rows.append(row)
+            prices.append(row[3])
+            if len(rows) >= BATCH:
+                conn.executemany('''INSERT INTO products (id, name, description, price, category, image, in_stock, created_at)
+                                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', rows)
+                rows = []
+        conn.executemany('''INSERT INTO products (id, name, description, price, category, image, in_stock, created_at)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', rows)
+    print(f"✅ Seeded {products} products")
+
+    # A returning customer places several orders, so order-history queries have work to do
+    customers = max(1, orders // 4)
+    for start in range(0, orders, BATCH):
+        headers, lines = [], []
+        for number in range(start, min(start + BATCH, orders)):
+            order_id = f'BZB{number:08d}'
+            customer = rng.randrange(customers)
+            picks = {}
+            for _ in range(rng.randint(1, 4)):
+                index = rng.randrange(products)
+                picks[index] = picks.get(index, 0) + rng.randint(1, 2)
+            items = [{'id': f'BP{index:07d}', 'name': f'Product {index}', 'quantity': qty, 'price': prices[index]}
+                     for index, qty in picks.items()]
+            subtotal = round(sum(item['price'] * item['quantity'] for item in items), 2)
+            created = started + timedelta(seconds=rng.randrange(365 * 86400))
+            headers.append((
+                order_id, f'Customer {customer}', f'customer{customer}@example.com', '+254700000000',
+                f'{customer} Moi Avenue', 'Nairobi', rng.choice(COUNTRIES), json.dumps(items),
+                subtotal, 12.0, round(subtotal + 12.0, 2), rng.choice(STATUSES),
+                created.strftime('%Y-%m-%d %H:%M:%S'),
+            ))
+            lines.extend((order_id, item['id'], item['quantity'], item['price']) for item in items)
+        with conn:
+            conn.executemany('''
+                INSERT INTO orders (id, customer_name, customer_email, customer_phone, shipping_address,
+                                    shipping_city, shipping_country, items, subtotal, shipping_cost, total,
+                                    status, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', headers)
+            conn.executemany('INSERT INTO order_items (order_id, product_id, qty, unit_price) VALUES (?, ?, ?, ?)',
+                             lines)
+    print(f"✅ Seeded {orders} orders for {customers} customers")
+
+    conn.execute('ANALYZE')
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.close()
+    os.rename(building, path)
+    return path
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Seed a scratch benchmark database')
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    print(seed_database(database_path(args.products, args.orders, args.seed),
+                        args.products, args.orders, args.seed))
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Builds dist/ for static_assets.py: every CSS/JS/image gets a content hash in
+# its file name (so it can be cached forever), the HTML pages are rewritten to
+# point at the hashed names, and text files get .gz (and .br, when the brotli
+# package is installed) siblings compressed once here instead of per request.
+# Run after every front-end change:  python3 build_assets.py
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+DIST_DIR = os.environ.get('STATIC_DIST', os.path.join(SOURCE_DIR, 'dist'))
+ASSET_EXTENSIONS = ('.css', '.js', '.png', '.jpg', '.jpeg', '.svg', '.ico', '.webp')
+COMPRESSIBLE_EXTENSIONS = ('.html', '.css', '.js', '.svg', '.json')
+MIN_COMPRESS_BYTES = 256
+
+REFERENCE = re.compile(r'''(?P<attr>\b(?:src|href)\s*=\s*)(?P<quote>["'])(?P<path>[^"'?#]+)(?P=quote)''')
+
+def hashed_name(name, data):
+    stem, ext = os.path.splitext(name)
+    digest = hashlib.blake2b(data, digest_size=4).hexdigest()
+    return f'{stem}.{digest}{ext}'
+
+def rewrite_references(html, assets):
+    def replace(match):
+        path = match.group('path')
+        prefix = '/' if path.startswith('/') else ''
+        target = assets.get(path.lstrip('/').removeprefix('./'))
+        if target is None:
+            return match.group(0)
+        return f"{match.group('attr')}{match.group('quote')}{prefix}{target}{match.group('quote')}"
+    return REFERENCE.sub(replace, html)
+
+def write_compressed(path, data):
+    """Write .gz/.br siblings when they actually save bytes; returns the encodings written"""
+    written = []
+    if len(data) < MIN_COMPRESS_BYTES:
+        return written
+    variants = [('gzip', '.gz', lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('br', '.br', lambda raw: brotli.compress(raw, quality=11)))
+    for name, suffix, compress in variants:
+        compressed = compress(data)
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+            written.append(name)
+    return written
+
+def write_file(out_dir, name, data):
+    path = os.path.join(out_dir, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    encodings = []
+    if name.endswith(COMPRESSIBLE_EXTENSIONS):
+        encodings = write_compressed(path, data)
+    return encodings
+
+def build(dist_dir=DIST_DIR):
+    # Build into a fresh directory and swap it in, so a running server never
+    # sees a half-written dist/
+    staging = dist_dir + '.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    entries = sorted(os.listdir(SOURCE_DIR))
+    assets = {}
+    for name in entries:
+        source = os.path.join(SOURCE_DIR, name)
+        if os.path.isfile(source) and name.lower().endswith(ASSET_EXTENSIONS):
+            with open(source, 'rb') as f:
+                data = f.read()
+            assets[name] = hashed_name(name, data)
+            encodings = write_file(staging, assets[name], data)
+            print(f"✅ {name} -> {assets[name]} {' '.join(encodings)}".rstrip())
+
+    pages = []
+    for name in entries:
+        if name.endswith('.html'):
+            with open(os.path.join(SOURCE_DIR, name), encoding='utf-8') as f:
+                html = f.read()
+            write_file(staging, name, rewrite_references(html, assets).encode('utf-8'))
+            pages.append(name)
+    print(f"✅ Rewrote {len(pages)} pages")
+
+    manifest = {'assets': assets, 'pages': pages, 'brotli': brotli is not None}
+    with open(os.path.join(staging, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    previous = dist_dir + '.old'
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(dist_dir):
+        os.rename(dist_dir, previous)
+    os.rename(staging, dist_dir)
+    shutil.rmtree(previous, ignore_errors=True)
+    print(f"✅ Static assets built in {dist_dir}" + ('' if brotli else ' (brotli not installed, gzip only)'))
+
+if __name__ == '__main__':
+    build(os.path.abspath(sys.argv[1]) if len(sys.argv) > 1 else DIST_DIR)
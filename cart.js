@@ -61,13 +61,49 @@ class CartManager {
         return this.cart;
     }
 
+    // Re-check names, prices and stock for just the products in the cart
+    // (one small request instead of the whole catalog)
+    async refresh() {
+        this.cart = this.loadCart();
+        if (this.cart.length === 0) return this.cart;
+        const requested = new Set(this.cart.map(item => item.id));
+        try {
+            const response = await fetch(`/api/products?ids=${encodeURIComponent([...requested].join(','))}&fields=id,name,price,image,in_stock`);
+            if (!response.ok) return this.cart;
+            const result = await response.json();
+            const products = new Map(result.items.map(product => [product.id, product]));
+            // The cart may have changed while we waited (cart.html and other tabs
+            // write localStorage directly): merge into what is saved now, and
+            // leave lines added since, which we didn't ask about, as they are
+            this.cart = this.loadCart();
+            this.cart.forEach(item => {
+                if (!requested.has(item.id)) return;
+                const product = products.get(item.id);
+                if (product) {
+                    item.name = product.name;
+                    item.price = product.price;
+                    item.image = product.image || item.image;
+                }
+                item.unavailable = !product || !product.in_stock;
+            });
+            this.saveCart();
+        } catch (error) {
+            console.error('Error refreshing cart:', error);
+        }
+        return this.cart;
+    }
+
+    hasUnavailableItems() {
+        return this.cart.some(item => item.unavailable);
+    }
+
     clearCart() {
         this.cart = [];
         this.saveCart();
     }
 
     getTotal() {
-        return this.cart.reduce((total, item) => total + (item.price * item.quantity), 0);
+        return this.cart.reduce((total, item) => total + (item.unavailable ? 0 : item.price * item.quantity), 0);
     }
 
     getItemCount() {
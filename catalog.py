@@ -0,0 +1,149 @@
+import json
+import math
+import base64
+import hashlib
+
+# Keyset pagination over the in-stock catalog. Every page is a seek on one of
+# the composite indexes below followed by a primary-key fetch of just that
+# page's rows, so page 500 costs the same as page 1.
+SORT_COLUMNS = ('created_at', 'price', 'name')
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+# (in_stock, [category,] sort column, id) is the seek/order key; price is
+# carried along so min/max price filters are checked inside the index too.
+CATALOG_INDEXES = '''
+    CREATE INDEX IF NOT EXISTS idx_products_price ON products(in_stock, price, id);
+    CREATE INDEX IF NOT EXISTS idx_products_cat_price ON products(in_stock, category, price, id);
+    CREATE INDEX IF NOT EXISTS idx_products_name ON products(in_stock, name, id, price);
+    CREATE INDEX IF NOT EXISTS idx_products_cat_name ON products(in_stock, category, name, id, price);
+    CREATE INDEX IF NOT EXISTS idx_products_created ON products(in_stock, created_at, id, price);
+    CREATE INDEX IF NOT EXISTS idx_products_cat_created ON products(in_stock, category, created_at, id, price);
+'''
+
+# Columns a client may ask for with ?fields=, and the only ones a product
+# response ever carries (content_hash is internal to the CJ sync)
+PRODUCT_FIELDS = ('id', 'name', 'description', 'price', 'category', 'image', 'in_stock', 'created_at')
+PRODUCT_COLUMNS = ', '.join(PRODUCT_FIELDS)
+
+def parse_fields(value):
+    """Validate a comma-separated ?fields= list; None means every column"""
+    if not value:
+        return None
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in PRODUCT_FIELDS]
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+    return fields or None
+
+def project(products, fields):
+    if fields is None:
+        return products
+    return [{field: product.get(field) for field in fields} for product in products]
+
+# Cart-sized lookups; more than this should page through the listing instead
+MAX_IDS = 100
+
+def item_etag(product):
+    """Strong validator for one product row, derived from its full content"""
+    payload = json.dumps(product, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=8).hexdigest()
+
+def parse_ids(value):
+    ids = list(dict.fromkeys(part.strip() for part in (value or '').split(',') if part.strip()))
+    if not ids:
+        raise ValueError('ids must list at least one product id')
+    if len(ids) > MAX_IDS:
+        raise ValueError(f'At most {MAX_IDS} ids per request')
+    return ids
+
+def get_products_by_ids(conn, ids, fields=None):
+    """Fetch a handful of products in one primary-key IN lookup, reporting missing and out-of-stock ids"""
+    placeholders = ','.join('?' * len(ids))
+    rows = conn.execute(f'SELECT {PRODUCT_COLUMNS} FROM products WHERE id IN ({placeholders})', ids).fetchall()
+    by_id = {row['id']: dict(row) for row in rows}
+    items = []
+    for product_id in ids:
+        product = by_id.get(product_id)
+        if product is not None:
+            item = project([product], fields)[0]
+            item['etag'] = item_etag(product)
+            items.append(item)
+    return {
+        'items': items,
+        'missing': [product_id for product_id in ids if product_id not in by_id],
+        'out_of_stock': [product_id for product_id in ids
+                         if product_id in by_id and not by_id[product_id]['in_stock']],
+    }
+
+def encode_cursor(value, row_id, scope):
+    """Opaque cursor for the row after (value, row_id); scope names the ordering it belongs to"""
+    raw = json.dumps([scope, value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, scope):
+    """(value, row_id) from a cursor encode_cursor issued for the same scope
+
+    A cursor from another sort or order would seek on the wrong column, so it
+    is refused rather than silently returning the wrong page.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_scope, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    scalar = value is None or isinstance(value, str) or (
+        isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value))
+    if not isinstance(cursor_scope, str) or not scalar or not isinstance(row_id, str):
+        raise ValueError('Invalid cursor')
+    if cursor_scope != scope:
+        raise ValueError('Cursor belongs to a different sort or order; start again without it')
+    return value, row_id
+
+def list_products_page(conn, category=None, sort='created_at', order='asc',
+                       min_price=None, max_price=None, cursor=None, limit=DEFAULT_PAGE_SIZE, fields=None):
+    """Return one page of in-stock products plus the cursor for the next page"""
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f'sort must be one of: {", ".join(SORT_COLUMNS)}')
+    if order not in ('asc', 'desc'):
+        raise ValueError('order must be asc or desc')
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    where = ['in_stock = 1']
+    params = []
+    if category:
+        where.append('category = ?')
+        params.append(category)
+    if min_price is not None:
+        where.append('price >= ?')
+        params.append(float(min_price))
+    if max_price is not None:
+        where.append('price <= ?')
+        params.append(float(max_price))
+    scope = f'{sort}:{order}'
+    if cursor:
+        value, last_id = decode_cursor(cursor, scope)
+        where.append(f"({sort}, id) {'>' if order == 'asc' else '<'} (?, ?)")
+        params.extend([value, last_id])
+
+    direction = order.upper()
+    keys = conn.execute(f'''
+        SELECT id, {sort} FROM products
+        WHERE {' AND '.join(where)}
+        ORDER BY {sort} {direction}, id {direction}
+        LIMIT ?
+    ''', params + [limit + 1]).fetchall()
+
+    has_more = len(keys) > limit
+    keys = keys[:limit]
+    items = []
+    if keys:
+        ids = [row[0] for row in keys]
+        placeholders = ','.join('?' * len(ids))
+        columns = ', '.join(dict.fromkeys(('id',) + fields)) if fields else PRODUCT_COLUMNS
+        rows = conn.execute(f'SELECT {columns} FROM products WHERE id IN ({placeholders})', ids).fetchall()
+        by_id = {row['id']: dict(row) for row in rows}
+        items = project([by_id[product_id] for product_id in ids if product_id in by_id], fields)
+
+    next_cursor = encode_cursor(keys[-1][1], keys[-1][0], scope) if has_more else None
+    return {'items': items, 'next_cursor': next_cursor, 'has_more': has_more}
@@ -0,0 +1,68 @@
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+from responses import dumps
+
+# Shared catalog version. Triggers bump it on every products write, so
+# whichever worker or script changes the catalog, every worker sees the new
+# version on its next read and drops its cached bodies.
+CATALOG_VERSION_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS catalog_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0);
+    CREATE TRIGGER IF NOT EXISTS products_version_ai AFTER INSERT ON products
+    BEGIN UPDATE catalog_version SET version = version + 1 WHERE id = 1; END;
+    CREATE TRIGGER IF NOT EXISTS products_version_au AFTER UPDATE ON products
+    BEGIN UPDATE catalog_version SET version = version + 1 WHERE id = 1; END;
+    CREATE TRIGGER IF NOT EXISTS products_version_ad AFTER DELETE ON products
+    BEGIN UPDATE catalog_version SET version = version + 1 WHERE id = 1; END;
+'''
+
+# variants holds compressed copies of body, filled in by responses.cached_variant
+CachedBody = namedtuple('CachedBody', ['version', 'body', 'etag', 'variants'])
+
+def catalog_version(conn):
+    row = conn.execute('SELECT version FROM catalog_version WHERE id = 1').fetchone()
+    return row[0] if row else 0
+
+def bump_catalog_version(conn):
+    """Invalidate every worker's cache; for writes the triggers don't see"""
+    conn.execute('UPDATE catalog_version SET version = version + 1 WHERE id = 1')
+
+class CatalogCache:
+    """Bounded LRU of serialized JSON bodies, valid for one catalog version"""
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, conn, key, build):
+        """Return the cached body for key, calling build(conn) on a miss"""
+        version = catalog_version(conn)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        body = dumps(build(conn))
+        # Content-derived, so every worker hands out the same strong ETag
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        entry = CachedBody(version, body, etag, {})
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
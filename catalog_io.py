@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""Streaming bulk import/export for the catalog.
+
+Imports read NDJSON or CSV lazily, validate each row and upsert products a
+chunk at a time (one executemany per transaction), so memory stays flat
+however big the file is and the live database is updated in place. Rows
+whose content is unchanged are skipped by the same content-hash upsert the
+CJ sync uses, so re-importing a file only rewrites what changed.
+
+Exports walk products, orders or uploads in primary-key batches and yield
+NDJSON or CSV text, for a file or a streamed HTTP response.
+
+    python3 catalog_io.py import catalog.ndjson
+    python3 catalog_io.py import catalog.csv --chunk 10000
+    python3 catalog_io.py export orders --format csv -o orders.csv
+"""
+import io
+import os
+import csv
+import sys
+import json
+import math
+import time
+import sqlite3
+import argparse
+
+from cj_sync import SYNC_COLUMNS, UPSERT_SQL, content_hash
+
+CHUNK_SIZE = 5000
+EXPORT_BATCH = 5000
+MAX_ERRORS = 100
+FORMATS = ('ndjson', 'csv')
+MIMETYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+EXPORT_TABLES = {
+    'products': ('id', 'name', 'description', 'price', 'category', 'image', 'in_stock', 'created_at'),
+    'orders': ('id', 'customer_name', 'customer_email', 'customer_phone', 'shipping_address',
+               'shipping_city', 'shipping_country', 'items', 'subtotal', 'shipping_cost', 'total',
+               'status', 'created_at'),
+    'uploads': ('id', 'product_name', 'description', 'price', 'category', 'seller_name',
+                'seller_email', 'status', 'created_at'),
+}
+
+def format_for(filename, default='ndjson'):
+    """Guess the format from a file name or content type"""
+    name = (filename or '').lower()
+    if name.endswith('.csv') or 'csv' in name:
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl', '.json')) or 'json' in name:
+        return 'ndjson'
+    return default
+
+def read_rows(stream, fmt):
+    """Yield (line_number, dict) from a text stream, one row at a time"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'ndjson':
+        for number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield number, row
+    else:
+        raise ValueError(f'format must be one of: {", ".join(FORMATS)}')
+
+def validate_product(row):
+    """Return a product dict in SYNC_COLUMNS shape, or raise ValueError"""
+    if not isinstance(row, dict):
+        raise ValueError('not a JSON object')
+    product_id = str(row.get('id') or '').strip()
+    name = str(row.get('name') or '').strip()
+    if not product_id or len(product_id) > 64:
+        raise ValueError('id is required (at most 64 characters)')
+    if not name:
+        raise ValueError('name is required')
+    try:
+        price = float(row.get('price'))
+    except (TypeError, ValueError):
+        raise ValueError('price must be a number')
+    # json.loads accepts NaN/Infinity and float() accepts 'inf'; neither is a price
+    if not math.isfinite(price):
+        raise ValueError('price must be a finite number')
+    price = round(price, 2)
+    if price < 0:
+        raise ValueError('price must not be negative')
+    in_stock = row.get('in_stock', 1)
+    if isinstance(in_stock, str):
+        in_stock = in_stock.strip().lower() not in ('0', 'false', 'no', '')
+    return {
+        'id': product_id,
+        'name': name[:200],
+        'description': str(row.get('description') or '')[:2000],
+        'price': price,
+        'category': (str(row.get('category')).strip() or None) if row.get('category') else None,
+        'image': str(row.get('image') or '').strip(),
+        'in_stock': 1 if in_stock else 0,
+    }
+
+def import_products(conn, stream, fmt='ndjson', chunk_size=CHUNK_SIZE, progress=None):
+    """Validate and upsert every row of stream, one transaction per chunk; returns stats
+
+    Invalid rows are skipped and reported (the first MAX_ERRORS of them) by
+    line number. A row the database rejects is reported the same way: its
+    chunk is retried row by row, so the rest of the chunk is still written.
+    progress, if given, is called with the running stats after each chunk.
+    """
+    started = time.perf_counter()
+    stats = {'rows': 0, 'written': 0, 'unchanged': 0, 'invalid': 0, 'errors': []}
+    chunk = []
+
+    def reject(line, error):
+        stats['invalid'] += 1
+        if len(stats['errors']) < MAX_ERRORS:
+            stats['errors'].append({'line': line, 'error': error})
+
+    def flush():
+        rows = [(line, tuple(product[column] for column in SYNC_COLUMNS) + (content_hash(product),))
+                for line, product in chunk]
+        # Primary-key order keeps the b-tree writes local (stable, so a repeated id still ends last-wins)
+        rows.sort(key=lambda row: row[1][0])
+        try:
+            with conn:
+                # rowcount sums each statement's own changes (not trigger writes);
+                # unchanged rows fail the upsert's WHERE and count zero
+                written = conn.executemany(UPSERT_SQL, [values for _, values in rows]).rowcount
+            stored = len(rows)
+        except (sqlite3.IntegrityError, sqlite3.InterfaceError):
+            # One row broke the batch and it was rolled back; a failed statement
+            # only undoes itself, so one transaction of single-row upserts keeps the rest
+            written = stored = 0
+            with conn:
+                for line, values in rows:
+                    try:
+                        written += conn.execute(UPSERT_SQL, values).rowcount
+                        stored += 1
+                    except (sqlite3.IntegrityError, sqlite3.InterfaceError) as e:
+                        reject(line, str(e))
+        stats['written'] += written
+        stats['unchanged'] += stored - written
+        chunk.clear()
+        stats['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+        if progress:
+            progress(stats)
+
+    for line, row in read_rows(stream, fmt):
+        stats['rows'] += 1
+        try:
+            chunk.append((line, validate_product(row)))
+        except ValueError as e:
+            reject(line, str(e))
+            continue
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    stats['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    return stats
+
+def export_rows(conn, table, fmt='ndjson', batch_size=EXPORT_BATCH):
+    """Yield table as NDJSON or CSV text, reading it in primary-key batches"""
+    if table not in EXPORT_TABLES:
+        raise ValueError(f'table must be one of: {", ".join(EXPORT_TABLES)}')
+    if fmt not in FORMATS:
+        raise ValueError(f'format must be one of: {", ".join(FORMATS)}')
+    columns = EXPORT_TABLES[table]
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+    # Short read transactions, one per batch, so a long export never pins a WAL snapshot
+    query = f"SELECT {', '.join(columns)} FROM {table} WHERE id > ? ORDER BY id LIMIT ?"
+    last_id = 0 if table == 'uploads' else ''
+    while True:
+        rows = conn.execute(query, (last_id, batch_size)).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        if fmt == 'csv':
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        else:
+            lines = []
+            for row in rows:
+                record = dict(zip(columns, row))
+                if table == 'orders':
+                    try:
+                        record['items'] = json.loads(record['items'] or '[]')
+                    except ValueError:
+                        pass
+                lines.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+            yield '\n'.join(lines) + '\n'
+    if fmt == 'csv' and buffer.tell():
+        yield buffer.getvalue()
+
+def stream_export(database, table, fmt='ndjson'):
+    """export_rows over its own read-only connection, closed when the stream ends
+
+    For HTTP responses, which keep yielding after the request's pooled
+    connection has gone back to the pool.
+    """
+    conn = sqlite3.connect(f'file:{database}?mode=ro', uri=True, timeout=30)
+    try:
+        yield from export_rows(conn, table, fmt)
+    finally:
+        conn.close()
+
+def import_file(conn, path, fmt=None, chunk_size=CHUNK_SIZE, progress=None):
+    with open(path, newline='', encoding='utf-8') as stream:
+        return import_products(conn, stream, fmt or format_for(path), chunk_size, progress)
+
+def seed_if_empty(conn, path):
+    """Import a seed file into a database that has no products yet"""
+    if conn.execute('SELECT 1 FROM products LIMIT 1').fetchone() is not None:
+        return None
+    stats = import_file(conn, path)
+    print(f"✅ Seeded {stats['written']} products from {os.path.basename(path)}")
+    return stats
+
+def print_progress(stats):
+    rate = stats['rows'] / stats['elapsed_seconds'] if stats['elapsed_seconds'] else 0
+    print(f"… {stats['rows']} rows, {stats['written']} written, {stats['invalid']} invalid "
+          f"({rate:,.0f} rows/s)", file=sys.stderr)
+
+if __name__ == '__main__':
+    from database import DATABASE, PRAGMAS
+    from migrations import migrate
+
+    parser = argparse.ArgumentParser(description='Stream products into, or tables out of, the database')
+    commands = parser.add_subparsers(dest='command', required=True)
+    importer = commands.add_parser('import', help='upsert products from NDJSON or CSV ("-" for stdin)')
+    importer.add_argument('path')
+    importer.add_argument('--format', choices=FORMATS)
+    importer.add_argument('--chunk', type=int, default=CHUNK_SIZE)
+    exporter = commands.add_parser('export', help='write a table as NDJSON or CSV')
+    exporter.add_argument('table', choices=sorted(EXPORT_TABLES))
+    exporter.add_argument('--format', choices=FORMATS, default='ndjson')
+    exporter.add_argument('-o', '--output', help='file to write (default stdout)')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DATABASE, timeout=30)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    migrate(conn)
+    if args.command == 'import':
+        if args.path == '-':
+            stats = import_products(conn, sys.stdin, args.format or 'ndjson', args.chunk, print_progress)
+        else:
+            stats = import_file(conn, args.path, args.format, args.chunk, print_progress)
+        for error in stats.pop('errors'):
+            print(f"⚠️ line {error['line']}: {error['error']}", file=sys.stderr)
+        print(f"✅ Imported {stats['rows']} rows: {stats}")
+    else:
+        out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+        try:
+            for chunk in export_rows(conn, args.table, args.format):
+                out.write(chunk)
+        finally:
+            if args.output:
+                out.close()
+    conn.close()
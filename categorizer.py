@@ -0,0 +1,261 @@
+import os
+import re
+import json
+import hashlib
+from bisect import bisect_right
+from cj_sync import SYNC_COLUMNS, content_hash
+
+# Keyword categorizer for imported products. Rules live in the
+# category_rules table (or a JSON file named by CATEGORY_RULES_FILE) and are
+# compiled into one alternation regex, so classifying a product is a single
+# C-level scan instead of a Python loop per keyword, and a whole batch of
+# names is classified with one finditer() over the names joined by NULs.
+#
+# Each rule is (category, keyword, weight, priority, match):
+#   match    'word' (whole word), 'prefix' (word start: toy -> toys) or 'substring'
+#   weight   added to the category's score for each distinct keyword found
+#   priority breaks score ties, lowest first
+# A name with no matches gets DEFAULT_CATEGORY. Rules with weight 0 only
+# vote, so every matched category ties and the lowest priority wins: an
+# ordered if/elif chain, which is how the built-in rules behave.
+
+DEFAULT_CATEGORY = 'Baby Essentials'
+MATCH_MODES = ('word', 'prefix', 'substring')
+# How much of a word boundary each mode needs; a match satisfies every mode up to its own
+_STRENGTH = {'substring': 0, 'prefix': 1, 'word': 2}
+_BOUNDARY = re.compile(r'\b')
+
+CATEGORY_RULES_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS category_rules (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        category TEXT NOT NULL,
+        keyword TEXT NOT NULL,
+        weight REAL NOT NULL DEFAULT 1,
+        priority INTEGER NOT NULL DEFAULT 0,
+        match TEXT NOT NULL DEFAULT 'prefix',
+        UNIQUE (category, keyword)
+    );
+'''
+
+# The keyword lists CJDropshippingClient.categorize_product used to hard-code,
+# in its if/elif order. It tested `keyword in name` and returned the first
+# branch that matched, so these match as substrings with weight 0 and the
+# earliest branch wins however many keywords each one hits
+LEGACY = {'weight': 0, 'match': 'substring'}
+DEFAULT_RULES = [
+    {'category': 'Newborn Essentials', 'priority': 1, 'keywords': ['newborn', 'infant', 'swaddle', 'blanket'], **LEGACY},
+    {'category': 'Wooden Toys', 'priority': 2, 'keywords': ['toy', 'rattle', 'wooden', 'play'], **LEGACY},
+    {'category': 'Cultural Baby Wear', 'priority': 3,
+     'keywords': ['cultural', 'traditional', 'ethnic', 'ankara', 'dirac'], **LEGACY},
+    {'category': 'Mom & Baby Sets', 'priority': 4, 'keywords': ['mom', 'mother', 'mommy', 'matching'], **LEGACY},
+    {'category': 'Feeding & Nursing', 'priority': 5, 'keywords': ['feed', 'bottle', 'nursing', 'sippy'], **LEGACY},
+    {'category': 'Educational Toys', 'priority': 6, 'keywords': ['learn', 'educational', 'montessori'], **LEGACY},
+]
+
+def flatten_rules(groups):
+    """Expand [{category, keywords, weight?, priority?, match?}] into rule tuples"""
+    rules = []
+    for group in groups:
+        for keyword in group['keywords']:
+            rules.append((group['category'], keyword, float(group.get('weight', 1)),
+                          int(group.get('priority', 0)), group.get('match', 'prefix')))
+    return rules
+
+def seed_rules(conn, groups=DEFAULT_RULES):
+    conn.executemany('''
+        INSERT OR IGNORE INTO category_rules (category, keyword, weight, priority, match)
+        VALUES (?, ?, ?, ?, ?)
+    ''', flatten_rules(groups))
+
+def upgrade_legacy_rules(conn, groups=DEFAULT_RULES):
+    """Switch built-in rules seed_rules wrote as weight-1 prefix rules to the legacy semantics
+
+    Rows an operator has since edited (other weight, priority or match) are left alone.
+    """
+    conn.executemany('''
+        UPDATE category_rules SET weight = ?, match = ?
+        WHERE category = ? AND keyword = ? AND priority = ? AND weight = 1 AND match = 'prefix'
+    ''', [(weight, match, category, keyword, priority)
+          for category, keyword, weight, priority, match in flatten_rules(groups)])
+
+def _trie_pattern(keywords):
+    """One regex for a set of keywords, with shared prefixes merged (toy|toys|towel -> to(?:ys?|wel))
+
+    The engine then tests each position against one branch per distinct
+    next character instead of against every keyword in turn, so the cost of
+    a scan barely grows with the number of rules. Longer keywords win, as
+    each optional tail is greedy.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = None
+
+    def build(node):
+        branches = [(r'\s+' if char == ' ' else re.escape(char)) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f'(?:{body})?' if '' in node else body
+    return f'(?:{build(trie)})'
+
+class Categorizer:
+    """Rules compiled into one regex; classify()/classify_many() return category names"""
+
+    def __init__(self, rules, default=DEFAULT_CATEGORY):
+        self.default = default
+        self.priority = {}
+        # keyword -> [(category, weight, strength)]; matches are looked up by their
+        # lowercased text and only credit rules whose match mode they satisfy
+        self.keywords = {}
+        by_mode = {mode: set() for mode in MATCH_MODES}
+        for category, keyword, weight, priority, match in rules:
+            if match not in MATCH_MODES:
+                raise ValueError(f'match must be one of: {", ".join(MATCH_MODES)}')
+            keyword = ' '.join(keyword.lower().split())
+            if not keyword:
+                continue
+            self.priority[category] = min(priority, self.priority.get(category, priority))
+            self.keywords.setdefault(keyword, []).append((category, weight, _STRENGTH[match]))
+            by_mode[match].add(keyword)
+        alternatives = []
+        for mode, keywords in by_mode.items():
+            if keywords:
+                body = _trie_pattern(keywords)
+                alternatives.append({'word': rf'\b{body}\b', 'prefix': rf'\b{body}', 'substring': body}[mode])
+        self.pattern = re.compile('|'.join(alternatives)) if alternatives else None
+
+    @staticmethod
+    def _record(found, text, match):
+        """Add a match to found (keyword -> strongest mode it satisfied)
+
+        The branch of the regex that happened to match says nothing about the
+        mode: the same keyword can be a 'word' rule for one category and a
+        'substring' rule for another, so the boundaries are checked here.
+        """
+        start, end = match.span()
+        strength = 0
+        if _BOUNDARY.match(text, start):
+            strength = 2 if _BOUNDARY.match(text, end) else 1
+        keyword = ' '.join(match.group(0).split())
+        found[keyword] = max(strength, found.get(keyword, 0))
+
+    def _best(self, found):
+        if not found:
+            return self.default
+        scores = {}
+        for keyword, strength in found.items():
+            for category, weight, needed in self.keywords.get(keyword, ()):
+                if strength >= needed:
+                    scores[category] = scores.get(category, 0) + weight
+        if not scores:
+            return self.default
+        return min(scores, key=lambda category: (-scores[category], self.priority[category], category))
+
+    # Joins names in classify_many(): \s can't match it, so a multi-word
+    # keyword never spans the end of one name and the start of the next
+    SEPARATOR = '\0'
+
+    @staticmethod
+    def _normalize(name):
+        # Keywords match across any run of whitespace, so lowercasing is all a name needs
+        return (name or '').lower().replace(Categorizer.SEPARATOR, ' ')
+
+    def classify(self, name):
+        if self.pattern is None:
+            return self.default
+        text, found = self._normalize(name), {}
+        for match in self.pattern.finditer(text):
+            self._record(found, text, match)
+        return self._best(found)
+
+    def classify_many(self, names):
+        """Classify a batch with one regex pass over all names joined by SEPARATOR"""
+        names = [self._normalize(name) for name in names]
+        if self.pattern is None or not names:
+            return [self.default] * len(names)
+        starts, offset = [], 0
+        for name in names:
+            starts.append(offset)
+            offset += len(name) + 1
+        text = self.SEPARATOR.join(names)
+        found = [{} for _ in names]
+        for match in self.pattern.finditer(text):
+            self._record(found[bisect_right(starts, match.start()) - 1], text, match)
+        return [self._best(keywords) for keywords in found]
+
+_compiled = {}
+
+def load_rules(conn=None):
+    """Rules from CATEGORY_RULES_FILE when set, else the category_rules table, else the defaults"""
+    path = os.environ.get('CATEGORY_RULES_FILE')
+    if path:
+        with open(path) as f:
+            return flatten_rules(json.load(f))
+    if conn is not None:
+        rows = conn.execute('SELECT category, keyword, weight, priority, match FROM category_rules ORDER BY id').fetchall()
+        if rows:
+            return [tuple(row) for row in rows]
+    return flatten_rules(DEFAULT_RULES)
+
+def load_categorizer(conn=None):
+    """A compiled Categorizer for the current rules, reused until the rules change"""
+    rules = load_rules(conn)
+    fingerprint = hashlib.blake2b(json.dumps(rules).encode('utf-8'), digest_size=16).hexdigest()
+    categorizer = _compiled.get(fingerprint)
+    if categorizer is None:
+        categorizer = Categorizer(rules)
+        _compiled.clear()
+        _compiled[fingerprint] = categorizer
+    return categorizer
+
+def recategorize(conn, categorizer, id_prefix='CJ_', batch_size=5000, dry_run=False):
+    """Re-run categorizer over existing products (those whose id starts with id_prefix; '' for all)
+
+    Walks products in primary-key batches and only rewrites rows whose
+    category changes, one transaction per batch. content_hash is recomputed
+    with the new category, so a later sync or import carrying the old one is
+    seen as a change rather than skipped. Returns per-run stats.
+    """
+    stats = {'scanned': 0, 'changed': 0, 'by_category': {}}
+    # Ids sharing the prefix sort between the prefix and the prefix with its last character bumped
+    upper = id_prefix[:-1] + chr(ord(id_prefix[-1]) + 1) if id_prefix else None
+    last_id, first = id_prefix, True
+    while True:
+        where = ['id >= ?' if first else 'id > ?']
+        params = [last_id]
+        if upper:
+            where.append('id < ?')
+            params.append(upper)
+        batch = conn.execute(f"SELECT {', '.join(SYNC_COLUMNS)} FROM products WHERE {' AND '.join(where)} "
+                             "ORDER BY id LIMIT ?", params + [batch_size]).fetchall()
+        if not batch:
+            break
+        batch = [dict(zip(SYNC_COLUMNS, row)) for row in batch]
+        last_id, first = batch[-1]['id'], False
+        categories = categorizer.classify_many([product['name'] for product in batch])
+        changes = [(category, content_hash(dict(product, category=category)), product['id'])
+                   for product, category in zip(batch, categories) if product['category'] != category]
+        stats['scanned'] += len(batch)
+        stats['changed'] += len(changes)
+        for category, _, _ in changes:
+            stats['by_category'][category] = stats['by_category'].get(category, 0) + 1
+        if changes and not dry_run:
+            with conn:
+                conn.executemany('UPDATE products SET category = ?, content_hash = ? WHERE id = ?', changes)
+    return stats
+
+if __name__ == '__main__':
+    import argparse
+    from database import get_db
+    parser = argparse.ArgumentParser(description='Re-categorize existing products with the current rules')
+    parser.add_argument('--all', action='store_true', help='every product, not just CJ_ imports')
+    parser.add_argument('--dry-run', action='store_true', help='report changes without writing them')
+    args = parser.parse_args()
+    conn = get_db()
+    result = recategorize(conn, load_categorizer(conn), id_prefix='' if args.all else 'CJ_',
+                          dry_run=args.dry_run)
+    print(f"✅ Re-categorized {result['changed']} of {result['scanned']} products: {result['by_category']}")
@@ -0,0 +1,208 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Persistent cache of CJ API response bodies, shared by every worker through
+# one SQLite file. Entries are keyed by endpoint plus the canonical JSON of
+# the request payload, so the same keyword/page or pid is one entry however
+# the payload dict was built.
+#
+#   age <= ttl                   fresh: served from disk, no network
+#   ttl < age <= ttl + swr       stale: served at once, refetched in the background
+#   older, or not cached         fetched inline; if that fails, the last good
+#                                body (any age) is served instead of nothing
+#
+# Only bodies the caller's loader returns are stored: a failed call raises
+# and never overwrites good data. The file is trimmed to max_bytes, least
+# recently used first.
+
+CJ_CACHE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS cj_responses (
+        key TEXT PRIMARY KEY,
+        endpoint TEXT NOT NULL,
+        body TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        fetched_at REAL NOT NULL,
+        used_at REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_cj_responses_used ON cj_responses(used_at);
+'''
+
+# Seconds a response is fresh, per endpoint; anything else uses DEFAULT_TTL
+TTLS = {'/product/list': 15 * 60, '/product/query': 60 * 60}
+DEFAULT_TTL = 10 * 60
+STALE_WHILE_REVALIDATE = 24 * 3600
+# used_at is bumped at most this often per entry, so hits stay reads
+TOUCH_INTERVAL = 60
+# Eviction trims back to this fraction of the budget so it doesn't run on every write
+EVICT_TO = 0.9
+RESULTS = ('hit', 'stale', 'miss', 'fallback', 'error', 'revalidated')
+
+def cache_key(endpoint, payload):
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(f'{endpoint}\0{canonical}'.encode('utf-8'), digest_size=16).hexdigest()
+
+class ResponseCache:
+    """TTL + stale-while-revalidate cache of JSON bodies in a SQLite file"""
+
+    def __init__(self, path, max_bytes, ttls=None, stale_while_revalidate=STALE_WHILE_REVALIDATE,
+                 revalidate_workers=2):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(TTLS, **(ttls or {}))
+        self.stale_while_revalidate = stale_while_revalidate
+        self._ready = False
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._inflight = set()
+        self._pool = None
+        self._revalidate_workers = revalidate_workers
+        # Approximate bytes written since the last eviction pass, per process
+        self._written = 0
+        # Called with (endpoint, result) for every lookup; app.py feeds /metrics from it
+        self.listeners = []
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute('PRAGMA busy_timeout=10000')
+        if not self._ready:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(CJ_CACHE_SCHEMA)
+            self._ready = True
+        return conn
+
+    def _record(self, endpoint, result):
+        with self._lock:
+            self._counts[(endpoint, result)] = self._counts.get((endpoint, result), 0) + 1
+        for listener in self.listeners:
+            listener(endpoint, result)
+
+    def get(self, endpoint, payload, loader, fresh=False):
+        """Return the body for (endpoint, payload), calling loader() only when it must
+
+        loader() returns a JSON-serializable body or raises. fresh=True skips
+        the cached copy (and the fallback to it) but still stores the result.
+        """
+        key = cache_key(endpoint, payload)
+        entry = None if fresh else self._read(key)
+        if entry is not None:
+            body, age = entry
+            ttl = self.ttls.get(endpoint, DEFAULT_TTL)
+            if age <= ttl:
+                self._record(endpoint, 'hit')
+                return body
+            if age <= ttl + self.stale_while_revalidate:
+                self._record(endpoint, 'stale')
+                self._revalidate(key, endpoint, loader)
+                return body
+        try:
+            body = loader()
+        except Exception:
+            if entry is None:
+                self._record(endpoint, 'error')
+                raise
+            # Upstream is failing: the last good answer beats none
+            self._record(endpoint, 'fallback')
+            return entry[0]
+        self._record(endpoint, 'miss')
+        self._write(key, endpoint, body)
+        return body
+
+    def _read(self, key):
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT body, fetched_at, used_at FROM cj_responses WHERE key = ?',
+                               (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[2] > TOUCH_INTERVAL:
+                with conn:
+                    conn.execute('UPDATE cj_responses SET used_at = ? WHERE key = ?', (now, key))
+        finally:
+            conn.close()
+        return json.loads(row[0]), now - row[1]
+
+    def _write(self, key, endpoint, body):
+        text = json.dumps(body, separators=(',', ':'))
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('''
+                    INSERT INTO cj_responses (key, endpoint, body, size, fetched_at, used_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        body = excluded.body, size = excluded.size,
+                        fetched_at = excluded.fetched_at, used_at = excluded.used_at
+                ''', (key, endpoint, text, len(text), now, now))
+        finally:
+            conn.close()
+        with self._lock:
+            self._written += len(text)
+            due = self._written >= self.max_bytes * (1 - EVICT_TO)
+            if due:
+                self._written = 0
+        if due:
+            self.evict()
+
+    def _revalidate(self, key, endpoint, loader):
+        """Refetch a stale entry on the background pool, once per key at a time"""
+        with self._lock:
+            if key in self._inflight:
+                return
+            self._inflight.add(key)
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._revalidate_workers,
+                                                thread_name_prefix='cj-revalidate')
+            pool = self._pool
+
+        def run():
+            try:
+                body = loader()
+            except Exception as e:
+                print(f"⚠️ CJ cache revalidation failed for {endpoint}: {e}")
+            else:
+                self._write(key, endpoint, body)
+                self._record(endpoint, 'revalidated')
+            finally:
+                with self._lock:
+                    self._inflight.discard(key)
+        pool.submit(run)
+
+    def evict(self):
+        """Delete least recently used entries until the cache is under EVICT_TO of its budget"""
+        conn = self._connect()
+        try:
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM cj_responses').fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            with conn:
+                cursor = conn.execute('''
+                    DELETE FROM cj_responses WHERE key IN (
+                        SELECT key FROM (
+                            SELECT key, SUM(size) OVER (ORDER BY used_at DESC, key) AS kept
+                            FROM cj_responses
+                        ) WHERE kept > ?
+                    )
+                ''', (self.max_bytes * EVICT_TO,))
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def stats(self):
+        """This process's lookup counts per endpoint, plus what the shared file holds"""
+        with self._lock:
+            counts = dict(self._counts)
+        endpoints = {}
+        for (endpoint, result), count in counts.items():
+            endpoints.setdefault(endpoint, dict.fromkeys(RESULTS, 0))[result] = count
+        conn = self._connect()
+        try:
+            entries, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cj_responses').fetchone()
+        finally:
+            conn.close()
+        return {'endpoints': endpoints, 'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes}
@@ -1,82 +1,265 @@
 import requests
 import os
+import time
+import random
+import threading
 from datetime import datetime, timedelta
 import json
+import re
+from requests.adapters import HTTPAdapter
+from cj_tokens import CJTokenManager, Token, TokenStore
+from categorizer import load_categorizer
+from cj_cache import ResponseCache
+from resilience import UpstreamGuard
+
+# Statuses worth another attempt: CJ throttling and upstream hiccups
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class CJError(Exception):
+    """CJ answered, but without the data asked for (result false, unknown product, no auth)"""
+
+class CJNotFound(CJError):
+    """CJ answered that the requested product does not exist"""
+
+# How CJ words a definite "no such product", as opposed to a failed call
+NOT_FOUND_MESSAGE = re.compile(r'not (?:found|exist)', re.IGNORECASE)
+# CJ's codes for an access token it does not accept (invalid, expired or revoked)
+AUTH_ERROR_CODES = {1600001, 1600002, 1600003}
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a request may be sent"""
+    
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
 
 class CJDropshippingClient:
     def __init__(self):
-        self.base_url = "https://developers.cjdropshipping.com/api2.0/v1"
+        self.base_url = os.environ.get('CJ_BASE_URL', "https://developers.cjdropshipping.com/api2.0/v1")
         self.email = os.environ.get('CJ_EMAIL')
         self.api_key = os.environ.get('CJ_API_KEY')
         self.access_token = None
         self.refresh_token = None
         self.token_expiry = None
+        self.timeout = (float(os.environ.get('CJ_CONNECT_TIMEOUT', 5)), float(os.environ.get('CJ_READ_TIMEOUT', 15)))
+        self.max_retries = int(os.environ.get('CJ_MAX_RETRIES', 3))
+        self.backoff_base = 0.5
+        # Longest single wait between attempts, and the most one call may spend retrying
+        self.max_backoff = float(os.environ.get('CJ_MAX_BACKOFF', 30))
+        self.retry_deadline = float(os.environ.get('CJ_RETRY_DEADLINE', 60))
+        # CJ enforces a per-second quota per account; stay under it instead of eating 429s
+        self.rate_limiter = TokenBucket(float(os.environ.get('CJ_REQUESTS_PER_SECOND', 2)))
+        # One keep-alive pool shared by every call (and the sync engine's threads)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=16)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # Bounds this process's concurrent CJ calls and stops calling a failing CJ
+        # (lookups then fall back to the response cache)
+        self.guard = UpstreamGuard('CJ', int(os.environ.get('CJ_MAX_CONCURRENT', 8)), wait=30,
+                                   failure_threshold=5, reset_after=60)
+        # Access token shared by every worker through the app database, refreshed by one at a time
+        self.tokens = CJTokenManager(
+            login=self._request_token,
+            refresh=self._request_refresh,
+            store=TokenStore(os.environ.get('CJ_TOKEN_DB', os.environ.get('DATABASE', 'babyzion.db'))),
+        )
+        # Response bodies shared by every worker, so repeat lookups skip the network
+        # and a slow or failing CJ degrades to the last good answer
+        self.cache = ResponseCache(os.environ.get('CJ_CACHE_DB', 'cj_cache.db'),
+                                   int(os.environ.get('CJ_CACHE_MAX_MB', 64)) * 1024 * 1024)
+        # Compiled keyword rules; the app swaps in the category_rules table's before each sync
+        self.categorizer = load_categorizer()
+    
+    def _backoff(self, attempt, response=None, deadline=None):
+        """Seconds to wait before the next attempt, or None to give up
+
+        A Retry-After longer than max_backoff or the time left before the
+        deadline means giving up now: waiting less would only earn another
+        429, and waiting longer would hold the caller past its deadline.
+        """
+        remaining = deadline - time.monotonic() if deadline is not None else float('inf')
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+            return delay if delay <= min(self.max_backoff, remaining) else None
+        # Exponential backoff with full jitter
+        delay = min(random.uniform(0, self.backoff_base * (2 ** attempt)), self.max_backoff)
+        return delay if delay < remaining else None
+    
+    def _post(self, path, payload, headers=None):
+        """POST to CJ through the pooled session, throttled and retried on transient errors
+
+        Retries stop after max_retries or once retry_deadline seconds have
+        gone; the last response is returned (or its error raised) as is.
+        """
+        url = f"{self.base_url}{path}"
+        deadline = time.monotonic() + self.retry_deadline
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            response = error = None
+            try:
+                response = self.guard.call(self.session.post, url, json=payload, headers=headers,
+                                           timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                error = e
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    return response
+            delay = self._backoff(attempt, response, deadline)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            time.sleep(delay)
+    
+    def _auth_headers(self):
+        return {
+            "CJ-Access-Token": self.access_token,
+            "Content-Type": "application/json"
+        }
         
-    def authenticate(self):
-        if not self.email or not self.api_key:
-            print("CJ credentials not set, skipping authentication")
-            return False
-            
-        url = f"{self.base_url}/authentication/getAccessToken"
+    def _token_from(self, data):
+        # CJ tokens last about 15 days; the manager refreshes a day ahead of this
+        return Token(data['accessToken'], data['refreshToken'],
+                     (datetime.now() + timedelta(days=14)).timestamp())
+    
+    def _use_token(self, token):
+        self.access_token = token.access_token
+        self.refresh_token = token.refresh_token
+        self.token_expiry = datetime.fromtimestamp(token.expires_at)
+    
+    def _request_token(self):
+        """Full email/API-key login; returns a Token or None"""
         payload = {
             "email": self.email,
             "apiKey": self.api_key
         }
         
         try:
-            response = requests.post(url, json=payload, timeout=30)
+            response = self._post("/authentication/getAccessToken", payload)
             data = response.json()
             
             if data.get('result'):
-                self.access_token = data['data']['accessToken']
-                self.refresh_token = data['data']['refreshToken']
-                self.token_expiry = datetime.now() + timedelta(days=14)
                 print("CJ Authentication successful!")
-                return True
+                return self._token_from(data['data'])
             else:
                 print(f"CJ Auth failed: {data.get('message')}")
-                return False
+                return None
         except Exception as e:
             print(f"CJ Auth error: {e}")
-            return False
+            return None
     
-    def refresh_access_token(self):
-        if not self.refresh_token:
-            return self.authenticate()
-            
-        url = f"{self.base_url}/authentication/refreshAccessToken"
-        payload = {"refreshToken": self.refresh_token}
+    def _request_refresh(self, refresh_token):
+        """Exchange a refresh token for a new Token, or None if CJ refuses"""
+        payload = {"refreshToken": refresh_token}
         
         try:
-            response = requests.post(url, json=payload, timeout=30)
+            response = self._post("/authentication/refreshAccessToken", payload)
             data = response.json()
             
             if data.get('result'):
-                self.access_token = data['data']['accessToken']
-                self.refresh_token = data['data']['refreshToken']
-                self.token_expiry = datetime.now() + timedelta(days=14)
-                return True
+                return self._token_from(data['data'])
             else:
-                return self.authenticate()
+                print(f"CJ token refresh failed: {data.get('message')}")
+                return None
         except Exception as e:
             print(f"Token refresh error: {e}")
+            return None
+    
+    def authenticate(self):
+        if not self.email or not self.api_key:
+            print("CJ credentials not set, skipping authentication")
+            return False
+        
+        token = self._request_token()
+        if not token:
+            return False
+        self.tokens.store.save(token)
+        self.tokens.invalidate()
+        self._use_token(token)
+        return True
+    
+    def refresh_access_token(self):
+        token = self._request_refresh(self.refresh_token) if self.refresh_token else None
+        if not token:
             return self.authenticate()
+        self.tokens.store.save(token)
+        self.tokens.invalidate()
+        self._use_token(token)
+        return True
     
     def ensure_auth(self):
-        if not self.access_token or (self.token_expiry and datetime.now() >= self.token_expiry):
-            return self.authenticate()
+        if not self.email or not self.api_key:
+            print("CJ credentials not set, skipping authentication")
+            return False
+        
+        token = self.tokens.get_token()
+        if not token:
+            return False
+        self._use_token(token)
         return True
     
     def search_products(self, keyword="baby", category_id=None, page=1, page_size=20):
-        if not self.ensure_auth():
-            return []
-            
-        url = f"{self.base_url}/product/list"
-        headers = {
-            "CJ-Access-Token": self.access_token,
-            "Content-Type": "application/json"
-        }
-        
+        products, _ = self.search_products_page(keyword, category_id, page, page_size)
+        return products
+    
+    @staticmethod
+    def _auth_rejected(response, body):
+        return response.status_code == 401 or body.get('code') in AUTH_ERROR_CODES
+
+    def _cached_call(self, path, payload, fresh=False):
+        """POST through the response cache; returns CJ's data payload or raises"""
+        def load():
+            for attempt in range(2):
+                if not self.ensure_auth():
+                    raise CJError('not authenticated')
+                headers = self._auth_headers()
+                response = self._post(path, payload, headers)
+                body = response.json()
+                # A token CJ revoked or expired early gets one refresh and retry
+                if attempt == 0 and self._auth_rejected(response, body):
+                    self.tokens.invalidate(rejected=headers['CJ-Access-Token'])
+                    continue
+                break
+            if not body.get('result') or not body.get('data'):
+                message = body.get('message') or f'HTTP {response.status_code}'
+                if response.ok and (body.get('result') or NOT_FOUND_MESSAGE.search(message)):
+                    raise CJNotFound(message)
+                raise CJError(message)
+            return body['data']
+        return self.cache.get(path, payload, load, fresh=fresh)
+    
+    def search_products_page(self, keyword="baby", category_id=None, page=1, page_size=20):
+        """Fetch one page of search results; returns (products, total_matches), ([], 0) on failure"""
+        try:
+            return self.fetch_products_page(keyword, category_id, page, page_size)
+        except CJError as e:
+            print(f"CJ Product search failed: {e}")
+            return [], 0
+        except Exception as e:
+            print(f"CJ Product search error: {e}")
+            return [], 0
+
+    def fetch_products_page(self, keyword="baby", category_id=None, page=1, page_size=20):
+        """Like search_products_page, but a failed call raises instead of looking like an empty page"""
         payload = {
             "productNameEn": keyword,
             "pageNum": page,
@@ -86,29 +269,21 @@ class CJDropshippingClient:
         if category_id:
             payload["categoryId"] = category_id
         
-        try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
-            data = response.json()
-            
-            if data.get('result') and data.get('data'):
-                return self.normalize_products(data['data'].get('list', []))
-            else:
-                print(f"CJ Product search failed: {data.get('message')}")
-                return []
-        except Exception as e:
-            print(f"CJ Product search error: {e}")
-            return []
+        page_data = self._cached_call("/product/list", payload)
+        return self.normalize_products(page_data.get('list', [])), int(page_data.get('total', 0))
     
     def normalize_products(self, cj_products):
+        # One categorizer pass for the whole page
+        categories = self.categorizer.classify_many([p.get('productNameEn', '') for p in cj_products])
         normalized = []
-        for p in cj_products:
+        for p, category in zip(cj_products, categories):
             try:
                 normalized.append({
                     'id': f"CJ_{p.get('pid', '')}",
                     'name': p.get('productNameEn', 'Baby Product'),
                     'description': p.get('description', '')[:200],
                     'price': float(p.get('sellPrice', 0)),
-                    'category': self.categorize_product(p.get('productNameEn', '')),
+                    'category': category,
                     'image': p.get('productImage', ''),
                     'in_stock': 1 if p.get('sellPrice', 0) > 0 else 0
                 })
@@ -118,43 +293,18 @@ class CJDropshippingClient:
         return normalized
     
     def categorize_product(self, name):
-        name_lower = name.lower()
-        
-        if any(word in name_lower for word in ['newborn', 'infant', 'swaddle', 'blanket']):
-            return 'Newborn Essentials'
-        elif any(word in name_lower for word in ['toy', 'rattle', 'wooden', 'play']):
-            return 'Wooden Toys'
-        elif any(word in name_lower for word in ['cultural', 'traditional', 'ethnic', 'ankara', 'dirac']):
-            return 'Cultural Baby Wear'
-        elif any(word in name_lower for word in ['mom', 'mother', 'mommy', 'matching']):
-            return 'Mom & Baby Sets'
-        elif any(word in name_lower for word in ['feed', 'bottle', 'nursing', 'sippy']):
-            return 'Feeding & Nursing'
-        elif any(word in name_lower for word in ['learn', 'educational', 'montessori']):
-            return 'Educational Toys'
-        else:
-            return 'Baby Essentials'
-    
-    def get_product_detail(self, product_id):
-        if not self.ensure_auth():
-            return None
-            
-        url = f"{self.base_url}/product/query"
-        headers = {
-            "CJ-Access-Token": self.access_token,
-            "Content-Type": "application/json"
-        }
-        
-        payload = {"pid": product_id}
-        
+        return self.categorizer.classify(name)
+    
+    def get_product_detail(self, product_id, fresh=False):
+        """Normalized product for a CJ pid, or None if CJ says there is no such product
+
+        A call that failed (network, open breaker, auth, a CJ error) raises
+        instead, so callers can tell "gone" from "couldn't check". fresh=True
+        bypasses the response cache.
+        """
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
-            data = response.json()
-            
-            if data.get('result') and data.get('data'):
-                products = self.normalize_products([data['data']])
-                return products[0] if products else None
-            return None
-        except Exception as e:
-            print(f"CJ Product detail error: {e}")
+            data = self._cached_call("/product/query", {"pid": product_id}, fresh=fresh)
+        except CJNotFound:
             return None
+        products = self.normalize_products([data])
+        return products[0] if products else None
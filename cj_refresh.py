@@ -0,0 +1,152 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from cj_sync import SYNC_COLUMNS, content_hash
+
+# Background price/stock refresher for CJ-sourced products. Each pass picks
+# the CJ_ products most worth re-checking, looks up their current detail
+# concurrently (throttled by the client's token bucket, bypassing the
+# response cache and replacing its copy), and writes only rows whose price
+# or stock actually moved, in short batched transactions. It runs as its
+# own process, never on a request thread:
+#
+#     python3 cj_refresh.py                 # loop every CJ_REFRESH_INTERVAL seconds
+#     python3 cj_refresh.py --once --budget 50
+#
+# Priority: products ordered in the last RECENT_DAYS first (most order lines
+# first), then never-refreshed, then oldest-refreshed. A product refreshed
+# less than max_age seconds ago is not due. last_refreshed_at lives in
+# product_refresh rather than on products, so stamping a row that did not
+# change doesn't bump catalog_version or touch the search index.
+
+PRODUCT_REFRESH_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS product_refresh (
+        product_id TEXT PRIMARY KEY,
+        last_refreshed_at TIMESTAMP NOT NULL,
+        last_changed_at TIMESTAMP
+    ) WITHOUT ROWID;
+'''
+
+ID_PREFIX = 'CJ_'
+RECENT_DAYS = 7
+DEFAULT_BUDGET = int(os.environ.get('CJ_REFRESH_BUDGET', 200))
+DEFAULT_MAX_AGE = int(os.environ.get('CJ_REFRESH_MAX_AGE', 6 * 3600))
+DEFAULT_INTERVAL = int(os.environ.get('CJ_REFRESH_INTERVAL', 300))
+MAX_WORKERS = 4
+BATCH_SIZE = 100
+
+_DUE = f'''
+    WITH recent AS (
+        SELECT i.product_id, COUNT(*) AS lines
+        FROM orders o JOIN order_items i ON i.order_id = o.id
+        WHERE o.created_at >= datetime('now', ?)
+        GROUP BY i.product_id
+    )
+    SELECT {', '.join(f'p.{column}' for column in SYNC_COLUMNS)}
+    FROM products p
+    LEFT JOIN product_refresh f ON f.product_id = p.id
+    LEFT JOIN recent r ON r.product_id = p.id
+    WHERE p.id >= ? AND p.id < ?
+      AND (f.last_refreshed_at IS NULL OR f.last_refreshed_at < datetime('now', ?))
+    ORDER BY r.lines IS NULL, r.lines DESC, f.last_refreshed_at IS NOT NULL, f.last_refreshed_at, p.id
+    LIMIT ?
+'''
+
+_STAMP = '''
+    INSERT INTO product_refresh (product_id, last_refreshed_at, last_changed_at)
+    VALUES (?, CURRENT_TIMESTAMP, CASE WHEN ? THEN CURRENT_TIMESTAMP END)
+    ON CONFLICT(product_id) DO UPDATE SET
+        last_refreshed_at = excluded.last_refreshed_at,
+        last_changed_at = COALESCE(excluded.last_changed_at, last_changed_at)
+'''
+
+def due_products(conn, limit=DEFAULT_BUDGET, max_age=DEFAULT_MAX_AGE):
+    """The next `limit` CJ products to re-check, as SYNC_COLUMNS dicts in priority order"""
+    upper = ID_PREFIX[:-1] + chr(ord(ID_PREFIX[-1]) + 1)
+    rows = conn.execute(_DUE, (f'-{RECENT_DAYS} days', ID_PREFIX, upper, f'-{int(max_age)} seconds', limit))
+    return [dict(zip(SYNC_COLUMNS, row)) for row in rows]
+
+def write_results(conn, results):
+    """Apply [(product, fresh_or_None)] in one transaction; returns how many rows changed
+
+    Only price and in_stock are taken from the detail lookup; name, image and
+    category stay as the catalog sync wrote them. A product CJ says no
+    longer exists (fresh is None) is stamped but left as it is, so it rotates
+    to the back of the queue instead of being retried every pass.
+    """
+    changes, stamps = [], []
+    for product, fresh in results:
+        changed = fresh is not None and (fresh['price'], fresh['in_stock']) != (product['price'], product['in_stock'])
+        if changed:
+            updated = dict(product, price=fresh['price'], in_stock=fresh['in_stock'])
+            changes.append((updated['price'], updated['in_stock'], content_hash(updated), product['id']))
+        stamps.append((product['id'], changed))
+    with conn:
+        if changes:
+            conn.executemany('UPDATE products SET price = ?, in_stock = ?, content_hash = ? WHERE id = ?', changes)
+        conn.executemany(_STAMP, stamps)
+    return len(changes)
+
+def refresh_products(conn, client, budget=DEFAULT_BUDGET, max_age=DEFAULT_MAX_AGE, workers=MAX_WORKERS,
+                     batch_size=BATCH_SIZE):
+    """One refresher pass: at most `budget` detail lookups; returns per-run stats"""
+    started = time.perf_counter()
+    stats = {'checked': 0, 'changed': 0, 'unavailable': 0, 'failed': 0}
+    due = due_products(conn, budget, max_age)
+    # Authenticate once up front rather than from every pool thread at once
+    if due and client.ensure_auth():
+        pending = []
+        # Only network calls run on the pool; all writes stay on this thread's connection
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(client.get_product_detail, product['id'][len(ID_PREFIX):], fresh=True): product
+                       for product in due}
+            for future in as_completed(futures):
+                try:
+                    fresh = future.result()
+                except Exception as e:
+                    # Couldn't check it (CJ down, breaker open, auth): not stamped, so still due
+                    stats['failed'] += 1
+                    if stats['failed'] == 1:
+                        print(f"⚠️ CJ refresh lookup failed: {e}")
+                    continue
+                stats['checked'] += 1
+                stats['unavailable'] += fresh is None
+                pending.append((futures[future], fresh))
+                if len(pending) >= batch_size:
+                    stats['changed'] += write_results(conn, pending)
+                    pending.clear()
+        if pending:
+            stats['changed'] += write_results(conn, pending)
+    stats['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    return stats
+
+def run_forever(conn, client, interval=DEFAULT_INTERVAL, **options):
+    while True:
+        stats = refresh_products(conn, client, **options)
+        if stats['checked']:
+            print(f"✅ CJ refresh: {stats}")
+        time.sleep(interval)
+
+if __name__ == '__main__':
+    import argparse
+    from database import get_db
+    from migrations import migrate
+    from cj_client import CJDropshippingClient
+    parser = argparse.ArgumentParser(description='Keep CJ product prices and stock current')
+    parser.add_argument('--once', action='store_true', help='run a single pass and exit')
+    parser.add_argument('--budget', type=int, default=DEFAULT_BUDGET, help='detail lookups per pass')
+    parser.add_argument('--max-age', type=int, default=DEFAULT_MAX_AGE, help='seconds before a product is due again')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS)
+    parser.add_argument('--interval', type=int, default=DEFAULT_INTERVAL, help='seconds between passes')
+    args = parser.parse_args()
+    conn = get_db()
+    migrate(conn)
+    client = CJDropshippingClient()
+    options = {'budget': args.budget, 'max_age': args.max_age, 'workers': args.workers}
+    if args.once:
+        print(f"✅ CJ refresh: {refresh_products(conn, client, **options)}")
+    else:
+        try:
+            run_forever(conn, client, args.interval, **options)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,234 @@
+import json
+import math
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Catalog sync engine for CJ Dropshipping. Pages for a keyword are fetched
+# concurrently on a small thread pool; each page is written in one
+# transaction and rows whose content hash is unchanged are not rewritten.
+#
+# A full sync can take minutes (every page goes through the client's token
+# bucket), so it never runs on a request thread: POST /api/cj/sync records a
+# queued run in cj_sync_runs and starts this module as its own process,
+#
+#     python3 cj_sync.py --run 42               # what the app launches
+#     python3 cj_sync.py --keyword toys         # queue and run one from the shell
+#
+# which marks the run running, syncs, and stores its stats (or error) for
+# GET /api/cj/sync/<id>. At most one run is active at a time across workers.
+SYNC_COLUMNS = ('id', 'name', 'description', 'price', 'category', 'image', 'in_stock')
+MAX_WORKERS = 4
+MAX_PAGES = 50
+ID_CHUNK = 500
+# Options a run passes to sync_catalog(); a run may also carry warm_images
+RUN_OPTIONS = ('keyword', 'page_size', 'max_pages')
+# A queued/running run older than this is taken to have died with its process
+STALE_RUN_SECONDS = 2 * 3600
+
+CJ_SYNC_RUNS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS cj_sync_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        options TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        stats TEXT,
+        error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        finished_at TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_cj_sync_runs_status ON cj_sync_runs(status, created_at);
+'''
+
+UPSERT_SQL = '''
+    INSERT INTO products (id, name, description, price, category, image, in_stock, content_hash)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        name = excluded.name, description = excluded.description,
+        price = excluded.price, category = excluded.category,
+        image = excluded.image, in_stock = excluded.in_stock,
+        content_hash = excluded.content_hash
+    WHERE products.content_hash IS NOT excluded.content_hash
+'''
+
+def content_hash(product):
+    payload = json.dumps([product[column] for column in SYNC_COLUMNS], separators=(',', ':'))
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+def existing_hashes(conn, ids):
+    hashes = {}
+    for start in range(0, len(ids), ID_CHUNK):
+        chunk = ids[start:start + ID_CHUNK]
+        placeholders = ','.join('?' * len(chunk))
+        for row in conn.execute(f'SELECT id, content_hash FROM products WHERE id IN ({placeholders})', chunk):
+            hashes[row[0]] = row[1]
+    return hashes
+
+def upsert_products(conn, products, new_products=None):
+    """Write one batch in a single transaction; returns (inserted, updated, unchanged)
+
+    Products not previously in the catalog are appended to new_products when it is given.
+    """
+    batch = {}
+    for product in products:
+        batch[product['id']] = product
+    if not batch:
+        return 0, 0, 0
+
+    current = existing_hashes(conn, list(batch))
+    rows = []
+    inserted = updated = unchanged = 0
+    for product_id, product in batch.items():
+        digest = content_hash(product)
+        if product_id not in current:
+            inserted += 1
+            if new_products is not None:
+                new_products.append(product)
+        elif current[product_id] != digest:
+            updated += 1
+        else:
+            unchanged += 1
+            continue
+        rows.append(tuple(product[column] for column in SYNC_COLUMNS) + (digest,))
+
+    if rows:
+        with conn:
+            conn.executemany(UPSERT_SQL, rows)
+    return inserted, updated, unchanged
+
+def sync_catalog(conn, client, keyword='baby', page_size=100, max_pages=MAX_PAGES, workers=MAX_WORKERS,
+                 on_inserted=None):
+    """Fetch every page for keyword and upsert it; returns per-run stats
+
+    on_inserted, if given, is called with each page's newly added products after they are committed.
+    A page CJ fails to return is counted in pages_failed (its number in
+    failed_pages) and the rest still sync; if the first page fails there is
+    nothing to go on and the error is raised.
+    """
+    started = time.perf_counter()
+    stats = {'keyword': keyword, 'pages_fetched': 0, 'pages_failed': 0, 'failed_pages': [], 'fetched': 0,
+             'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+    def record(products):
+        stats['pages_fetched'] += 1
+        stats['fetched'] += len(products)
+        new_products = [] if on_inserted else None
+        inserted, updated, unchanged = upsert_products(conn, products, new_products)
+        if new_products:
+            on_inserted(new_products)
+        stats['inserted'] += inserted
+        stats['updated'] += updated
+        stats['unchanged'] += unchanged
+
+    # The first page tells us how many pages there are (and authenticates
+    # the client before the pool starts sharing it)
+    first_page, total = client.fetch_products_page(keyword=keyword, page=1, page_size=page_size)
+    if first_page:
+        record(first_page)
+        pages = min(math.ceil(total / page_size), max_pages)
+        if pages > 1:
+            # Only network calls run on the pool; all writes stay on this thread's connection
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(client.fetch_products_page, keyword=keyword, page=page, page_size=page_size): page
+                    for page in range(2, pages + 1)
+                }
+                for future in as_completed(futures):
+                    try:
+                        products, _ = future.result()
+                    except Exception as e:
+                        stats['pages_failed'] += 1
+                        stats['failed_pages'].append(futures[future])
+                        print(f"⚠️ CJ sync page {futures[future]} failed: {e}")
+                        continue
+                    if products:
+                        record(products)
+    stats['failed_pages'].sort()
+
+    stats['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    return stats
+
+def enqueue_run(conn, options):
+    """Record a queued run of sync_catalog(**options); returns its id, or None if one is already active"""
+    with conn:
+        # One statement, so two workers racing here can't both win
+        cursor = conn.execute('''
+            INSERT INTO cj_sync_runs (options)
+            SELECT ? WHERE NOT EXISTS (
+                SELECT 1 FROM cj_sync_runs
+                WHERE status IN ('queued', 'running') AND created_at > datetime('now', ?)
+            )
+        ''', (json.dumps(options), f'-{STALE_RUN_SECONDS} seconds'))
+    return cursor.lastrowid if cursor.rowcount else None
+
+def get_run(conn, run_id):
+    row = conn.execute('''
+        SELECT id, options, status, stats, error, created_at, finished_at FROM cj_sync_runs WHERE id = ?
+    ''', (run_id,)).fetchone()
+    if row is None:
+        return None
+    run = dict(zip(('id', 'options', 'status', 'stats', 'error', 'created_at', 'finished_at'), row))
+    run['options'] = json.loads(run['options'])
+    run['stats'] = json.loads(run['stats']) if run['stats'] else None
+    return run
+
+def execute_run(conn, client, run_id, on_inserted=None):
+    """Run a queued sync to completion, recording its outcome; returns the stats"""
+    run = get_run(conn, run_id)
+    if run is None or run['status'] != 'queued':
+        raise ValueError(f'CJ sync run {run_id} is not queued')
+    with conn:
+        conn.execute("UPDATE cj_sync_runs SET status = 'running' WHERE id = ?", (run_id,))
+    try:
+        options = {name: run['options'][name] for name in RUN_OPTIONS if name in run['options']}
+        stats = sync_catalog(conn, client, on_inserted=on_inserted, **options)
+    except Exception as e:
+        with conn:
+            conn.execute('''
+                UPDATE cj_sync_runs SET status = 'failed', error = ?, finished_at = CURRENT_TIMESTAMP WHERE id = ?
+            ''', (str(e), run_id))
+        raise
+    with conn:
+        conn.execute('''
+            UPDATE cj_sync_runs SET status = 'done', stats = ?, finished_at = CURRENT_TIMESTAMP WHERE id = ?
+        ''', (json.dumps(stats), run_id))
+    return stats
+
+if __name__ == '__main__':
+    import os
+    import sys
+    import argparse
+    from database import get_db
+    from migrations import migrate
+    from cj_client import CJDropshippingClient
+    from categorizer import load_categorizer
+    from image_cache import ImageCache
+    parser = argparse.ArgumentParser(description='Sync products for a keyword from CJ Dropshipping')
+    parser.add_argument('--run', type=int, help='execute this queued run (as POST /api/cj/sync does)')
+    parser.add_argument('--keyword', default='baby')
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--max-pages', type=int, default=20)
+    parser.add_argument('--warm-images', action='store_true', help='fetch and resize new products\' images')
+    args = parser.parse_args()
+    conn = get_db()
+    migrate(conn)
+    run_id = args.run
+    if run_id is None:
+        run_id = enqueue_run(conn, {'keyword': args.keyword, 'page_size': args.page_size,
+                                    'max_pages': args.max_pages, 'warm_images': args.warm_images})
+        if run_id is None:
+            sys.exit('⚠️ A CJ sync is already running')
+    run = get_run(conn, run_id)
+    if run is None:
+        sys.exit(f'⚠️ No CJ sync run {run_id}')
+    warm = None
+    if run['options'].get('warm_images'):
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        images = ImageCache(os.environ.get('IMAGE_CACHE_DIR', os.path.join(base_dir, 'image_cache')),
+                            int(os.environ.get('IMAGE_CACHE_MAX_MB', 512)) * 1024 * 1024)
+        # The warm-up pool's threads are joined before the process exits
+        warm = lambda products: images.warm([(p['id'], p['image']) for p in products])
+    client = CJDropshippingClient()
+    # Pick up any edits to category_rules
+    client.categorizer = load_categorizer(conn)
+    stats = execute_run(conn, client, run_id, on_inserted=warm)
+    print(f"✅ CJ sync run {run_id}: {stats}")
@@ -0,0 +1,189 @@
+import os
+import time
+import uuid
+import sqlite3
+import threading
+from collections import namedtuple
+
+# CJ access tokens shared by every worker process. The token lives in a
+# SQLite row; a lease on that row picks a single refresher across processes
+# and a lock does the same across threads, while everyone else keeps using
+# the still-valid token or waits for the refresher to publish a new one.
+TOKEN_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS cj_tokens (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        access_token TEXT, refresh_token TEXT, expires_at REAL,
+        lease_owner TEXT, lease_expires REAL
+    );
+    INSERT OR IGNORE INTO cj_tokens (id) VALUES (1);
+'''
+
+Token = namedtuple('Token', ['access_token', 'refresh_token', 'expires_at'])
+
+class TokenStore:
+    """The cj_tokens row, accessed through short-lived connections"""
+
+    def __init__(self, path):
+        self.path = path
+        self._ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute('PRAGMA busy_timeout=10000')
+        if not self._ready:
+            conn.executescript(TOKEN_SCHEMA)
+            self._ready = True
+        return conn
+
+    def load(self):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT access_token, refresh_token, expires_at FROM cj_tokens WHERE id = 1'
+            ).fetchone()
+        finally:
+            conn.close()
+        if not row or not row[0]:
+            return None
+        return Token(*row)
+
+    def save(self, token):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    'UPDATE cj_tokens SET access_token = ?, refresh_token = ?, expires_at = ? WHERE id = 1',
+                    (token.access_token, token.refresh_token, token.expires_at),
+                )
+        finally:
+            conn.close()
+
+    def try_lease(self, owner, seconds):
+        conn = self._connect()
+        try:
+            with conn:
+                now = time.time()
+                cursor = conn.execute('''
+                    UPDATE cj_tokens SET lease_owner = ?, lease_expires = ?
+                    WHERE id = 1 AND (lease_expires IS NULL OR lease_expires < ?)
+                ''', (owner, now + seconds, now))
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def release_lease(self, owner):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    'UPDATE cj_tokens SET lease_owner = NULL, lease_expires = NULL WHERE id = 1 AND lease_owner = ?',
+                    (owner,),
+                )
+        finally:
+            conn.close()
+
+class CJTokenManager:
+    """Single-flight, refresh-ahead access token shared through a TokenStore.
+
+    login() and refresh(refresh_token) perform the network calls and return
+    a Token or None.
+    """
+
+    def __init__(self, login, refresh, store, refresh_ahead=86400, recheck_interval=60,
+                 lease_seconds=30):
+        self.login = login
+        self.refresh = refresh
+        self.store = store
+        self.refresh_ahead = refresh_ahead
+        self.recheck_interval = recheck_interval
+        self.lease_seconds = lease_seconds
+        self._nonce = uuid.uuid4().hex[:8]
+        self._token = None
+        self._checked = 0.0
+        # Access token CJ turned down; never handed out again, whatever its expiry says
+        self._rejected = None
+        self._lock = threading.Lock()
+
+    @property
+    def owner(self):
+        # Includes the pid so forked workers never share a lease identity
+        return f'{os.getpid()}-{self._nonce}'
+
+    def _fresh(self, token, now):
+        return self._usable(token, now) and token.expires_at - self.refresh_ahead > now
+
+    def _usable(self, token, now):
+        return token is not None and token.expires_at > now and token.access_token != self._rejected
+
+    def _current(self, now, reload=False):
+        # Re-read the shared row now and then so a token refreshed by another
+        # worker replaces ours before CJ stops accepting the old one
+        if reload or self._token is None or now - self._checked > self.recheck_interval:
+            self._token = self.store.load()
+            self._checked = now
+        return self._token
+
+    def get_token(self):
+        """Return a valid Token, refreshing it first if it is due"""
+        now = time.time()
+        token = self._current(now)
+        if self._fresh(token, now):
+            return token
+
+        usable = token if self._usable(token, now) else None
+        # With a usable token in hand, only one thread refreshes and the rest
+        # carry on; without one, everybody queues behind the refresher.
+        if not self._lock.acquire(blocking=usable is None):
+            return usable
+        try:
+            token = self._current(time.time(), reload=True)
+            if self._fresh(token, time.time()):
+                return token
+            return self._refresh_shared(token) or usable
+        finally:
+            self._lock.release()
+
+    def _refresh_shared(self, stale):
+        if self.store.try_lease(self.owner, self.lease_seconds):
+            try:
+                # Someone may have published a new token just before we got the lease
+                token = self._current(time.time(), reload=True)
+                if self._fresh(token, time.time()):
+                    return token
+                stale = token or stale
+                token = None
+                if stale is not None and stale.refresh_token:
+                    token = self.refresh(stale.refresh_token)
+                if token is None:
+                    token = self.login()
+                if token is not None:
+                    self.store.save(token)
+                    self._token = token
+                    self._checked = time.time()
+                    # Even if CJ handed the same access token back, it has vouched for it again
+                    self._rejected = None
+                return token
+            finally:
+                self.store.release_lease(self.owner)
+
+        # Another worker holds the lease: wait for it to publish
+        deadline = time.time() + self.lease_seconds
+        while time.time() < deadline:
+            time.sleep(0.2)
+            now = time.time()
+            token = self._current(now, reload=True)
+            if self._fresh(token, now) or (token is not None and token != stale and self._usable(token, now)):
+                return token
+        return None
+
+    def invalidate(self, rejected=None):
+        """Forget the cached token; with rejected (an access token CJ refused), refresh past it
+
+        The shared row may still hold the rejected token, unexpired as far as
+        its timestamp goes, so it is remembered and treated as expired: the
+        next get_token() refreshes it (or picks up the one another worker
+        already published).
+        """
+        if rejected is not None:
+            self._rejected = rejected
+        self._token = None
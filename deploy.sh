@@ -34,12 +34,22 @@ echo "Installing Flask & friends..."
 python3 -m venv venv
 source venv/bin/activate
 pip install --upgrade pip
-pip install flask flask-cors gunicorn
+pip install flask flask-cors flask-limiter requests gunicorn brotli orjson Pillow
+
+# Fingerprint + precompress CSS/JS/images into dist/
+python3 build_assets.py
 
 # 5. Test the app locally
 echo "Testing your store..."
 pkill -f "python.*app.py" 2>/dev/null
-gunicorn --bind 0.0.0.0:7000 app:app --daemon --timeout 120
+# Threaded workers: a thread waiting on PayPal/CJ leaves the others serving the
+# catalog. paypal_client reads WEB_THREADS and lets at most half of them wait
+# on PayPal; a failing upstream opens its circuit breaker
+export WEB_THREADS=${WEB_THREADS:-8}
+gunicorn --bind 127.0.0.1:7000 app:app --daemon --timeout 120 --worker-class gthread --threads $WEB_THREADS
+# CJ price/stock refresher runs beside the web workers, never in a request
+pkill -f "python.*cj_refresh.py" 2>/dev/null
+nohup python3 cj_refresh.py >> cj_refresh.log 2>&1 &
 
 sleep 3
 if curl -s http://localhost:7000 > /dev/null; then
@@ -87,7 +97,7 @@ After=network.target
 [Service]
 User=$USER
 WorkingDirectory=/home/$USER/BabyZion
-ExecStart=/home/$USER/BabyZion/venv/bin/gunicorn --workers 3 --bind 0.0.0.0:7000 app:app
+ExecStart=/home/$USER/BabyZion/venv/bin/gunicorn --workers 3 --bind 127.0.0.1:7000 app:app
 Restart=always
 RestartSec=5
 
@@ -0,0 +1,80 @@
+# Category facets for the storefront filters. category_stats holds one row
+# per category with its in-stock count and price range; triggers keep it
+# current on every products write (CJ sync, seeding, scripts), so reading
+# facets never touches the products table.
+#
+# Counts move by +1/-1. min/max only need a fresh value when the row that
+# left was the current extreme, and then it is a single seek on
+# idx_products_cat_price (in_stock, category, price, id).
+
+_RETIRE_OLD = '''
+        UPDATE category_stats SET
+            in_stock_count = in_stock_count - 1,
+            min_price = CASE WHEN old.price <= min_price THEN
+                (SELECT MIN(price) FROM products WHERE in_stock = 1 AND category = old.category) ELSE min_price END,
+            max_price = CASE WHEN old.price >= max_price THEN
+                (SELECT MAX(price) FROM products WHERE in_stock = 1 AND category = old.category) ELSE max_price END,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE category = old.category AND old.in_stock = 1;
+'''
+
+_COUNT_NEW = '''
+        INSERT INTO category_stats (category, in_stock_count, min_price, max_price, updated_at)
+        SELECT new.category, 1, new.price, new.price, CURRENT_TIMESTAMP
+        WHERE new.in_stock = 1 AND new.category IS NOT NULL
+        ON CONFLICT(category) DO UPDATE SET
+            in_stock_count = in_stock_count + 1,
+            min_price = MIN(COALESCE(min_price, excluded.min_price), excluded.min_price),
+            max_price = MAX(COALESCE(max_price, excluded.max_price), excluded.max_price),
+            updated_at = excluded.updated_at;
+'''
+
+CATEGORY_STATS_SCHEMA = f'''
+    CREATE TABLE IF NOT EXISTS category_stats (
+        category TEXT PRIMARY KEY,
+        in_stock_count INTEGER NOT NULL DEFAULT 0,
+        min_price REAL,
+        max_price REAL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) WITHOUT ROWID;
+    CREATE TRIGGER IF NOT EXISTS category_stats_ai AFTER INSERT ON products BEGIN
+        {_COUNT_NEW}
+    END;
+    CREATE TRIGGER IF NOT EXISTS category_stats_ad AFTER DELETE ON products BEGIN
+        {_RETIRE_OLD}
+    END;
+    CREATE TRIGGER IF NOT EXISTS category_stats_au AFTER UPDATE OF in_stock, price, category ON products BEGIN
+        {_RETIRE_OLD}
+        {_COUNT_NEW}
+    END;
+'''
+
+def rebuild_category_stats(conn):
+    """Recompute every row from products (migration backfill and repair; caller commits)"""
+    conn.execute('DELETE FROM category_stats')
+    conn.execute('''
+        INSERT INTO category_stats (category, in_stock_count, min_price, max_price, updated_at)
+        SELECT category, COUNT(*), MIN(price), MAX(price), CURRENT_TIMESTAMP
+        FROM products WHERE in_stock = 1 AND category IS NOT NULL
+        GROUP BY category
+    ''')
+
+def category_facets(conn):
+    """In-stock categories with counts and price ranges, plus the catalog-wide totals"""
+    rows = conn.execute('''
+        SELECT category, in_stock_count, min_price, max_price, updated_at
+        FROM category_stats WHERE in_stock_count > 0 ORDER BY category
+    ''').fetchall()
+    categories = [{
+        'category': row['category'],
+        'count': row['in_stock_count'],
+        'min_price': row['min_price'],
+        'max_price': row['max_price'],
+        'updated_at': row['updated_at'],
+    } for row in rows]
+    return {
+        'categories': categories,
+        'total': sum(category['count'] for category in categories),
+        'min_price': min((category['min_price'] for category in categories), default=None),
+        'max_price': max((category['max_price'] for category in categories), default=None),
+    }
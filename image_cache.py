@@ -0,0 +1,300 @@
+import os
+import io
+import time
+import fcntl
+import hashlib
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Product image proxy. /img/<product_id>/<size> fetches the product's origin
+# image (Unsplash, CJ's CDN) once, keeps the original plus resized WebP/JPEG
+# variants on disk, and serves them from there with long cache headers.
+#
+#   <cache_dir>/<key[:2]>/<key>/orig          origin bytes, as fetched
+#   <cache_dir>/<key[:2]>/<key>/md.webp       resized variants
+#
+# key hashes the product id with its image URL, so a new image URL is a new
+# entry and the old one simply ages out. Each entry directory has a lock
+# file: flock() serializes concurrent misses on the same image across
+# threads and gunicorn workers alike, so an origin is fetched and a variant
+# encoded once however many requests arrive for it together. Eviction takes
+# the same lock to delete a file, and removes an emptied entry directory
+# (lock file included) before letting go of it.
+#
+# Without Pillow, or for an origin too large to decode safely (a
+# decompression bomb), the original is cached and served as-is.
+
+SIZES = {'sm': 160, 'md': 400, 'lg': 800}
+FORMATS = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+QUALITY = {'webp': 80, 'jpeg': 82}
+FETCH_TIMEOUT = 8
+MAX_ORIGIN_BYTES = 10 * 1024 * 1024
+# Eviction trims back to this fraction of the budget so it doesn't run on every write
+EVICT_TO = 0.9
+
+class ImageError(Exception):
+    pass
+
+def _key(product_id, url):
+    return hashlib.blake2b(f'{product_id}\0{url}'.encode('utf-8'), digest_size=16).hexdigest()
+
+class ImageCache:
+    """Size-bounded on-disk LRU of origin images and their resized variants"""
+
+    def __init__(self, cache_dir, max_bytes, session=None, warm_workers=2):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.session = session or requests.Session()
+        self.session.headers.setdefault('User-Agent', 'BabyZion-ImageProxy/1.0')
+        self._warm_workers = warm_workers
+        self._warm_pool = None
+        self._warm_lock = threading.Lock()
+        # Approximate bytes written since the last eviction pass, per process
+        self._written = 0
+        self._written_lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        if Image is None:
+            print("⚠️ Pillow is not installed: /img/ serves the original image for every size")
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    @staticmethod
+    def variant_name(size, fmt):
+        if Image is None:
+            return 'orig'
+        return f'{size}.{fmt}'
+
+    def get(self, product_id, url, size, fmt):
+        """Return (path, mimetype, etag) for a variant, fetching and encoding it on a miss"""
+        if size not in SIZES:
+            raise ValueError(f'size must be one of: {", ".join(SIZES)}')
+        key = _key(product_id, url)
+        entry = self._entry_dir(key)
+        name = self.variant_name(size, fmt)
+        path = os.path.join(entry, name)
+        if not os.path.exists(path):
+            with self._locked(entry):
+                # Whoever held the lock before us may have produced it already
+                if not os.path.exists(path):
+                    path = self._produce(entry, url, size, fmt, path)
+        self._touch(path)
+        name = os.path.basename(path)
+        mimetype = self._sniff(path) if name == 'orig' else FORMATS[fmt]
+        return path, mimetype, f'{key}-{name}'
+
+    @staticmethod
+    @contextmanager
+    def _locked(entry):
+        """Hold the entry's lock, creating the entry if need be
+
+        Eviction may delete the entry, lock file and all, while we wait for the
+        lock; then the file we locked is no longer the one at .lock, so start over.
+        """
+        lock_path = os.path.join(entry, '.lock')
+        while True:
+            os.makedirs(entry, exist_ok=True)
+            with open(lock_path, 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    current = os.stat(lock_path).st_ino == os.fstat(lock.fileno()).st_ino
+                except FileNotFoundError:
+                    current = False
+                try:
+                    if current:
+                        yield
+                        return
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _produce(self, entry, url, size, fmt, path):
+        """Write the variant at path; returns the path to serve (the original if it can't be resized)"""
+        original = os.path.join(entry, 'orig')
+        if os.path.exists(original):
+            with open(original, 'rb') as f:
+                data = f.read()
+        else:
+            data = self._fetch(url)
+            self._write(original, data)
+        resized = self._resize(data, SIZES[size], fmt) if Image is not None else None
+        if resized is None:
+            return original
+        self._write(path, resized)
+        return path
+
+    def _fetch(self, url):
+        try:
+            response = self.session.get(url, timeout=FETCH_TIMEOUT, stream=True)
+        except requests.RequestException as e:
+            raise ImageError(f'origin fetch failed: {e}')
+        with response:
+            if response.status_code != 200:
+                raise ImageError(f'origin returned {response.status_code}')
+            if not response.headers.get('Content-Type', '').startswith('image/'):
+                raise ImageError('origin did not return an image')
+            chunks, total = [], 0
+            for chunk in response.iter_content(64 * 1024):
+                total += len(chunk)
+                if total > MAX_ORIGIN_BYTES:
+                    raise ImageError('origin image too large')
+                chunks.append(chunk)
+        return b''.join(chunks)
+
+    @staticmethod
+    def _resize(data, width, fmt):
+        """Encoded variant bytes, or None for an image too large to decode safely"""
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image = image.convert('RGBA' if fmt == 'webp' and image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+                image.thumbnail((width, width), Image.LANCZOS)
+                out = io.BytesIO()
+                image.save(out, 'WEBP' if fmt == 'webp' else 'JPEG', quality=QUALITY[fmt], optimize=True)
+        except Image.DecompressionBombError as e:
+            print(f"⚠️ Serving the original image, too large to resize: {e}")
+            return None
+        except (OSError, ValueError) as e:
+            raise ImageError(f'could not decode origin image: {e}')
+        return out.getvalue()
+
+    @staticmethod
+    def _sniff(path):
+        with open(path, 'rb') as f:
+            head = f.read(12)
+        if head.startswith(b'\x89PNG'):
+            return 'image/png'
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            return 'image/webp'
+        if head[:3] == b'GIF':
+            return 'image/gif'
+        return 'image/jpeg'
+
+    def _write(self, path, data):
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._written_lock:
+            self._written += len(data)
+            due = self._written >= self.max_bytes * (1 - EVICT_TO)
+            if due:
+                self._written = 0
+        if due:
+            self.evict()
+
+    @staticmethod
+    def _touch(path):
+        # mtime doubles as the LRU clock (atime is often mounted noatime)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def usage(self):
+        """Return (files, bytes) currently cached"""
+        files = total = 0
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.startswith('.') or name.endswith('.tmp'):
+                    continue
+                try:
+                    total += os.stat(os.path.join(root, name)).st_size
+                    files += 1
+                except FileNotFoundError:
+                    pass
+        return files, total
+
+    def evict(self):
+        """Delete least recently used files until the cache is under EVICT_TO of its budget"""
+        with open(os.path.join(self.cache_dir, '.evict.lock'), 'a') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0  # another worker is already evicting
+            try:
+                files, total = [], 0
+                for root, _, names in os.walk(self.cache_dir):
+                    for name in names:
+                        if name.startswith('.') or name.endswith('.tmp'):
+                            continue
+                        path = os.path.join(root, name)
+                        try:
+                            stat = os.stat(path)
+                        except FileNotFoundError:
+                            continue
+                        files.append((stat.st_mtime, stat.st_size, path))
+                        total += stat.st_size
+                if total <= self.max_bytes:
+                    return 0
+                removed = 0
+                target = self.max_bytes * EVICT_TO
+                # Anything used in the last minute may be mid-response; leave it be
+                recent = time.time() - 60
+                for mtime, size, path in sorted(files):
+                    if total <= target or mtime >= recent:
+                        break
+                    if self._evict_file(path):
+                        total -= size
+                        removed += 1
+                return removed
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _evict_file(path):
+        """Delete a cached file under its entry's lock, and the entry once nothing else is left in it
+
+        Returns False, leaving the file, when a request holds the entry (it is
+        being filled) or the file is already gone.
+        """
+        entry = os.path.dirname(path)
+        lock_path = os.path.join(entry, '.lock')
+        try:
+            lock = open(lock_path, 'r')
+        except FileNotFoundError:
+            return False
+        with lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            try:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    return False
+                if os.listdir(entry) == ['.lock']:
+                    # Still locked: a request waiting on this lock sees .lock gone and starts over
+                    os.remove(lock_path)
+                    os.rmdir(entry)
+                return True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def warm(self, products, sizes=('md',), fmt='webp'):
+        """Fetch and encode variants for [(product_id, url), ...] on a background pool"""
+        with self._warm_lock:
+            if self._warm_pool is None:
+                self._warm_pool = ThreadPoolExecutor(max_workers=self._warm_workers,
+                                                     thread_name_prefix='image-warm')
+            pool = self._warm_pool
+        for product_id, url in products:
+            if not url:
+                continue
+            for size in sizes:
+                pool.submit(self._warm_one, product_id, url, size, fmt)
+
+    def _warm_one(self, product_id, url, size, fmt):
+        try:
+            self.get(product_id, url, size, fmt)
+        except (ImageError, OSError) as e:
+            print(f"⚠️ Image warm-up failed for {product_id}: {e}")
+
+def preferred_format(accept_mimetypes):
+    return 'webp' if Image is not None and accept_mimetypes.quality('image/webp') else 'jpeg'
@@ -0,0 +1,213 @@
+import os
+import time
+import sqlite3
+import threading
+from math import floor
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+
+# Rate-limit counters shared by every worker on the host. Each gunicorn
+# worker used to count in its own memory, so N workers let N times the
+# configured traffic through; this keeps one set of counters in a small WAL
+# database next to the app instead. Counters live in their own file so that
+# limiter writes never queue behind order/catalog writes on babyzion.db.
+#
+#   Limiter(..., storage_uri='sqlite:///ratelimits.db', strategy='sliding-window-counter')
+#
+# Importing this module registers the sqlite:// scheme with limits.
+
+LIMITS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS rate_limits (
+        key TEXT PRIMARY KEY,
+        count INTEGER NOT NULL,
+        expires_at REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_rate_limits_expires ON rate_limits(expires_at);
+    CREATE TABLE IF NOT EXISTS rate_limit_stats (
+        endpoint TEXT PRIMARY KEY,
+        allowed INTEGER NOT NULL DEFAULT 0,
+        blocked INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID;
+'''
+
+# Counters are throwaway: a crash losing the last few increments is fine, so
+# skip fsync entirely and keep every write in memory-mapped WAL pages
+LIMITS_PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = OFF',
+    'PRAGMA busy_timeout = 2000',
+    'PRAGMA temp_store = MEMORY',
+)
+
+# Expired rows are skipped by every read and deleted in batches, at most
+# once per EXPIRY_INTERVAL seconds per worker, instead of on each request
+EXPIRY_INTERVAL = 30
+EXPIRY_BATCH = 1000
+
+INCR_SQL = '''
+    INSERT INTO rate_limits (key, count, expires_at) VALUES (?1, ?2, ?3 + ?4)
+    ON CONFLICT(key) DO UPDATE SET
+        count = CASE WHEN expires_at <= ?3 THEN excluded.count ELSE count + excluded.count END,
+        expires_at = CASE WHEN expires_at <= ?3 THEN excluded.expires_at ELSE expires_at END
+    RETURNING count
+'''
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """limits storage backed by a SQLite WAL file (fixed and sliding-window-counter strategies)"""
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        # sqlite:///ratelimits.db is relative, sqlite:////var/run/babyzion/limits.db absolute
+        self.path = (uri or 'sqlite:///ratelimits.db').split('://', 1)[1][1:] or 'ratelimits.db'
+        self._local = threading.local()
+        self._next_expiry = 0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self._conn().executescript(LIMITS_SCHEMA)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _conn(self):
+        # One connection per thread, reopened after a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            for pragma in LIMITS_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _expire(self, conn, now):
+        if now < self._next_expiry:
+            return
+        self._next_expiry = now + EXPIRY_INTERVAL
+        conn.execute('''
+            DELETE FROM rate_limits WHERE key IN (
+                SELECT key FROM rate_limits WHERE expires_at <= ? LIMIT ?
+            )
+        ''', (now, EXPIRY_BATCH))
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        conn = self._conn()
+        self._expire(conn, now)
+        return conn.execute(INCR_SQL, (key, amount, now, expiry)).fetchone()[0]
+
+    def get(self, key):
+        row = self._conn().execute('SELECT count FROM rate_limits WHERE key = ? AND expires_at > ?',
+                                   (key, time.time())).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self._conn().execute('SELECT expires_at FROM rate_limits WHERE key = ? AND expires_at > ?',
+                                   (key, now)).fetchone()
+        return row[0] if row else now
+
+    def clear(self, key):
+        self._conn().execute('DELETE FROM rate_limits WHERE key = ?', (key,))
+
+    def check(self):
+        try:
+            self._conn().execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self._conn().execute('DELETE FROM rate_limits').rowcount
+
+    def _window_counts(self, conn, previous_key, current_key, now):
+        counts = dict(conn.execute('SELECT key, count FROM rate_limits WHERE key IN (?, ?) AND expires_at > ?',
+                                   (previous_key, current_key, now)).fetchall())
+        return counts.get(previous_key, 0), counts.get(current_key, 0)
+
+    @staticmethod
+    def _ttls(previous_count, expiry, now):
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_ttl, current_ttl
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        conn = self._conn()
+        self._expire(conn, now)
+        # The write lock makes check-then-increment atomic across workers
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            previous_count, current_count = self._window_counts(conn, previous_key, current_key, now)
+            previous_ttl, _ = self._ttls(previous_count, expiry, now)
+            if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                conn.execute('COMMIT')
+                return False
+            # The current window's counter must outlive it to weight the next one
+            conn.execute(INCR_SQL, (current_key, amount, now, 2 * expiry)).fetchone()
+            conn.execute('COMMIT')
+            return True
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def get_sliding_window(self, key, expiry):
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count, current_count = self._window_counts(self._conn(), previous_key, current_key, now)
+        previous_ttl, current_ttl = self._ttls(previous_count, expiry, now)
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self._conn().execute('DELETE FROM rate_limits WHERE key IN (?, ?)', (previous_key, current_key))
+
+class LimiterStats:
+    """Per-route allowed/blocked counts, buffered in memory and flushed to the shared file in batches"""
+
+    def __init__(self, storage, flush_interval=10, flush_every=200):
+        self.storage = storage
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self._pending = {}
+        self._pending_total = 0
+        self._next_flush = time.monotonic() + flush_interval
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, blocked):
+        with self._lock:
+            counts = self._pending.setdefault(endpoint, [0, 0])
+            counts[1 if blocked else 0] += 1
+            self._pending_total += 1
+            due = self._pending_total >= self.flush_every or time.monotonic() >= self._next_flush
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._pending_total = 0
+            self._next_flush = time.monotonic() + self.flush_interval
+        if not pending:
+            return
+        conn = self.storage._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('''
+                INSERT INTO rate_limit_stats (endpoint, allowed, blocked) VALUES (?, ?, ?)
+                ON CONFLICT(endpoint) DO UPDATE SET
+                    allowed = allowed + excluded.allowed, blocked = blocked + excluded.blocked
+            ''', [(endpoint, allowed, blocked) for endpoint, (allowed, blocked) in pending.items()])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def snapshot(self):
+        """Totals across every worker (each worker's last few seconds may still be buffered)"""
+        self.flush()
+        rows = self.storage._conn().execute(
+            'SELECT endpoint, allowed, blocked FROM rate_limit_stats ORDER BY endpoint').fetchall()
+        return {endpoint: {'allowed': allowed, 'blocked': blocked} for endpoint, allowed, blocked in rows}
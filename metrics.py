@@ -0,0 +1,365 @@
+import os
+import re
+import json
+import time
+import fcntl
+import sqlite3
+import tempfile
+import threading
+from functools import lru_cache
+from urllib.parse import urlsplit
+from flask import g, request
+
+# Request, SQL and outbound-call metrics in Prometheus text format.
+#
+# Each worker process aggregates in memory and writes a snapshot to
+# METRICS_DIR/metrics-<pid>.json at most once a second; /metrics merges every
+# worker's file, so whichever worker answers the scrape reports the whole
+# server. Files left by exited workers are folded into one archive file so
+# their counts survive without the directory growing.
+
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'babyzion-metrics'))
+FLUSH_INTERVAL = 1.0
+# Opt-in: requests slower than this many milliseconds are logged with their query plans
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 0))
+SLOW_LOG_QUERIES = 5
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+HELP = {
+    'http_requests_total': ('counter', 'HTTP requests by route, method and status'),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by route and method'),
+    'http_requests_in_flight': ('gauge', 'HTTP requests currently being handled'),
+    'db_query_duration_seconds': ('histogram', 'SQLite statement latency by normalized query'),
+    'upstream_request_duration_seconds': ('histogram', 'Outbound CJ/PayPal call latency'),
+    'upstream_errors_total': ('counter', 'Outbound calls that failed before a response arrived'),
+    'upstream_cache_total': ('counter', 'Upstream response cache lookups by result (hit, stale, miss, fallback, ...)'),
+    'upstream_rejected_total': ('counter', 'Outbound calls refused by a bulkhead (busy) or open circuit (unavailable)'),
+}
+
+class Registry:
+    """In-process counters, gauges and histograms keyed by (name, labels)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.next_flush = 0.0
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def add_gauge(self, name, labels, amount):
+        key = (name, labels)
+        with self.lock:
+            self.gauges[key] = self.gauges.get(key, 0) + amount
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {'buckets': list(buckets), 'counts': [0] * len(buckets),
+                                                    'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram['counts'][index] += 1
+                    break
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'gauges': [[name, list(labels), value] for (name, labels), value in self.gauges.items()],
+                'histograms': [[name, list(labels), dict(h, counts=list(h['counts']))]
+                               for (name, labels), h in self.histograms.items()],
+            }
+
+    def flush(self, force=False):
+        """Write this worker's snapshot for the other workers to read"""
+        now = time.monotonic()
+        if not force and now < self.next_flush:
+            return
+        self.next_flush = now + FLUSH_INTERVAL
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f'metrics-{os.getpid()}.json')
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temporary, path)
+
+registry = Registry()
+
+def _reset_after_fork():
+    # A forked worker starts from zero; the parent's counts are in the parent's file
+    global registry
+    registry = Registry()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+# --- aggregation across workers -------------------------------------------
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _merge(total, snapshot, include_gauges=True):
+    for name, labels, value in snapshot['counters']:
+        key = (name, tuple(labels))
+        total['counters'][key] = total['counters'].get(key, 0) + value
+    if include_gauges:
+        for name, labels, value in snapshot['gauges']:
+            key = (name, tuple(labels))
+            total['gauges'][key] = total['gauges'].get(key, 0) + value
+    for name, labels, histogram in snapshot['histograms']:
+        key = (name, tuple(labels))
+        merged = total['histograms'].get(key)
+        if merged is None:
+            total['histograms'][key] = dict(histogram, counts=list(histogram['counts']))
+            continue
+        merged['counts'] = [a + b for a, b in zip(merged['counts'], histogram['counts'])]
+        merged['sum'] += histogram['sum']
+        merged['count'] += histogram['count']
+
+def _empty():
+    return {'counters': {}, 'gauges': {}, 'histograms': {}}
+
+def _as_snapshot(total):
+    return {
+        'counters': [[name, list(labels), value] for (name, labels), value in total['counters'].items()],
+        'gauges': [],
+        'histograms': [[name, list(labels), h] for (name, labels), h in total['histograms'].items()],
+    }
+
+def _load(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def collect():
+    """Merge every worker's snapshot (plus exited workers' archive) into one view"""
+    registry.flush(force=True)
+    archive_path = os.path.join(METRICS_DIR, 'metrics-archive.json')
+    with open(os.path.join(METRICS_DIR, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        total = _empty()
+        archive = _load(archive_path)
+        dead = []
+        for name in os.listdir(METRICS_DIR):
+            match = re.fullmatch(r'metrics-(\d+)\.json', name)
+            if not match:
+                continue
+            snapshot = _load(os.path.join(METRICS_DIR, name))
+            if snapshot is None:
+                continue
+            if _pid_alive(int(match.group(1))):
+                _merge(total, snapshot)
+            else:
+                dead.append((name, snapshot))
+        if dead:
+            folded = _empty()
+            if archive:
+                _merge(folded, archive)
+            for name, snapshot in dead:
+                _merge(folded, snapshot, include_gauges=False)
+            archive = _as_snapshot(folded)
+            temporary = archive_path + '.tmp'
+            with open(temporary, 'w') as f:
+                json.dump(archive, f)
+            os.replace(temporary, archive_path)
+            for name, _ in dead:
+                os.remove(os.path.join(METRICS_DIR, name))
+        if archive:
+            _merge(total, archive)
+    return total
+
+def _label_text(name, labels):
+    names = LABEL_NAMES[name]
+    escaped = [str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels]
+    return ','.join(f'{label}="{value}"' for label, value in zip(names, escaped))
+
+def _series(name, label_text):
+    return f'{name}{{{label_text}}}' if label_text else name
+
+def render(total):
+    """Prometheus text exposition format 0.0.4"""
+    lines = []
+    for name, (kind, description) in HELP.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'histogram':
+            for (metric, labels), histogram in sorted(total['histograms'].items()):
+                if metric != name:
+                    continue
+                label_text = _label_text(name, labels)
+                cumulative = 0
+                for bound, count in zip(histogram['buckets'], histogram['counts']):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{label_text},le="+Inf"}} {histogram["count"]}')
+                lines.append(f'{_series(name + "_sum", label_text)} {histogram["sum"]}')
+                lines.append(f'{_series(name + "_count", label_text)} {histogram["count"]}')
+        else:
+            source = total['counters'] if kind == 'counter' else total['gauges']
+            for (metric, labels), value in sorted(source.items()):
+                if metric == name:
+                    lines.append(f'{_series(name, _label_text(name, labels))} {value}')
+    return '\n'.join(lines) + '\n'
+
+LABEL_NAMES = {
+    'http_requests_total': ('route', 'method', 'status'),
+    'http_request_duration_seconds': ('route', 'method'),
+    'http_requests_in_flight': (),
+    'db_query_duration_seconds': ('query',),
+    'upstream_request_duration_seconds': ('service', 'endpoint', 'status'),
+    'upstream_errors_total': ('service', 'endpoint'),
+    'upstream_cache_total': ('service', 'endpoint', 'result'),
+    'upstream_rejected_total': ('service', 'reason'),
+}
+
+# --- HTTP middleware --------------------------------------------------------
+
+def _route():
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+def start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_queries = [] if SLOW_REQUEST_MS else None
+    registry.add_gauge('http_requests_in_flight', (), 1)
+
+def finish_request(response):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    route, method = _route(), request.method
+    registry.add_gauge('http_requests_in_flight', (), -1)
+    registry.inc('http_requests_total', (route, method, str(response.status_code)))
+    registry.observe('http_request_duration_seconds', (route, method), elapsed, LATENCY_BUCKETS)
+    queries = g.pop('metrics_queries', None)
+    if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+        log_slow_request(route, method, elapsed, response.status_code, queries or [])
+    registry.flush()
+    return response
+
+def init_app(app):
+    app.before_request(start_request)
+    app.after_request(finish_request)
+
+    @app.teardown_request
+    def _unfinished(exc=None):
+        # after_request never ran (an unhandled exception): still close out the request
+        if g.pop('metrics_started', None) is not None:
+            registry.add_gauge('http_requests_in_flight', (), -1)
+            registry.inc('http_requests_total', (_route(), request.method, '500'))
+
+# --- SQL timing -------------------------------------------------------------
+
+@lru_cache(maxsize=1024)
+def normalize_query(sql):
+    """Collapse literals, IN-lists and whitespace so one query shape is one label"""
+    text = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    text = re.sub(r'\b\d+(?:\.\d+)?\b', '?', text)
+    text = re.sub(r'\(\s*\?(?:\s*,\s*\?)+\s*\)', '(?, ...)', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text[:200]
+
+def _record_query(sql, parameters, elapsed):
+    registry.observe('db_query_duration_seconds', (normalize_query(sql),), elapsed, QUERY_BUCKETS)
+    try:
+        queries = g.get('metrics_queries')
+    except RuntimeError:
+        # Outside a request (migrations, CLI scripts)
+        return
+    if queries is not None:
+        queries.append((sql, parameters, elapsed))
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection factory that times execute()/executemany() by normalized statement"""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record_query(sql, parameters, time.perf_counter() - started)
+
+    def executemany(self, sql, parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, parameters)
+        finally:
+            _record_query(sql, None, time.perf_counter() - started)
+
+def log_slow_request(route, method, elapsed, status, queries):
+    """Print the request with its slowest queries and their EXPLAIN QUERY PLAN"""
+    from database import get_db
+    conn = get_db()
+    slowest = sorted(queries, key=lambda query: query[2], reverse=True)[:SLOW_LOG_QUERIES]
+    entries = []
+    for sql, parameters, seconds in slowest:
+        entry = {'query': normalize_query(sql), 'ms': round(seconds * 1000, 3)}
+        if parameters is not None and sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            try:
+                plan = sqlite3.Connection.execute(conn, f'EXPLAIN QUERY PLAN {sql}', parameters).fetchall()
+                entry['plan'] = [row[3] for row in plan]
+            except sqlite3.Error as e:
+                entry['plan_error'] = str(e)
+        entries.append(entry)
+    print('⚠️ Slow request ' + json.dumps({
+        'route': route, 'method': method, 'status': status, 'ms': round(elapsed * 1000, 2),
+        'queries': len(queries), 'sql_ms': round(sum(query[2] for query in queries) * 1000, 2),
+        'slowest': entries,
+    }))
+
+# --- outbound HTTP ----------------------------------------------------------
+
+def _endpoint(url):
+    # Keep URL shapes, not ids: /v2/checkout/orders/5O190127TN364715T/capture -> .../:id/capture
+    segments = urlsplit(url).path.rstrip('/').split('/')
+    return '/'.join(':id' if re.search(r'\d', segment) and len(segment) >= 8 else segment
+                    for segment in segments) or '/'
+
+def instrument_session(session, service):
+    """Time every call made through a requests.Session, labelled by service and endpoint"""
+    def on_response(response, *args, **kwargs):
+        registry.observe('upstream_request_duration_seconds',
+                         (service, _endpoint(response.request.url), str(response.status_code)),
+                         response.elapsed.total_seconds(), LATENCY_BUCKETS)
+    session.hooks['response'].append(on_response)
+
+    send = session.send
+    def timed_send(prepared, **kwargs):
+        # Hooks only see responses; count the calls that never got one
+        try:
+            return send(prepared, **kwargs)
+        except Exception:
+            registry.inc('upstream_errors_total', (service, _endpoint(prepared.url)))
+            raise
+    session.send = timed_send
+    return session
+
+def instrument_cache(cache, service):
+    """Count a cj_cache.ResponseCache's lookups, labelled by service, endpoint and result"""
+    # registry is looked up per call: a forked worker gets a fresh one
+    cache.listeners.append(lambda endpoint, result: registry.inc('upstream_cache_total', (service, endpoint, result)))
+    return cache
+
+def instrument_guard(guard, service):
+    """Count the calls a resilience.UpstreamGuard turns away, by reason"""
+    guard.listeners.append(lambda reason: registry.inc('upstream_rejected_total', (service, reason)))
+    return guard
@@ -0,0 +1,197 @@
+import sqlite3
+
+from catalog_cache import CATALOG_VERSION_SCHEMA
+from catalog import CATALOG_INDEXES
+from search import SEARCH_SCHEMA
+from orders import ORDER_ITEMS_SCHEMA, ORDER_HISTORY_INDEX, backfill_order_items
+from facets import CATEGORY_STATS_SCHEMA, rebuild_category_stats
+from analytics import SALES_ROLLUP_SCHEMA, ORDER_ITEM_CATEGORY_SCHEMA, aggregate_days, backfill_line_categories
+from categorizer import CATEGORY_RULES_SCHEMA, seed_rules, upgrade_legacy_rules
+from cj_refresh import PRODUCT_REFRESH_SCHEMA
+from cj_sync import CJ_SYNC_RUNS_SCHEMA
+
+# The one definition of the schema. Each migration runs once, in order, and
+# PRAGMA user_version records the last one applied, so a worker booting
+# against a current database does a single pragma read and nothing else.
+# Migrations must be idempotent: the first one also adopts databases built
+# by the old app.init_db / database.init_db / init_db.py code paths.
+
+BASELINE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS products (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        description TEXT,
+        price REAL NOT NULL,
+        category TEXT,
+        image TEXT,
+        in_stock INTEGER DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        content_hash TEXT
+    );
+    CREATE TABLE IF NOT EXISTS orders (
+        id TEXT PRIMARY KEY,
+        customer_name TEXT NOT NULL,
+        customer_email TEXT NOT NULL,
+        customer_phone TEXT,
+        shipping_address TEXT,
+        shipping_city TEXT,
+        shipping_country TEXT,
+        items TEXT NOT NULL,
+        subtotal REAL NOT NULL,
+        shipping_cost REAL NOT NULL,
+        total REAL NOT NULL,
+        status TEXT DEFAULT 'pending',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS uploads (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_name TEXT NOT NULL,
+        description TEXT,
+        price REAL NOT NULL,
+        category TEXT,
+        seller_name TEXT NOT NULL,
+        seller_email TEXT NOT NULL,
+        status TEXT DEFAULT 'pending',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+'''
+
+HOT_PATH_INDEXES = '''
+    CREATE INDEX IF NOT EXISTS idx_products_category_stock ON products(category, in_stock);
+    CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders(customer_email, created_at);
+    CREATE INDEX IF NOT EXISTS idx_uploads_status ON uploads(status, id);
+'''
+
+def run_script(conn, script):
+    """executescript() commits first; run statements one by one to stay inside the migration transaction"""
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ''
+    if statement.strip():
+        conn.execute(statement)
+
+def add_missing_columns(conn, table, columns):
+    existing = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+    for name, definition in columns:
+        if name not in existing:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+
+def baseline(conn):
+    run_script(conn, BASELINE_SCHEMA)
+    # Older app.init_db tables lacked these; ALTER TABLE cannot add a
+    # CURRENT_TIMESTAMP default, so backfill the timestamps instead
+    add_missing_columns(conn, 'products', [('created_at', 'TIMESTAMP'), ('content_hash', 'TEXT')])
+    add_missing_columns(conn, 'uploads', [('created_at', 'TIMESTAMP')])
+    conn.execute('UPDATE products SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL')
+    conn.execute('UPDATE uploads SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL')
+
+def catalog_version(conn):
+    run_script(conn, CATALOG_VERSION_SCHEMA)
+
+def listing_indexes(conn):
+    run_script(conn, CATALOG_INDEXES)
+
+def search_index(conn):
+    run_script(conn, SEARCH_SCHEMA)
+    conn.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+
+def order_items(conn):
+    run_script(conn, ORDER_ITEMS_SCHEMA)
+    backfill_order_items(conn)
+
+def hot_path_indexes(conn):
+    run_script(conn, HOT_PATH_INDEXES)
+
+def category_stats(conn):
+    run_script(conn, CATEGORY_STATS_SCHEMA)
+    rebuild_category_stats(conn)
+
+def order_history_index(conn):
+    run_script(conn, ORDER_HISTORY_INDEX)
+
+def order_item_categories(conn):
+    add_missing_columns(conn, 'order_items', [('category', 'TEXT')])
+    run_script(conn, ORDER_ITEM_CATEGORY_SCHEMA)
+    backfill_line_categories(conn)
+
+def sales_rollup(conn):
+    # The rollup triggers read order_items.category
+    order_item_categories(conn)
+    run_script(conn, SALES_ROLLUP_SCHEMA)
+    aggregate_days(conn)
+
+def category_rules(conn):
+    run_script(conn, CATEGORY_RULES_SCHEMA)
+    seed_rules(conn)
+
+def product_refresh(conn):
+    run_script(conn, PRODUCT_REFRESH_SCHEMA)
+
+def cj_sync_runs(conn):
+    run_script(conn, CJ_SYNC_RUNS_SCHEMA)
+
+def legacy_category_rules(conn):
+    upgrade_legacy_rules(conn)
+
+def sales_rollup_line_categories(conn):
+    # Lines ordered before this get their product's current category, and
+    # the rollup is re-derived from those so both triggers start out agreeing
+    order_item_categories(conn)
+    conn.execute('DROP TRIGGER IF EXISTS sales_rollup_item_ai')
+    conn.execute('DROP TRIGGER IF EXISTS sales_rollup_status_au')
+    run_script(conn, SALES_ROLLUP_SCHEMA)
+    aggregate_days(conn)
+
+MIGRATIONS = [
+    (1, 'baseline products/orders/uploads schema', baseline),
+    (2, 'catalog version counter and triggers', catalog_version),
+    (3, 'keyset listing indexes', listing_indexes),
+    (4, 'FTS5 product search index', search_index),
+    (5, 'order_items table and backfill', order_items),
+    (6, 'hot-path indexes for category, customer and upload queries', hot_path_indexes),
+    (7, 'category_stats facets table and triggers', category_stats),
+    (8, 'covering index for customer order history', order_history_index),
+    (9, 'sales_daily rollup table and triggers', sales_rollup),
+    (10, 'category_rules table seeded with the built-in keywords', category_rules),
+    (11, 'product_refresh timestamps for the CJ price/stock refresher', product_refresh),
+    (12, 'cj_sync_runs queue for catalog syncs run outside requests', cj_sync_runs),
+    (13, 'built-in category rules match as substrings, first category wins', legacy_category_rules),
+    (14, 'order_items.category snapshot used by the sales rollup triggers', sales_rollup_line_categories),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def migrate(conn):
+    """Apply pending migrations; returns how many ran (0 when already current)"""
+    if schema_version(conn) >= LATEST_VERSION:
+        return 0
+
+    # BEGIN IMMEDIATE takes SQLite's write lock, so when several workers boot
+    # at once one migrates and the rest wait (for a long backfill, if need be)
+    # and then find nothing left to do
+    busy_timeout = conn.execute('PRAGMA busy_timeout').fetchone()[0]
+    conn.execute('PRAGMA busy_timeout = 300000')
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+    finally:
+        conn.execute(f'PRAGMA busy_timeout = {busy_timeout}')
+    try:
+        current = schema_version(conn)
+        applied = 0
+        for version, description, apply in MIGRATIONS:
+            if version > current:
+                apply(conn)
+                conn.execute(f'PRAGMA user_version = {version}')
+                print(f"✅ Applied migration {version}: {description}")
+                applied += 1
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return applied
@@ -0,0 +1,61 @@
+// order-summary.js - Order details and recent order history for the confirmation pages
+
+// Fill container with the order's lines and the customer's recent orders.
+// orderId may be a payment reference that isn't one of our orders, or one
+// this browser didn't place; then the container is left as it is.
+async function renderOrderSummary(orderId, container) {
+  if (!orderId || !container) return;
+  // The API only shows an order to whoever knows the email it was placed with
+  const email = checkoutEmail(orderId);
+  if (!email) return;
+  try {
+    const res = await fetch(`/api/orders/${encodeURIComponent(orderId)}?${new URLSearchParams({ email })}`);
+    if (!res.ok) return;
+    const order = await res.json();
+
+    const lines = order.items.map(item => `
+      <div class="summary-row">
+        <span>${escapeOrderHtml(item.name || item.id)} × ${item.quantity}</span>
+        <span>$${(item.price * item.quantity).toFixed(2)}</span>
+      </div>`).join('');
+    container.innerHTML = `
+      <h3>Order ${escapeOrderHtml(order.id)} · ${escapeOrderHtml(order.status)}</h3>
+      ${lines}
+      <div class="summary-row"><span>Shipping</span><span>$${order.shipping_cost.toFixed(2)}</span></div>
+      <div class="summary-row total"><span>Total</span><span>$${order.total.toFixed(2)}</span></div>`;
+
+    // One summary page is enough here; the order id proves the email is the shopper's
+    const params = new URLSearchParams({ email, order: order.id, limit: 5 });
+    const historyRes = await fetch(`/api/orders?${params}`);
+    if (!historyRes.ok) return;
+    const history = await historyRes.json();
+    const earlier = history.items.filter(summary => summary.id !== order.id);
+    if (!earlier.length) return;
+    container.insertAdjacentHTML('beforeend', `
+      <h3>Your recent orders</h3>
+      ${earlier.map(summary => `
+        <div class="summary-row">
+          <span>${escapeOrderHtml(summary.id)} · ${escapeOrderHtml(summary.created_at.slice(0, 10))} · ${summary.item_count} items</span>
+          <span>$${summary.total.toFixed(2)} · ${escapeOrderHtml(summary.status)}</span>
+        </div>`).join('')}`);
+  } catch (error) {
+    console.error('Error loading order:', error);
+  }
+}
+
+// The email this browser checked out with for orderId (payment.html keeps it in all_orders)
+function checkoutEmail(orderId) {
+  try {
+    const orders = JSON.parse(localStorage.getItem('all_orders') || '[]');
+    const order = orders.find(saved => saved.orderId === orderId);
+    return order && order.shipping ? order.shipping.email : null;
+  } catch (error) {
+    return null;
+  }
+}
+
+function escapeOrderHtml(text) {
+  const div = document.createElement('div');
+  div.textContent = text == null ? '' : String(text);
+  return div.innerHTML;
+}
@@ -0,0 +1,213 @@
+import json
+
+from catalog import encode_cursor, decode_cursor
+
+# Order lines live in order_items so per-product and per-order queries are
+# index scans instead of json.loads over every orders row.
+ORDER_ITEMS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS order_items (
+        order_id TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        qty INTEGER NOT NULL,
+        unit_price REAL NOT NULL,
+        PRIMARY KEY (order_id, product_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_order_items_product ON order_items(product_id, order_id);
+'''
+
+# Order history walks one customer's orders newest first. Carrying id,
+# status and total in the index answers a history page from the index alone;
+# item counts are PRIMARY KEY seeks into order_items.
+ORDER_HISTORY_INDEX = '''
+    DROP INDEX IF EXISTS idx_orders_customer;
+    CREATE INDEX IF NOT EXISTS idx_orders_customer_history
+        ON orders(customer_email, created_at, id, status, total);
+'''
+
+SHIPPING_COST = 12.00
+MAX_LINES = 50
+MAX_QTY = 99
+
+class OrderError(ValueError):
+    pass
+
+def _parse_quantity(value):
+    """A positive whole quantity; 1.7 or true is rejected rather than coerced by int()"""
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise OrderError('Invalid quantity')
+    try:
+        qty = int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise OrderError('Invalid quantity')
+    if qty < 1:
+        raise OrderError('Invalid quantity')
+    return qty
+
+def _line_quantities(items):
+    """Merge cart items into {product_id: qty}, rejecting malformed lines"""
+    quantities = {}
+    for item in items:
+        if not isinstance(item, dict) or not item.get('id'):
+            raise OrderError('Invalid items')
+        qty = _parse_quantity(item.get('quantity', item.get('qty', 1)))
+        product_id = str(item['id'])
+        quantities[product_id] = quantities.get(product_id, 0) + qty
+    if not quantities or len(quantities) > MAX_LINES:
+        raise OrderError('Invalid items')
+    if any(qty > MAX_QTY for qty in quantities.values()):
+        raise OrderError(f'At most {MAX_QTY} of each product per order')
+    return quantities
+
+def price_items(conn, items):
+    """Price a cart from the products table in one IN (...) lookup; returns (lines, subtotal)"""
+    quantities = _line_quantities(items)
+    ids = list(quantities)
+    placeholders = ','.join('?' * len(ids))
+    rows = conn.execute(
+        f'SELECT id, name, price, in_stock FROM products WHERE id IN ({placeholders})', ids
+    ).fetchall()
+    products = {row['id']: row for row in rows}
+
+    unavailable = [product_id for product_id in ids
+                   if product_id not in products or not products[product_id]['in_stock']]
+    if unavailable:
+        raise OrderError(f'Unavailable products: {", ".join(unavailable)}')
+
+    lines = [{
+        'id': product_id,
+        'name': products[product_id]['name'],
+        'quantity': quantities[product_id],
+        'price': products[product_id]['price'],
+    } for product_id in ids]
+    subtotal = round(sum(line['price'] * line['quantity'] for line in lines), 2)
+    return lines, subtotal
+
+def insert_order(conn, order_id, customer, items):
+    """Price items server-side and write the order header and lines in one transaction"""
+    lines, subtotal = price_items(conn, items)
+    total = round(subtotal + SHIPPING_COST, 2)
+    with conn:
+        conn.execute('''
+            INSERT INTO orders (id, customer_name, customer_email, customer_phone,
+                              shipping_address, shipping_city, shipping_country,
+                              items, subtotal, shipping_cost, total, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            order_id,
+            customer['name'],
+            customer['email'],
+            customer['phone'],
+            customer['address'],
+            customer['city'],
+            customer['country'],
+            json.dumps(lines),
+            subtotal,
+            SHIPPING_COST,
+            total,
+            'pending'
+        ))
+        conn.executemany(
+            'INSERT INTO order_items (order_id, product_id, qty, unit_price) VALUES (?, ?, ?, ?)',
+            [(order_id, line['id'], line['quantity'], line['price']) for line in lines]
+        )
+    return {'subtotal': subtotal, 'shipping_cost': SHIPPING_COST, 'total': total, 'items': lines}
+
+HISTORY_PAGE_SIZE = 20
+MAX_HISTORY_PAGE_SIZE = 50
+# Scope of history cursors, so a catalog cursor is refused here
+HISTORY_CURSOR = 'orders:created_at:desc'
+
+def customer_orders(conn, email, cursor=None, limit=HISTORY_PAGE_SIZE):
+    """Return one page of an email's order summaries, newest first, plus the cursor for the next page"""
+    limit = max(1, min(int(limit), MAX_HISTORY_PAGE_SIZE))
+    where = ['customer_email = ?']
+    params = [email]
+    if cursor:
+        created_at, last_id = decode_cursor(cursor, HISTORY_CURSOR)
+        where.append('(created_at, id) < (?, ?)')
+        params.extend([created_at, last_id])
+    rows = conn.execute(f'''
+        SELECT id, created_at, status, total,
+               (SELECT COALESCE(SUM(qty), 0) FROM order_items WHERE order_id = orders.id) AS item_count
+        FROM orders
+        WHERE {' AND '.join(where)}
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+    ''', params + [limit + 1]).fetchall()
+    has_more = len(rows) > limit
+    items = [dict(row) for row in rows[:limit]]
+    next_cursor = encode_cursor(items[-1]['created_at'], items[-1]['id'], HISTORY_CURSOR) if has_more else None
+    return {'items': items, 'next_cursor': next_cursor, 'has_more': has_more}
+
+# What an order lookup returns: enough for a confirmation page, without the
+# shopper's email, phone or street address
+ORDER_DETAIL_FIELDS = ('id', 'status', 'created_at', 'customer_name', 'shipping_city', 'shipping_country',
+                       'items', 'subtotal', 'shipping_cost', 'total')
+
+def order_detail(conn, order_id, email=None):
+    """One order with its lines decoded from the stored items JSON, or None
+
+    With email, None too unless the order was placed with that email.
+    """
+    sql = f"SELECT {', '.join(ORDER_DETAIL_FIELDS)} FROM orders WHERE id = ?"
+    params = [order_id]
+    if email is not None:
+        sql += ' AND customer_email = ?'
+        params.append(email)
+    row = conn.execute(sql, params).fetchone()
+    if row is None:
+        return None
+    order = dict(row)
+    try:
+        items = json.loads(order['items'] or '[]')
+    except ValueError:
+        items = []
+    # Lines as priced at checkout; legacy rows without usable JSON fall back to order_items
+    if not isinstance(items, list) or not items:
+        items = [{'id': line['product_id'], 'quantity': line['qty'], 'price': line['unit_price']}
+                 for line in conn.execute('SELECT product_id, qty, unit_price FROM order_items WHERE order_id = ?',
+                                          (order_id,))]
+    order['items'] = items
+    order['item_count'] = sum(int(item.get('quantity', 1)) for item in items if isinstance(item, dict))
+    return order
+
+def backfill_order_items(conn, batch_size=1000):
+    """Copy lines out of legacy orders.items JSON into order_items (caller commits)"""
+    migrated = 0
+    last_id = ''
+    while True:
+        # Walk orders in primary-key batches so no read cursor spans our writes
+        batch = conn.execute('''
+            SELECT id, items FROM orders
+            WHERE id > ? AND NOT EXISTS (SELECT 1 FROM order_items WHERE order_items.order_id = orders.id)
+            ORDER BY id LIMIT ?
+        ''', (last_id, batch_size)).fetchall()
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        rows = []
+        for order_id, items_json in batch:
+            try:
+                items = json.loads(items_json or '[]')
+            except ValueError:
+                continue
+            merged = {}
+            for item in items if isinstance(items, list) else []:
+                if not isinstance(item, dict) or not item.get('id'):
+                    continue
+                try:
+                    qty = int(item.get('quantity', item.get('qty', 1)))
+                    price = float(item.get('price', 0))
+                except (TypeError, ValueError):
+                    continue
+                line = merged.setdefault(str(item['id']), [0, price])
+                line[0] += qty
+            rows.extend((order_id, product_id, qty, price) for product_id, (qty, price) in merged.items())
+        conn.executemany(
+            'INSERT OR IGNORE INTO order_items (order_id, product_id, qty, unit_price) VALUES (?, ?, ?, ?)',
+            rows
+        )
+        migrated += len(batch)
+    if migrated:
+        print(f"✅ Backfilled order_items for {migrated} orders")
+    return migrated
@@ -0,0 +1,116 @@
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from resilience import UpstreamGuard
+
+# Threads per gunicorn worker; deploy.sh passes the same value to --threads
+WEB_THREADS = int(os.environ.get('WEB_THREADS', 8))
+
+class PayPalError(Exception):
+    pass
+
+class PayPalClient:
+    """PayPal REST client with a cached OAuth token and a pooled session"""
+
+    # Refresh this many seconds before PayPal's expires_in runs out
+    TOKEN_MARGIN = 60
+
+    def __init__(self):
+        self.client_id = os.environ.get('PAYPAL_CLIENT_ID', '')
+        self.secret = os.environ.get('PAYPAL_CLIENT_SECRET', '')
+        self.base_url = os.environ.get('PAYPAL_BASE_URL', 'https://api-m.sandbox.paypal.com')
+        # (connect, read): checkout must fail fast rather than hang a worker
+        self.timeout = (float(os.environ.get('PAYPAL_CONNECT_TIMEOUT', 3.05)),
+                        float(os.environ.get('PAYPAL_READ_TIMEOUT', 10)))
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=16))
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=16))
+        # At most half of the worker's threads (WEB_THREADS, gunicorn --threads)
+        # wait on PayPal, so even a slow PayPal leaves the rest serving the
+        # catalog; while PayPal is fast a burst queues up to PAYPAL_QUEUE_WAIT for
+        # a slot, behind slow calls it gets a 503 at once.
+        # Failures, and calls close to the read timeout, open the breaker
+        self.guard = UpstreamGuard('PayPal', int(os.environ.get('PAYPAL_MAX_CONCURRENT',
+                                                                max(1, WEB_THREADS // 2))),
+                                   wait=float(os.environ.get('PAYPAL_QUEUE_WAIT', 1.5)),
+                                   failure_threshold=5, reset_after=30,
+                                   slow_after=float(os.environ.get('PAYPAL_SLOW_CALL', 0.8 * self.timeout[1])))
+        self._token = None
+        self._token_expiry = 0.0
+        self._token_lock = threading.Lock()
+
+    @property
+    def configured(self):
+        return bool(self.client_id and self.secret)
+
+    def _access_token(self):
+        if self._token and time.monotonic() < self._token_expiry:
+            return self._token
+        with self._token_lock:
+            # Another thread may have fetched it while we waited
+            if self._token and time.monotonic() < self._token_expiry:
+                return self._token
+            response = self.guard.call(
+                self.session.post,
+                f'{self.base_url}/v1/oauth2/token',
+                auth=(self.client_id, self.secret),
+                data={'grant_type': 'client_credentials'},
+                headers={'Content-Type': 'application/x-www-form-urlencoded'},
+                timeout=self.timeout
+            )
+            if not response.ok:
+                raise PayPalError('PayPal authentication failed')
+            data = response.json()
+            self._token = data['access_token']
+            self._token_expiry = time.monotonic() + max(0, int(data.get('expires_in', 0)) - self.TOKEN_MARGIN)
+            return self._token
+
+    def invalidate_token(self):
+        with self._token_lock:
+            self._token = None
+            self._token_expiry = 0.0
+
+    def _post(self, path, json=None, count_slow=True):
+        for attempt in range(2):
+            response = self.guard.call(
+                self.session.post,
+                f'{self.base_url}{path}',
+                count_slow=count_slow,
+                headers={
+                    'Content-Type': 'application/json',
+                    'Authorization': f'Bearer {self._access_token()}'
+                },
+                json=json,
+                timeout=self.timeout
+            )
+            # A revoked or expired cached token gets one fresh retry
+            if response.status_code == 401 and attempt == 0:
+                self.invalidate_token()
+                continue
+            return response
+
+    def create_order(self, amount, currency='USD'):
+        """Create a CAPTURE-intent order and return its PayPal id"""
+        response = self._post('/v2/checkout/orders', json={
+            'intent': 'CAPTURE',
+            'purchase_units': [{
+                'amount': {
+                    'currency_code': currency,
+                    'value': f'{float(amount):.2f}'
+                }
+            }]
+        })
+        if not response.ok:
+            raise PayPalError('Failed to create PayPal order')
+        return response.json()['id']
+
+    def capture_order(self, order_id):
+        """Capture an approved order and return PayPal's response body"""
+        # The shopper has already approved this payment: a slow but successful
+        # capture must not push the breaker towards refusing the next one
+        response = self._post(f'/v2/checkout/orders/{order_id}/capture', count_slow=False)
+        if not response.ok:
+            raise PayPalError('Failed to capture payment')
+        return response.json()
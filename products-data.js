@@ -4,39 +4,32 @@ document.addEventListener('DOMContentLoaded', () => {
   const productsGrid = document.getElementById('products-grid');
   const filterBtns = document.querySelectorAll('.filter-btn');
 
-  let allProducts = [];
+  const PAGE_SIZE = 24;
+  // Only what a product card shows; the API trims everything else
+  const CARD_FIELDS = 'id,name,description,price,image';
   let currentCategory = new URLSearchParams(window.location.search).get('category') || '';
-
-  // Fetch products from API
-  fetch('/api/products')
-    .then(response => {
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-      return response.json();
-    })
-    .then(products => {
-      console.log('Products loaded:', products.length);
-      allProducts = products;
-
-      // Auto-select category from URL
-      if (currentCategory) {
-        filterBtns.forEach(btn => {
-          btn.classList.toggle('active', btn.dataset.category === currentCategory);
-        });
-      }
-
-      renderProducts(currentCategory);
-      updateCartCount();
-    })
-    .catch(error => {
-      console.error('Error loading products:', error);
-      productsGrid.innerHTML = `
-        <p style="grid-column: 1 / -1; text-align: center; padding: 60px 20px; color: #ff6b9d; font-size: 1.1rem;">
-          ⚠️ Unable to load products. Error: ${error.message}<br>
-          Please make sure the server is running and try refreshing the page.
-        </p>`;
+  let nextCursor = null;
+  let loading = false;
+
+  // "Load more" button below the grid; pages come from /api/products?limit=...
+  const loadMoreBtn = document.createElement('button');
+  loadMoreBtn.className = 'filter-btn load-more-btn';
+  loadMoreBtn.textContent = 'Load more';
+  loadMoreBtn.style.display = 'none';
+  loadMoreBtn.style.margin = '30px auto';
+  loadMoreBtn.addEventListener('click', () => loadProducts(false));
+  productsGrid.insertAdjacentElement('afterend', loadMoreBtn);
+
+  // Auto-select category from URL
+  if (currentCategory) {
+    filterBtns.forEach(btn => {
+      btn.classList.toggle('active', btn.dataset.category === currentCategory);
     });
+  }
+
+  loadProducts(true);
+  loadFacets();
+  updateCartCount();
 
   // Filter buttons
   filterBtns.forEach(btn => {
@@ -44,7 +37,7 @@ document.addEventListener('DOMContentLoaded', () => {
       filterBtns.forEach(b => b.classList.remove('active'));
       btn.classList.add('active');
       currentCategory = btn.dataset.category;
-      renderProducts(currentCategory);
+      loadProducts(true);
 
       // Update URL without page reload
       const url = new URL(window.location);
@@ -57,14 +50,69 @@ document.addEventListener('DOMContentLoaded', () => {
     });
   });
 
-  function renderProducts(category) {
-    productsGrid.innerHTML = '';
+  // In-stock counts on the filter buttons, from one cached /api/facets call
+  function loadFacets() {
+    fetch('/api/facets')
+      .then(res => res.ok ? res.json() : Promise.reject(res.status))
+      .then(facets => {
+        const counts = {};
+        facets.categories.forEach(c => { counts[c.category] = c.count; });
+        filterBtns.forEach(btn => {
+          const category = btn.dataset.category;
+          const count = category ? (counts[category] || 0) : facets.total;
+          btn.textContent = `${btn.textContent.replace(/ \(\d+\)$/, '')} (${count})`;
+          btn.disabled = count === 0 && btn !== document.querySelector('.filter-btn.active');
+          btn.style.opacity = count === 0 ? '0.5' : '';
+        });
+      })
+      .catch(() => {});  // Buttons still work without counts
+  }
 
-    const filtered = category 
-      ? allProducts.filter(p => p.category === category) 
-      : allProducts;
+  // Fetch one page of products; reset starts over for a new category
+  function loadProducts(reset) {
+    if (loading && !reset) return;
+    loading = true;
+
+    if (reset) nextCursor = null;
+    const params = new URLSearchParams({ limit: PAGE_SIZE, fields: CARD_FIELDS });
+    if (currentCategory) params.set('category', currentCategory);
+    if (nextCursor) params.set('cursor', nextCursor);
+    const requestedCategory = currentCategory;
+
+    loadMoreBtn.disabled = true;
+    fetch(`/api/products?${params}`)
+      .then(response => {
+        if (!response.ok) {
+          throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+      })
+      .then(page => {
+        // Ignore a page that arrived after the shopper switched category
+        if (requestedCategory !== currentCategory) return;
+        console.log('Products loaded:', page.items.length);
+        if (reset) productsGrid.innerHTML = '';
+        renderProducts(page.items, reset);
+        nextCursor = page.next_cursor;
+        loadMoreBtn.style.display = page.has_more ? 'block' : 'none';
+      })
+      .catch(error => {
+        console.error('Error loading products:', error);
+        productsGrid.innerHTML = `
+          <p style="grid-column: 1 / -1; text-align: center; padding: 60px 20px; color: #ff6b9d; font-size: 1.1rem;">
+            ⚠️ Unable to load products. Error: ${error.message}<br>
+            Please make sure the server is running and try refreshing the page.
+          </p>`;
+        loadMoreBtn.style.display = 'none';
+      })
+      .finally(() => {
+        loading = false;
+        loadMoreBtn.disabled = false;
+      });
+  }
 
-    if (filtered.length === 0) {
+  function renderProducts(products, reset) {
+    if (reset && products.length === 0) {
       productsGrid.innerHTML = `
         <p style="grid-column: 1 / -1; text-align: center; padding: 80px 20px; color: #999; font-size: 1.2rem;">
           No products found in this category.
@@ -72,12 +120,12 @@ document.addEventListener('DOMContentLoaded', () => {
       return;
     }
 
-    filtered.forEach(product => {
+    products.forEach(product => {
       const card = document.createElement('div');
       card.className = 'product-card';
       card.innerHTML = `
-        <img src="${product.image || 'https://via.placeholder.com/300x300?text=Baby+Product'}" 
-             alt="${product.name}" 
+        <img src="${product.image ? `/img/${encodeURIComponent(product.id)}/md` : 'https://via.placeholder.com/300x300?text=Baby+Product'}" 
+             alt="${escapeHtml(product.name)}" 
              loading="lazy"
              onerror="this.src='https://via.placeholder.com/300x300?text=No+Image'; this.onerror=null;">
         <h3>${escapeHtml(product.name)}</h3>
@@ -92,49 +140,45 @@ document.addEventListener('DOMContentLoaded', () => {
         </button>
       `;
       productsGrid.appendChild(card);
+      attachAddToCartListener(card.querySelector('.add-to-cart-btn'));
     });
-
-    // Re-attach Add to Cart listeners
-    attachAddToCartListeners();
   }
 
-  function attachAddToCartListeners() {
-    document.querySelectorAll('.add-to-cart-btn').forEach(btn => {
-      btn.addEventListener('click', (e) => {
-        e.preventDefault();
-
-        let cart = JSON.parse(localStorage.getItem('babyzion_cart') || '[]');
-        const productData = {
-          id: btn.dataset.id,
-          name: btn.dataset.name,
-          price: parseFloat(btn.dataset.price),
-          image: btn.dataset.image,
-          quantity: 1
-        };
-
-        const existing = cart.find(item => item.id === productData.id);
-        if (existing) {
-          existing.quantity += 1;
-        } else {
-          cart.push(productData);
-        }
+  function attachAddToCartListener(btn) {
+    btn.addEventListener('click', (e) => {
+      e.preventDefault();
+
+      let cart = JSON.parse(localStorage.getItem('babyzion_cart') || '[]');
+      const productData = {
+        id: btn.dataset.id,
+        name: btn.dataset.name,
+        price: parseFloat(btn.dataset.price),
+        image: btn.dataset.image,
+        quantity: 1
+      };
+
+      const existing = cart.find(item => item.id === productData.id);
+      if (existing) {
+        existing.quantity += 1;
+      } else {
+        cart.push(productData);
+      }
 
-        localStorage.setItem('babyzion_cart', JSON.stringify(cart));
-        updateCartCount();
-
-        // Success feedback
-        const originalText = btn.textContent;
-        const originalBg = btn.style.background;
-        btn.textContent = 'Added!';
-        btn.style.background = '#28a745';
-        btn.disabled = true;
-
-        setTimeout(() => {
-          btn.textContent = originalText;
-          btn.style.background = originalBg;
-          btn.disabled = false;
-        }, 2000);
-      });
+      localStorage.setItem('babyzion_cart', JSON.stringify(cart));
+      updateCartCount();
+
+      // Success feedback
+      const originalText = btn.textContent;
+      const originalBg = btn.style.background;
+      btn.textContent = 'Added!';
+      btn.style.background = '#28a745';
+      btn.disabled = true;
+
+      setTimeout(() => {
+        btn.textContent = originalText;
+        btn.style.background = originalBg;
+        btn.disabled = false;
+      }, 2000);
     });
   }
 
@@ -158,6 +202,6 @@ document.addEventListener('DOMContentLoaded', () => {
   window.addEventListener('popstate', () => {
     currentCategory = new URLSearchParams(window.location.search).get('category') || '';
     filterBtns.forEach(btn => btn.classList.toggle('active', btn.dataset.category === currentCategory));
-    renderProducts(currentCategory);
+    loadProducts(true);
   });
 });
\ No newline at end of file
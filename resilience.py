@@ -0,0 +1,142 @@
+import time
+import threading
+
+# Circuit breakers and bulkheads for outbound calls (PayPal, CJ).
+#
+# A bulkhead caps how many of a worker's threads may be inside one upstream
+# at once, so a slow PayPal can hold at most that many threads and the rest
+# keep serving the catalog. A caller finding every slot taken waits up to
+# `wait` seconds for one, but only while slots are turning over faster than
+# that; behind slow calls it is turned away at once rather than parking
+# another thread.
+#
+# A circuit breaker counts consecutive failures (timeouts, connection
+# errors, 5xx, and optionally calls slower than slow_after seconds). After
+# failure_threshold of them it opens and every call fails at once for
+# reset_after seconds; then a single probe is let through, and its outcome
+# closes the circuit or opens it again.
+#
+# Both are per process: each gunicorn worker protects its own threads.
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+# Weight of the newest call in a bulkhead's moving average of slot hold time
+LATENCY_WEIGHT = 0.2
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of calling an upstream that is failing or saturated"""
+
+    def __init__(self, service, reason, retry_after=None):
+        super().__init__(f'{service} is {reason}')
+        self.service = service
+        self.reason = reason
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=5, reset_after=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise UpstreamUnavailable unless a call may go ahead now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            remaining = self.opened_at + self.reset_after - time.monotonic()
+            if self.state == OPEN and remaining > 0:
+                raise UpstreamUnavailable(self.name, 'unavailable', retry_after=remaining)
+            # Cool-down over: exactly one caller probes, the rest keep failing fast
+            if self._probing:
+                raise UpstreamUnavailable(self.name, 'unavailable', retry_after=1)
+            self.state = HALF_OPEN
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    print(f"⚠️ {self.name} circuit opened after {self.failures} failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+class Bulkhead:
+    def __init__(self, name, max_concurrent, wait=0.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.wait = wait
+        # Moving average of how long a call holds its slot
+        self.latency = 0.0
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        if not self._slots.acquire(blocking=False):
+            if self.latency >= self.wait or not self._slots.acquire(timeout=self.wait):
+                raise UpstreamUnavailable(self.name, 'busy', retry_after=1)
+        self._local.started = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        held = time.monotonic() - self._local.started
+        with self._lock:
+            self.latency += LATENCY_WEIGHT * (held - self.latency)
+        self._slots.release()
+
+class UpstreamGuard:
+    """A bulkhead and a circuit breaker around one upstream's HTTP calls"""
+
+    def __init__(self, name, max_concurrent, wait=0.0, failure_threshold=5, reset_after=30.0,
+                 slow_after=None):
+        self.name = name
+        self.slow_after = slow_after
+        self.bulkhead = Bulkhead(name, max_concurrent, wait)
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_after)
+        # Called with the rejection reason ('busy' or 'unavailable'); app.py feeds /metrics from it
+        self.listeners = []
+
+    def call(self, send, *args, count_slow=True, **kwargs):
+        """send(*args, **kwargs) -> requests.Response, unless the guard turns it away
+
+        Transport errors, 5xx responses and (when slow_after is set and
+        count_slow is true) responses that took longer than slow_after seconds
+        count against the breaker; a slow response is still returned. Any
+        other response, 4xx included, means the upstream is healthy.
+        """
+        try:
+            with self.bulkhead:
+                self.breaker.before_call()
+                started = time.monotonic()
+                try:
+                    response = send(*args, **kwargs)
+                except Exception:
+                    self.breaker.record_failure()
+                    raise
+        except UpstreamUnavailable as e:
+            for listener in self.listeners:
+                listener(e.reason)
+            raise
+        slow = count_slow and self.slow_after is not None and time.monotonic() - started > self.slow_after
+        if response.status_code >= 500 or slow:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def status(self):
+        return {'state': self.breaker.state, 'failures': self.breaker.failures,
+                'max_concurrent': self.bulkhead.max_concurrent,
+                'latency_seconds': round(self.bulkhead.latency, 3)}
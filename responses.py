@@ -0,0 +1,96 @@
+import os
+import gzip
+import json
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# JSON response layer: orjson when it is installed (the stdlib encoder
+# otherwise), and gzip/brotli for bodies big enough to be worth it. Cached
+# catalog bodies are compressed once per catalog version; everything else is
+# compressed on the way out by compress_response().
+
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+# Cached bodies are compressed once, so they can afford a slower, tighter setting
+CACHED_LEVELS = {'br': 9, 'gzip': 9}
+DYNAMIC_LEVELS = {'br': 4, 'gzip': 6}
+
+def dumps(obj):
+    """Serialize to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=DefaultJSONProvider.default)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False,
+                      default=DefaultJSONProvider.default).encode('utf-8')
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider so jsonify() goes through dumps() above"""
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=DefaultJSONProvider.default).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
+
+def compress(body, encoding, levels=DYNAMIC_LEVELS):
+    if encoding == 'br':
+        return brotli.compress(body, quality=levels['br'])
+    return gzip.compress(body, compresslevel=levels['gzip'], mtime=0)
+
+def negotiate_encoding(size):
+    """Pick br or gzip for a body of size bytes, or None to send it as-is"""
+    if size < COMPRESS_MIN_BYTES:
+        return None
+    accepted = request.accept_encodings
+    if brotli is not None and accepted.quality('br') > 0:
+        return 'br'
+    if accepted.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+def cached_variant(entry, encoding):
+    """Compressed copy of a CatalogCache entry, built on first use and kept with it"""
+    body = entry.variants.get(encoding)
+    if body is None:
+        body = compress(entry.body, encoding, CACHED_LEVELS)
+        entry.variants[encoding] = body
+    return body
+
+def compress_response(response):
+    """after_request hook: compress JSON bodies the view left uncompressed
+
+    A view's ETag describes the identity body, so a compressed response gets
+    its own (suffixed with the encoding, as catalog responses are) and the
+    If-None-Match check is repeated against it.
+    """
+    if (response.direct_passthrough or response.status_code < 200 or response.status_code in (204, 304)
+            or response.mimetype != 'application/json' or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    encoding = negotiate_encoding(len(body))
+    if encoding is None:
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak)
+        return response.make_conditional(request)
+    return response
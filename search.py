@@ -0,0 +1,66 @@
+import re
+from catalog import PRODUCT_FIELDS, project
+
+# Full-text product search. products_fts is an external-content FTS5 index over
+# products (no duplicated text); triggers keep it in step with every write path.
+SEARCH_SCHEMA = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, category,
+        content='products', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    );
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts (rowid, name, description, category)
+        VALUES (new.rowid, new.name, new.description, new.category);
+    END;
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description, category)
+        VALUES ('delete', old.rowid, old.name, old.description, old.category);
+    END;
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description, category ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description, category)
+        VALUES ('delete', old.rowid, old.name, old.description, old.category);
+        INSERT INTO products_fts (rowid, name, description, category)
+        VALUES (new.rowid, new.name, new.description, new.category);
+    END;
+'''
+
+# bm25 column weights: name matters most, then category, then description
+RANK = 'bm25(products_fts, 10.0, 1.0, 4.0)'
+PRODUCT_SELECT = ', '.join(f'p.{column}' for column in PRODUCT_FIELDS)
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+MAX_TERMS = 8
+
+def build_match_query(q):
+    """Turn shopper input into a safe FTS5 query; the last term is a prefix for type-ahead"""
+    terms = re.findall(r'\w+', q.lower())[:MAX_TERMS]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+def search_products(conn, q, limit=DEFAULT_PAGE_SIZE, offset=0, fields=None):
+    """Return one bm25-ranked page of in-stock products matching q"""
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    offset = max(0, int(offset))
+    match = build_match_query(q or '')
+    if match is None:
+        return {'items': [], 'next_offset': None, 'has_more': False}
+
+    rows = conn.execute(f'''
+        SELECT {PRODUCT_SELECT} FROM products_fts
+        JOIN products p ON p.rowid = products_fts.rowid
+        WHERE products_fts MATCH ? AND p.in_stock = 1
+        ORDER BY {RANK}
+        LIMIT ? OFFSET ?
+    ''', (match, limit + 1, offset)).fetchall()
+
+    has_more = len(rows) > limit
+    items = project([dict(row) for row in rows[:limit]], fields)
+    return {
+        'items': items,
+        'next_offset': offset + limit if has_more else None,
+        'has_more': has_more,
+    }
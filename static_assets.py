@@ -0,0 +1,90 @@
+import os
+import json
+import mimetypes
+from flask import abort, request, send_file, send_from_directory
+from werkzeug.security import safe_join
+
+# Serves the storefront's HTML/CSS/JS/images. When build_assets.py has
+# produced a dist/ directory, files come from there: content-hashed assets
+# are cached forever, and .br/.gz siblings are picked by Accept-Encoding.
+# send_file() is handed a path, so gunicorn streams it with sendfile().
+#
+# Only front-end files are ever served: dist/ files listed in its manifest,
+# and source files with a PUBLIC_EXTENSIONS suffix. Everything else in the
+# project directory (babyzion.db, ratelimits.db, cj_cache.db, .env, *.py)
+# is a 404.
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+PUBLIC_EXTENSIONS = ('.html', '.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.webp',
+                     '.woff', '.woff2', '.ttf', '.otf')
+
+class StaticAssets:
+    def __init__(self, source_root, dist_root):
+        self.source_root = os.path.abspath(source_root)
+        self.dist_root = os.path.abspath(dist_root)
+        self.manifest_path = os.path.join(self.dist_root, 'manifest.json')
+        self.manifest_mtime = None
+        self.hashed = set()
+        self.pages = set()
+        self.built = False
+
+    def reload(self):
+        """Pick up a fresh manifest after build_assets.py runs (one stat() per request otherwise)"""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self.manifest_mtime:
+            return
+        self.manifest_mtime = mtime
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            self.hashed, self.pages, self.built = set(), set(), False
+            return
+        self.hashed = set(manifest.get('assets', {}).values())
+        self.pages = set(manifest.get('pages', []))
+        self.built = True
+
+    def _accepted_encodings(self):
+        return [(name, suffix) for name, suffix in ENCODINGS
+                if request.accept_encodings.quality(name) > 0]
+
+    @staticmethod
+    def is_public(path):
+        """A front-end file name, not a dotfile or anything in a hidden directory"""
+        parts = path.split('/')
+        return (path.lower().endswith(PUBLIC_EXTENSIONS)
+                and not any(part.startswith('.') for part in parts))
+
+    def serve(self, path):
+        if not self.is_public(path):
+            abort(404)
+        self.reload()
+        if self.built and (path in self.hashed or path in self.pages):
+            built_path = safe_join(self.dist_root, path)
+            if built_path and os.path.isfile(built_path):
+                return self._send_built(built_path, path in self.hashed)
+        return send_from_directory(self.source_root, path)
+
+    def _send_built(self, built_path, immutable):
+        mimetype = mimetypes.guess_type(built_path)[0] or 'application/octet-stream'
+        encoding = None
+        file_path = built_path
+        has_variants = any(os.path.isfile(built_path + suffix) for _, suffix in ENCODINGS)
+        if has_variants:
+            for name, suffix in self._accepted_encodings():
+                if os.path.isfile(built_path + suffix):
+                    encoding, file_path = name, built_path + suffix
+                    break
+
+        response = send_file(file_path, mimetype=mimetype, conditional=True, etag=True)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if has_variants:
+            response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = IMMUTABLE if immutable else REVALIDATE
+        return response
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Local fake of the CJ Dropshipping API for offline load tests.
+
+Point the app at it with CJ_BASE_URL=http://127.0.0.1:<port> (plus any
+CJ_EMAIL/CJ_API_KEY). It serves a deterministic catalog, can add latency
+and random 5xx errors, and answers 429 when its per-second quota is
+exceeded, like the real API.
+
+    python stubs/cj_server.py --port 8765 --products 5000 --qps 2
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ['Organic', 'Cotton', 'Baby', 'Newborn', 'Wooden', 'Rattle', 'Swaddle', 'Blanket',
+         'Feeding', 'Bottle', 'Montessori', 'Toy', 'Mom', 'Matching', 'Ankara', 'Sippy']
+
+def make_product(index):
+    rng = random.Random(index)
+    name = ' '.join(rng.sample(WORDS, 3))
+    return {
+        'pid': f'STUB{index:07d}',
+        'productNameEn': f'{name} {index}',
+        'description': f'{name} from the offline CJ stub',
+        'sellPrice': round(rng.uniform(3, 120), 2),
+        'productImage': f'https://cdn.example.invalid/{index}.jpg',
+    }
+
+class CJStubState:
+    def __init__(self, products=1000, latency=0.0, error_rate=0.0, qps=0):
+        self.products = products
+        self.latency = latency
+        self.error_rate = error_rate
+        self.qps = qps
+        self.lock = threading.Lock()
+        self.window = int(time.time())
+        self.window_count = 0
+        self.calls = {}
+
+    def over_quota(self):
+        if not self.qps:
+            return False
+        with self.lock:
+            now = int(time.time())
+            if now != self.window:
+                self.window, self.window_count = now, 0
+            self.window_count += 1
+            return self.window_count > self.qps
+
+    def count(self, path):
+        with self.lock:
+            self.calls[path] = self.calls.get(path, 0) + 1
+
+class CJStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        state = self.server.state
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        # Accept both /product/list and /api2.0/v1/product/list style URLs
+        path = '/' + '/'.join(self.path.split('?', 1)[0].rstrip('/').split('/')[-2:])
+        state.count(path)
+
+        if state.latency:
+            time.sleep(state.latency)
+        if state.over_quota():
+            return self.reply(429, {'result': False, 'message': 'Too Many Requests'})
+        if state.error_rate and random.random() < state.error_rate:
+            return self.reply(503, {'result': False, 'message': 'Service Unavailable'})
+
+        if path in ('/authentication/getAccessToken', '/authentication/refreshAccessToken'):
+            return self.reply(200, {'result': True, 'data': {
+                'accessToken': f'stub-access-{time.time_ns()}',
+                'refreshToken': f'stub-refresh-{time.time_ns()}',
+            }})
+        if path == '/product/list':
+            page = int(body.get('pageNum', 1))
+            page_size = int(body.get('pageSize', 20))
+            start = (page - 1) * page_size
+            stop = min(start + page_size, state.products)
+            return self.reply(200, {'result': True, 'data': {
+                'pageNum': page, 'pageSize': page_size, 'total': state.products,
+                'list': [make_product(i) for i in range(start, stop)],
+            }})
+        if path == '/product/query':
+            try:
+                index = int(str(body.get('pid', '')).replace('STUB', ''))
+            except ValueError:
+                index = -1
+            if 0 <= index < state.products:
+                return self.reply(200, {'result': True, 'data': make_product(index)})
+            return self.reply(200, {'result': False, 'message': 'Product not found'})
+        return self.reply(404, {'result': False, 'message': 'Not found'})
+
+def start_server(port=0, **options):
+    """Start the stub on a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), CJStubHandler)
+    server.daemon_threads = True
+    server.state = CJStubState(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+@contextmanager
+def running_cj_stub(**options):
+    """Fixture-style helper: yields (server, base_url) and stops the stub afterwards"""
+    server, base_url = start_server(**options)
+    try:
+        yield server, base_url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake CJ Dropshipping API')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered 503')
+    parser.add_argument('--qps', type=int, default=0, help='per-second quota before 429s (0 = unlimited)')
+    args = parser.parse_args()
+    server, base_url = start_server(args.port, products=args.products, latency=args.latency,
+                                    error_rate=args.error_rate, qps=args.qps)
+    print(f"CJ stub listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
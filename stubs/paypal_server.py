@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Local stand-in for the PayPal REST API, for benchmarking checkout offline.
+
+Point the app at it with PAYPAL_BASE_URL=http://127.0.0.1:<port> and any
+PAYPAL_CLIENT_ID/PAYPAL_CLIENT_SECRET. It implements the OAuth token,
+create-order and capture calls, with optional added latency.
+
+    python stubs/paypal_server.py --port 8766 --latency 0.15
+"""
+import json
+import time
+import uuid
+import argparse
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class PayPalStubState:
+    def __init__(self, latency=0.0, token_ttl=32400):
+        self.latency = latency
+        self.token_ttl = token_ttl
+        self.lock = threading.Lock()
+        self.orders = {}
+        self.calls = {}
+
+    def count(self, name):
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+class PayPalStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        state = self.server.state
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length)
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if state.latency:
+            time.sleep(state.latency)
+
+        if path == '/v1/oauth2/token':
+            state.count('token')
+            if not self.headers.get('Authorization', '').startswith('Basic '):
+                return self.reply(401, {'error': 'invalid_client'})
+            return self.reply(200, {
+                'access_token': f'stub-{uuid.uuid4().hex}',
+                'token_type': 'Bearer',
+                'expires_in': state.token_ttl,
+            })
+
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            return self.reply(401, {'name': 'AUTHENTICATION_FAILURE'})
+
+        if path == '/v2/checkout/orders':
+            state.count('create')
+            body = json.loads(raw or b'{}')
+            order_id = uuid.uuid4().hex[:17].upper()
+            with state.lock:
+                state.orders[order_id] = body
+            return self.reply(201, {'id': order_id, 'status': 'CREATED'})
+
+        parts = path.split('/')
+        if len(parts) == 6 and parts[:4] == ['', 'v2', 'checkout', 'orders'] and parts[5] == 'capture':
+            state.count('capture')
+            with state.lock:
+                order = state.orders.pop(parts[4], None)
+            if order is None:
+                return self.reply(404, {'name': 'RESOURCE_NOT_FOUND'})
+            return self.reply(201, {'id': parts[4], 'status': 'COMPLETED',
+                                    'purchase_units': order.get('purchase_units', [])})
+        return self.reply(404, {'name': 'NOT_FOUND'})
+
+def start_server(port=0, **options):
+    """Start the stub on a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), PayPalStubHandler)
+    server.daemon_threads = True
+    server.state = PayPalStubState(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+@contextmanager
+def running_paypal_stub(**options):
+    """Fixture-style helper: yields (server, base_url) and stops the stub afterwards"""
+    server, base_url = start_server(**options)
+    try:
+        yield server, base_url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake PayPal REST API')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    args = parser.parse_args()
+    server, base_url = start_server(args.port, latency=args.latency)
+    print(f"PayPal stub listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
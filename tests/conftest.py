@@ -0,0 +1,18 @@
+import os
+import sys
+import sqlite3
+import pytest
+
+# The app is a flat set of modules at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations import migrate
+
+@pytest.fixture
+def conn(tmp_path):
+    """A migrated, empty database of its own for each test"""
+    conn = sqlite3.connect(str(tmp_path / 'test.db'))
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    yield conn
+    conn.close()
@@ -0,0 +1,31 @@
+from analytics import rebuild_sales_rollup
+from orders import insert_order
+
+CUSTOMER = {'name': 'Amani', 'email': 'amani@example.com', 'phone': '+254700000000',
+            'address': '1 Moi Avenue', 'city': 'Nairobi', 'country': 'KE'}
+
+def rollup(conn):
+    return {row['category']: (row['orders'], row['units'], round(row['revenue'], 2))
+            for row in conn.execute('SELECT category, SUM(orders) AS orders, SUM(units) AS units, '
+                                    'SUM(revenue) AS revenue FROM sales_daily GROUP BY category')}
+
+def test_cancel_after_recategorize_reverses_the_original_category(conn):
+    with conn:
+        conn.executemany('INSERT INTO products (id, name, price, category, in_stock) VALUES (?, ?, ?, ?, 1)',
+                         [('rattle', 'Rattle', 5.0, 'Wooden Toys'), ('bib', 'Bib', 2.0, 'Feeding & Nursing')])
+    insert_order(conn, 'o1', CUSTOMER, [{'id': 'rattle', 'quantity': 2}, {'id': 'bib', 'quantity': 1}])
+    assert rollup(conn) == {'*': (1, 3, 12.0), 'Wooden Toys': (1, 2, 10.0), 'Feeding & Nursing': (1, 1, 2.0)}
+    assert [row['category'] for row in conn.execute('SELECT category FROM order_items ORDER BY product_id')] \
+        == ['Feeding & Nursing', 'Wooden Toys']
+
+    with conn:
+        conn.execute("UPDATE products SET category = 'Educational Toys' WHERE id = 'rattle'")
+        conn.execute("UPDATE orders SET status = 'cancelled' WHERE id = 'o1'")
+    assert rollup(conn) == {'*': (0, 0, 0.0), 'Wooden Toys': (0, 0, 0.0), 'Feeding & Nursing': (0, 0, 0.0)}
+
+    with conn:
+        conn.execute("UPDATE orders SET status = 'paid' WHERE id = 'o1'")
+    incremental = rollup(conn)
+    assert incremental['Wooden Toys'] == (1, 2, 10.0)
+    rebuild_sales_rollup(conn)
+    assert rollup(conn) == {category: totals for category, totals in incremental.items() if totals[0]}
@@ -0,0 +1,49 @@
+import json
+import base64
+import pytest
+from catalog import decode_cursor, encode_cursor, list_products_page
+from orders import customer_orders
+
+def raw_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii').rstrip('=')
+
+@pytest.fixture
+def catalog(conn):
+    with conn:
+        conn.executemany('INSERT INTO products (id, name, price, category, in_stock) VALUES (?, ?, ?, ?, 1)',
+                         [(f'p{n:02d}', f'Product {n:02d}', 100 - n, 'Wooden Toys') for n in range(10)])
+    return conn
+
+def test_pages_follow_on(catalog):
+    first = list_products_page(catalog, sort='price', order='desc', limit=4)
+    second = list_products_page(catalog, sort='price', order='desc', limit=4, cursor=first['next_cursor'])
+    assert [item['id'] for item in first['items'] + second['items']] == [f'p{n:02d}' for n in range(8)]
+
+def test_cursor_from_another_sort_or_order_is_refused(catalog):
+    cursor = list_products_page(catalog, sort='price', order='asc', limit=3)['next_cursor']
+    with pytest.raises(ValueError, match='different sort or order'):
+        list_products_page(catalog, sort='name', order='asc', cursor=cursor)
+    with pytest.raises(ValueError, match='different sort or order'):
+        list_products_page(catalog, sort='price', order='desc', cursor=cursor)
+
+def test_catalog_cursor_is_refused_by_order_history(catalog):
+    cursor = list_products_page(catalog, sort='created_at', order='desc', limit=3)['next_cursor']
+    with pytest.raises(ValueError, match='different sort or order'):
+        customer_orders(catalog, 'mom@example.com', cursor=cursor)
+
+@pytest.mark.parametrize('cursor', [
+    raw_cursor(['price:asc', [1, 2], 'p01']),
+    raw_cursor(['price:asc', {'a': 1}, 'p01']),
+    raw_cursor(['price:asc', True, 'p01']),
+    raw_cursor(['price:asc', 5, 7]),
+    raw_cursor(['price:asc', 5]),
+    raw_cursor([5, 'p01']),
+    raw_cursor('price:asc'),
+    'not-base64!',
+])
+def test_malformed_cursor_is_invalid(cursor):
+    with pytest.raises(ValueError, match='^Invalid cursor$'):
+        decode_cursor(cursor, 'price:asc')
+
+def test_round_trip():
+    assert decode_cursor(encode_cursor(12.5, 'p01', 'price:asc'), 'price:asc') == (12.5, 'p01')
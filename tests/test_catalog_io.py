@@ -0,0 +1,42 @@
+import io
+import json
+from catalog_io import import_products
+
+def ndjson(*lines):
+    return io.StringIO(''.join(line + '\n' for line in lines))
+
+def product(product_id, price):
+    return json.dumps({'id': product_id, 'name': f'Product {product_id}', 'price': price})
+
+def test_nan_price_is_a_row_error_not_a_lost_chunk(conn):
+    stream = ndjson(product('a', 1.5), '{"id": "b", "name": "B", "price": NaN}', product('c', 3))
+    stats = import_products(conn, stream, 'ndjson')
+    assert stats['written'] == 2
+    assert stats['invalid'] == 1
+    assert stats['errors'] == [{'line': 2, 'error': 'price must be a finite number'}]
+    assert [row['id'] for row in conn.execute('SELECT id FROM products ORDER BY id')] == ['a', 'c']
+
+def test_infinite_csv_price_is_rejected(conn):
+    stream = io.StringIO('id,name,price\na,A,2.50\nb,B,inf\nc,C,-Infinity\n')
+    stats = import_products(conn, stream, 'csv')
+    assert stats['written'] == 1
+    assert stats['invalid'] == 2
+    assert conn.execute('SELECT COUNT(*) FROM products WHERE price > 1e300 OR price < -1e300').fetchone()[0] == 0
+
+def test_row_the_database_rejects_keeps_the_rest_of_its_chunk(conn):
+    conn.execute('''
+        CREATE TRIGGER reject_bad BEFORE INSERT ON products WHEN new.id = 'bad'
+        BEGIN SELECT RAISE(ABORT, 'rejected'); END
+    ''')
+    stream = ndjson(product('a', 1), product('bad', 2), product('c', 3))
+    stats = import_products(conn, stream, 'ndjson', chunk_size=10)
+    assert stats['written'] == 2
+    assert stats['invalid'] == 1
+    assert stats['errors'][0]['line'] == 2
+    assert conn.execute('SELECT COUNT(*) FROM products').fetchone()[0] == 2
+
+def test_reimport_counts_unchanged_rows(conn):
+    rows = (product('a', 1), product('b', 2))
+    import_products(conn, ndjson(*rows), 'ndjson')
+    stats = import_products(conn, ndjson(*rows), 'ndjson')
+    assert (stats['written'], stats['unchanged']) == (0, 2)
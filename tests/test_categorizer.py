@@ -0,0 +1,69 @@
+import pytest
+from categorizer import Categorizer, flatten_rules, load_categorizer, load_rules, seed_rules, upgrade_legacy_rules
+
+def legacy_categorize(name):
+    """CJDropshippingClient.categorize_product before the rules table, verbatim"""
+    name_lower = name.lower()
+    if any(word in name_lower for word in ['newborn', 'infant', 'swaddle', 'blanket']):
+        return 'Newborn Essentials'
+    elif any(word in name_lower for word in ['toy', 'rattle', 'wooden', 'play']):
+        return 'Wooden Toys'
+    elif any(word in name_lower for word in ['cultural', 'traditional', 'ethnic', 'ankara', 'dirac']):
+        return 'Cultural Baby Wear'
+    elif any(word in name_lower for word in ['mom', 'mother', 'mommy', 'matching']):
+        return 'Mom & Baby Sets'
+    elif any(word in name_lower for word in ['feed', 'bottle', 'nursing', 'sippy']):
+        return 'Feeding & Nursing'
+    elif any(word in name_lower for word in ['learn', 'educational', 'montessori']):
+        return 'Educational Toys'
+    else:
+        return 'Baby Essentials'
+
+LEGACY_CASES = [
+    ('Baby Breastfeeding Pillow', 'Feeding & Nursing'),
+    ('Newborn Wooden Rattle Toy Set', 'Newborn Essentials'),
+    ('Grandmother Gift', 'Mom & Baby Sets'),
+    ('Montessori Learning Toy', 'Wooden Toys'),
+    ('Ankara Mommy and Me Matching Dress', 'Cultural Baby Wear'),
+    ('Silicone Sippy Cup', 'Feeding & Nursing'),
+    ('Soft Toys Bundle', 'Wooden Toys'),
+    ('Playmat for Tummy Time', 'Wooden Toys'),
+    ('Educational Flash Cards', 'Educational Toys'),
+    ('Baby Monitor', 'Baby Essentials'),
+    ('', 'Baby Essentials'),
+]
+
+@pytest.fixture
+def categorizer():
+    return load_categorizer()
+
+@pytest.mark.parametrize('name, category', LEGACY_CASES)
+def test_defaults_keep_legacy_categories(categorizer, name, category):
+    assert legacy_categorize(name) == category
+    assert categorizer.classify(name) == category
+
+def test_batch_matches_single(categorizer):
+    names = [name for name, _ in LEGACY_CASES]
+    assert categorizer.classify_many(names) == [category for _, category in LEGACY_CASES]
+
+def test_keyword_credits_only_rules_whose_mode_it_satisfies():
+    categorizer = Categorizer(flatten_rules([
+        {'category': 'Toys', 'keywords': ['toy'], 'match': 'word'},
+        {'category': 'Decor', 'keywords': ['toy'], 'match': 'substring', 'weight': 0.5},
+    ]))
+    assert categorizer.classify('Wooden Toy') == 'Toys'
+    # 'toy' inside 'toys' is no whole word, so only the substring rule counts
+    assert categorizer.classify('Wooden Toys') == 'Decor'
+    assert categorizer.classify_many(['Wooden Toys', 'Wooden Toy']) == ['Decor', 'Toys']
+
+def test_migration_upgrades_rules_seeded_as_prefix_rules(conn):
+    conn.execute('DELETE FROM category_rules')
+    old_seed = [dict(group, weight=1, match='prefix') for group in
+                [{'category': 'Feeding & Nursing', 'priority': 5, 'keywords': ['feed', 'bottle']}]]
+    seed_rules(conn, old_seed)
+    conn.execute("UPDATE category_rules SET weight = 3 WHERE keyword = 'bottle'")
+    upgrade_legacy_rules(conn)
+    rules = {rule[1]: rule for rule in load_rules(conn)}
+    assert rules['feed'] == ('Feeding & Nursing', 'feed', 0, 5, 'substring')
+    # Edited by an operator since: left as it is
+    assert rules['bottle'] == ('Feeding & Nursing', 'bottle', 3, 5, 'prefix')
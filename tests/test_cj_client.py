@@ -0,0 +1,98 @@
+import json
+import time
+import pytest
+import requests
+from cj_client import CJDropshippingClient, CJError
+
+def response(status, body=None, headers=None):
+    r = requests.Response()
+    r.status_code = status
+    r.headers.update(headers or {})
+    r._content = json.dumps(body if body is not None else {}).encode('utf-8')
+    return r
+
+class ScriptedSession:
+    """Stands in for requests.Session: post() replays `replies` in order and records each call"""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        self.calls.append((url, json, headers))
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv('CJ_TOKEN_DB', str(tmp_path / 'tokens.db'))
+    monkeypatch.setenv('CJ_CACHE_DB', str(tmp_path / 'cache.db'))
+    monkeypatch.setenv('CJ_EMAIL', 'shop@example.com')
+    monkeypatch.setenv('CJ_API_KEY', 'key')
+    monkeypatch.setenv('CJ_REQUESTS_PER_SECOND', '1000')
+    return CJDropshippingClient()
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(time, 'sleep', slept.append)
+    return slept
+
+def test_retry_after_within_max_backoff_is_honoured(client, sleeps):
+    client.session = ScriptedSession(response(429, headers={'Retry-After': '2'}), response(200, {'result': True}))
+    assert client._post('/product/list', {}).status_code == 200
+    assert sleeps == [2.0]
+
+def test_retry_after_past_max_backoff_gives_up_at_once(client, sleeps):
+    client.session = ScriptedSession(response(429, headers={'Retry-After': '120'}), response(200))
+    assert client._post('/product/list', {}).status_code == 429
+    assert sleeps == []
+    assert len(client.session.calls) == 1
+
+def test_no_wait_past_the_deadline(client, sleeps):
+    client.retry_deadline = 3
+    client.session = ScriptedSession(response(503, headers={'Retry-After': '5'}), response(200))
+    assert client._post('/product/list', {}).status_code == 503
+    assert sleeps == []
+
+def test_jittered_backoff_is_capped(client, sleeps):
+    client.max_backoff = 0.01
+    client.backoff_base = 100
+    client.session = ScriptedSession(requests.ConnectionError('reset'), response(200))
+    assert client._post('/product/list', {}).status_code == 200
+    assert len(sleeps) == 1 and sleeps[0] <= 0.01
+
+def test_connection_error_is_raised_when_out_of_time(client, sleeps):
+    client.retry_deadline = 0
+    client.session = ScriptedSession(requests.ConnectionError('reset'), response(200))
+    with pytest.raises(requests.ConnectionError):
+        client._post('/product/list', {})
+    assert sleeps == []
+
+def login(access_token):
+    return response(200, {'result': True, 'data': {'accessToken': access_token, 'refreshToken': f'{access_token}-refresh'}})
+
+def test_rejected_token_is_refreshed_and_the_call_retried(client):
+    client.session = ScriptedSession(
+        login('first'),
+        response(200, {'result': False, 'code': 1600001, 'message': 'Invalid API key or access token'}),
+        login('second'),
+        response(200, {'result': True, 'data': {'pid': 'P1'}}),
+    )
+    assert client._cached_call('/product/query', {'pid': 'P1'}) == {'pid': 'P1'}
+    urls = [url.rsplit('/', 2)[-2:] for url, _, _ in client.session.calls]
+    assert urls == [['authentication', 'getAccessToken'], ['product', 'query'],
+                    ['authentication', 'refreshAccessToken'], ['product', 'query']]
+    assert client.session.calls[2][1] == {'refreshToken': 'first-refresh'}
+    assert [headers['CJ-Access-Token'] for _, _, headers in client.session.calls if headers] == ['first', 'second']
+    # Published for the other workers too
+    assert client.tokens.store.load().access_token == 'second'
+
+def test_token_rejected_twice_is_an_error(client):
+    rejected = response(401, {'result': False, 'message': 'Unauthorized'})
+    client.session = ScriptedSession(login('first'), rejected, login('second'), rejected)
+    with pytest.raises(CJError):
+        client._cached_call('/product/query', {'pid': 'P1'})
+    assert len(client.session.calls) == 4
@@ -0,0 +1,42 @@
+from cj_client import CJError
+from cj_refresh import refresh_products
+
+class FakeClient:
+    """Answers detail lookups from a dict; a pid mapped to an exception raises it"""
+
+    def __init__(self, answers):
+        self.answers = answers
+
+    def ensure_auth(self):
+        return True
+
+    def get_product_detail(self, product_id, fresh=False):
+        answer = self.answers[product_id]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+def add_products(conn, *ids):
+    with conn:
+        conn.executemany("INSERT INTO products (id, name, price, category, in_stock) VALUES (?, ?, 10, 'Wooden Toys', 1)",
+                         [(product_id, product_id) for product_id in ids])
+
+def stamped(conn):
+    return [row['product_id'] for row in conn.execute('SELECT product_id FROM product_refresh ORDER BY product_id')]
+
+def test_failed_lookup_is_not_stamped(conn):
+    add_products(conn, 'CJ_down', 'CJ_gone', 'CJ_live')
+    client = FakeClient({'down': CJError('Service Unavailable'), 'gone': None,
+                         'live': {'price': 12.0, 'in_stock': 1}})
+    stats = refresh_products(conn, client, budget=10)
+    assert stats['failed'] == 1
+    assert stats['unavailable'] == 1
+    assert stats['changed'] == 1
+    assert stamped(conn) == ['CJ_gone', 'CJ_live']
+
+def test_failed_lookup_stays_due(conn):
+    add_products(conn, 'CJ_down')
+    refresh_products(conn, FakeClient({'down': CJError('Service Unavailable')}), budget=10)
+    stats = refresh_products(conn, FakeClient({'down': {'price': 10.0, 'in_stock': 1}}), budget=10)
+    assert stats['checked'] == 1
+    assert stamped(conn) == ['CJ_down']
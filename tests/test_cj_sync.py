@@ -0,0 +1,35 @@
+import pytest
+from cj_client import CJError
+from cj_sync import sync_catalog
+
+class PagedClient:
+    """fetch_products_page() over `total` products; pages in `failing` raise CJError"""
+
+    def __init__(self, total, failing=()):
+        self.total = total
+        self.failing = set(failing)
+
+    def fetch_products_page(self, keyword='baby', category_id=None, page=1, page_size=20):
+        if page in self.failing:
+            raise CJError('Service Unavailable')
+        start = (page - 1) * page_size
+        products = [{'id': f'CJ_{n}', 'name': f'Baby Item {n}', 'description': '', 'price': 10.0 + n,
+                     'category': 'Baby Essentials', 'image': '', 'in_stock': 1}
+                    for n in range(start, min(start + page_size, self.total))]
+        return products, self.total
+
+def test_failed_pages_are_counted(conn):
+    stats = sync_catalog(conn, PagedClient(50, failing={3, 5}), page_size=10)
+    assert stats['pages_fetched'] == 3
+    assert stats['pages_failed'] == 2
+    assert stats['failed_pages'] == [3, 5]
+    assert stats['inserted'] == 30
+    assert conn.execute('SELECT COUNT(*) FROM products').fetchone()[0] == 30
+
+def test_complete_sync_has_no_failed_pages(conn):
+    stats = sync_catalog(conn, PagedClient(25), page_size=10)
+    assert (stats['pages_fetched'], stats['pages_failed'], stats['failed_pages']) == (3, 0, [])
+
+def test_failed_first_page_fails_the_sync(conn):
+    with pytest.raises(CJError):
+        sync_catalog(conn, PagedClient(50, failing={1}), page_size=10)
@@ -0,0 +1,56 @@
+import io
+import os
+import time
+import fcntl
+import pytest
+from image_cache import ImageCache, _key
+
+def add_entry(cache, product_id, size, age):
+    """A cached original of `size` bytes last used `age` seconds ago; returns its entry directory"""
+    entry = cache._entry_dir(_key(product_id, f'https://img.example/{product_id}.jpg'))
+    with cache._locked(entry):
+        path = os.path.join(entry, 'orig')
+        with open(path, 'wb') as f:
+            f.write(b'\xff\xd8' + b'0' * (size - 2))
+    past = time.time() - age
+    os.utime(path, (past, past))
+    return entry
+
+def test_eviction_removes_emptied_entry_and_its_lock(tmp_path):
+    cache = ImageCache(str(tmp_path), max_bytes=3000)
+    old = add_entry(cache, 'old', 2000, age=3600)
+    new = add_entry(cache, 'new', 2000, age=120)
+    assert cache.evict() == 1
+    assert not os.path.exists(old)
+    assert sorted(os.listdir(new)) == ['.lock', 'orig']
+
+def test_eviction_skips_an_entry_being_filled(tmp_path):
+    cache = ImageCache(str(tmp_path), max_bytes=1000)
+    entry = add_entry(cache, 'busy', 2000, age=3600)
+    with open(os.path.join(entry, '.lock')) as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        assert cache.evict() == 0
+    assert os.path.exists(os.path.join(entry, 'orig'))
+
+def test_entry_is_recreated_after_eviction(tmp_path):
+    cache = ImageCache(str(tmp_path), max_bytes=1000)
+    entry = add_entry(cache, 'gone', 2000, age=3600)
+    cache.evict()
+    with cache._locked(entry):
+        assert os.listdir(entry) == ['.lock']
+
+def test_decompression_bomb_serves_the_original(tmp_path, monkeypatch):
+    Image = pytest.importorskip('PIL.Image')
+    cache = ImageCache(str(tmp_path), max_bytes=10 ** 7)
+    out = io.BytesIO()
+    Image.new('RGB', (64, 64)).save(out, 'PNG')
+    entry = cache._entry_dir(_key('bomb', 'https://img.example/bomb.png'))
+    os.makedirs(entry)
+    with open(os.path.join(entry, 'orig'), 'wb') as f:
+        f.write(out.getvalue())
+    # Anything over twice this many pixels raises DecompressionBombError
+    monkeypatch.setattr(Image, 'MAX_IMAGE_PIXELS', 100)
+    path, mimetype, etag = cache.get('bomb', 'https://img.example/bomb.png', 'sm', 'webp')
+    assert os.path.basename(path) == 'orig'
+    assert mimetype == 'image/png'
+    assert etag.endswith('-orig')
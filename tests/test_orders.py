@@ -0,0 +1,22 @@
+import pytest
+from orders import insert_order, order_detail
+
+CUSTOMER = {'name': 'Amani', 'email': 'amani@example.com', 'phone': '+254700000000',
+            'address': '1 Moi Avenue', 'city': 'Nairobi', 'country': 'KE'}
+
+@pytest.fixture
+def order(conn):
+    with conn:
+        conn.execute("INSERT INTO products (id, name, price, category, in_stock) VALUES ('rattle', 'Rattle', 5.0, 'Wooden Toys', 1)")
+    insert_order(conn, 'BZ1', CUSTOMER, [{'id': 'rattle', 'quantity': 2}])
+    return conn
+
+def test_detail_needs_the_order_email(order):
+    assert order_detail(order, 'BZ1', email='someone@example.com') is None
+    assert order_detail(order, 'BZ1', email='amani@example.com')['total'] == 22.0
+
+def test_detail_leaves_out_contact_details(order):
+    detail = order_detail(order, 'BZ1', email='amani@example.com')
+    assert not {'customer_email', 'customer_phone', 'shipping_address'} & set(detail)
+    assert detail['items'] == [{'id': 'rattle', 'name': 'Rattle', 'quantity': 2, 'price': 5.0}]
+    assert detail['item_count'] == 2